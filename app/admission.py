@@ -0,0 +1,168 @@
+"""Admission control: per-client rate limiting and in-flight request caps.
+
+Requests are shed early with 429 (client over its rate or concurrency share)
+or 503 (server at its global in-flight cap) instead of queueing on the
+database pool. Counters live in the event loop thread, so no locking is
+needed.
+
+Clients are keyed by address: nothing verifies API keys, so keying by the
+``X-API-Key`` header would let a client get a fresh bucket per request (and
+push other clients' buckets out of the table). Behind a load balancer every
+request comes from the proxy's address, so clients are told apart by
+``X-Forwarded-For`` when the peer is one of ``TRUSTED_PROXIES``.
+"""
+import ipaddress
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(value: str) -> List[Network]:
+    """Parse a comma-separated list of IPs and CIDR ranges"""
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+
+def _is_trusted(address: str, trusted_proxies: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_address(scope, trusted_proxies: Sequence[Network] = ()) -> str:
+    """Client IP, taken from ``X-Forwarded-For`` when the peer is a trusted
+    proxy: the rightmost address not added by a trusted proxy"""
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if not trusted_proxies or not _is_trusted(address, trusted_proxies):
+        return address
+    forwarded = []
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            forwarded += [part.strip() for part in value.decode("latin-1").split(",") if part.strip()]
+    for hop in reversed(forwarded):
+        address = hop
+        if not _is_trusted(hop, trusted_proxies):
+            break
+    return address
+
+
+def get_client_key(scope, trusted_proxies: Sequence[Network] = ()) -> str:
+    """Identify the caller by client address"""
+    return "ip:" + client_address(scope, trusted_proxies)
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def acquire(self, now: Optional[float] = None) -> float:
+        """Take one token; return 0 on success or the seconds to wait otherwise"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets, keeping at most ``max_clients`` in memory (LRU)"""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def acquire(self, client_key: str) -> float:
+        """Take a token for ``client_key``; return 0 or the seconds to wait"""
+        bucket = self._buckets.get(client_key)
+        if bucket is None:
+            bucket = self._buckets[client_key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_key)
+        return bucket.acquire()
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware enforcing rate limits and in-flight request caps"""
+
+    def __init__(
+        self,
+        app,
+        rate_per_second: float,
+        burst: int,
+        max_in_flight: int,
+        max_in_flight_per_client: int,
+        exempt_paths: Iterable[str] = ("/health",),
+        trusted_proxies: Sequence[Network] = ()
+    ):
+        self.app = app
+        self.trusted_proxies = list(trusted_proxies)
+        self.limiter = RateLimiter(rate_per_second, burst)
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_client = max_in_flight_per_client
+        self.exempt_paths = set(exempt_paths)
+        self.in_flight = 0
+        self.in_flight_by_client: Dict[str, int] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client_key = get_client_key(scope, self.trusted_proxies)
+        retry_after = self.limiter.acquire(client_key)
+        if retry_after:
+            await self._reject(send, 429, "Rate limit exceeded", retry_after)
+            return
+        if self.in_flight >= self.max_in_flight:
+            await self._reject(send, 503, "Server busy, retry later", 1)
+            return
+        client_in_flight = self.in_flight_by_client.get(client_key, 0)
+        if client_in_flight >= self.max_in_flight_per_client:
+            await self._reject(send, 429, "Too many concurrent requests", 1)
+            return
+
+        self.in_flight += 1
+        self.in_flight_by_client[client_key] = client_in_flight + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            remaining = self.in_flight_by_client[client_key] - 1
+            if remaining:
+                self.in_flight_by_client[client_key] = remaining
+            else:
+                del self.in_flight_by_client[client_key]
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float):
+        """Send a JSON error response with a Retry-After header"""
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,291 @@
+"""Archive for old resultados moved out of the hot ``resultados`` table.
+
+``ARCHIVE_BACKEND=table`` (default) keeps archived rows in
+``resultados_archivo``; ``files`` writes them as gzip-compressed JSON lines
+under ``ARCHIVE_DIR``, one file per tenant and month of ``fecha_examen``,
+with a per-tenant index of the months holding each paciente's resultados.
+Both backends return ``ResultadoArchivado`` objects, so readers don't care
+where a row lives. Archived resultados are read-only.
+"""
+import gzip
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+from sqlalchemy.orm import Session, selectinload
+from app.config import get_settings
+from app.database import as_utc
+from app.models.resultado import Resultado
+from app.models.resultado_archivado import ResultadoArchivado
+from app.tenancy import current_tenant
+
+ARCHIVED_COLUMNS = (
+    "id", "tenant_id", "paciente_id", "tipo_examen", "fecha_examen",
+    "resultado", "observaciones", "created_at", "updated_at",
+)
+_DATETIME_COLUMNS = ("fecha_examen", "created_at", "updated_at")
+
+
+def _sort_key(row: ResultadoArchivado):
+    return as_utc(row.fecha_examen), row.id
+
+
+class TableArchive:
+    """Archive stored in the ``resultados_archivo`` table"""
+    
+    backend = "table"
+    
+    def store(self, db: Session, resultados: List[Resultado]) -> None:
+        """Copy resultados into the archive in the current transaction"""
+        for resultado in resultados:
+            db.add(ResultadoArchivado(
+                **{column: getattr(resultado, column) for column in ARCHIVED_COLUMNS}
+            ))
+    
+    def find(
+        self,
+        db: Session,
+        resultado_id: Optional[int] = None,
+        paciente_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        mediciones: bool = False
+    ) -> List[ResultadoArchivado]:
+        """Get archived resultados matching the filters, oldest exam first,
+        with their mediciones loaded if asked"""
+        query = db.query(ResultadoArchivado)
+        if mediciones:
+            query = query.options(selectinload(ResultadoArchivado.mediciones))
+        if resultado_id is not None:
+            query = query.filter(ResultadoArchivado.id == resultado_id)
+        if paciente_id is not None:
+            query = query.filter(ResultadoArchivado.paciente_id == paciente_id)
+        if desde is not None:
+            query = query.filter(ResultadoArchivado.fecha_examen >= desde)
+        if hasta is not None:
+            query = query.filter(ResultadoArchivado.fecha_examen < hasta)
+        return query.order_by(ResultadoArchivado.fecha_examen, ResultadoArchivado.id).all()
+    
+    def delete_paciente(self, db: Session, paciente_id: int) -> None:
+        """Delete a paciente's archived resultados in the current transaction"""
+        db.query(ResultadoArchivado).filter(
+            ResultadoArchivado.paciente_id == paciente_id
+        ).delete(synchronize_session=False)
+
+
+class FileArchive:
+    """Archive stored as gzip JSON lines files, one per tenant and month.
+    
+    Files are written before the hot rows are deleted, so a failed commit
+    can leave a duplicate line; reads keep the last line per id. File
+    changes are not part of the database transaction. ``pacientes.json`` in
+    each tenant directory maps paciente ids to the months holding their
+    resultados, so per-paciente reads and deletes only open those files.
+    """
+    
+    backend = "files"
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._lock = threading.RLock()
+    
+    def store(self, db: Session, resultados: List[Resultado]) -> None:
+        """Append resultados to their monthly archive files"""
+        lines = defaultdict(list)
+        months = defaultdict(lambda: defaultdict(set))
+        for resultado in resultados:
+            path = self._path(resultado.tenant_id, resultado.fecha_examen)
+            lines[path].append(json.dumps(self._to_dict(resultado)))
+            months[path.parent][str(resultado.paciente_id)].add(f"{resultado.fecha_examen:%Y%m}")
+        with self._lock:
+            for path, entries in lines.items():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Appending adds a gzip member; readers see one continuous stream
+                with gzip.open(path, "at", encoding="utf-8") as archive_file:
+                    archive_file.write("\n".join(entries) + "\n")
+            for tenant_dir, stamps in months.items():
+                index = self._index(tenant_dir)
+                for paciente_id, paciente_stamps in stamps.items():
+                    index[paciente_id] = sorted(paciente_stamps.union(index.get(paciente_id, ())))
+                self._write_index(tenant_dir, index)
+    
+    def find(
+        self,
+        db: Session,
+        resultado_id: Optional[int] = None,
+        paciente_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        mediciones: bool = False
+    ) -> List[ResultadoArchivado]:
+        """Get archived resultados matching the filters, oldest exam first
+        (``mediciones`` is ignored: rows read from files are detached)"""
+        rows = {}
+        if paciente_id is not None:
+            files = self._paciente_files(db, paciente_id)
+        else:
+            files = self._files(db, desde, hasta)
+        for path in files:
+            for data in self._read(path):
+                if resultado_id is not None and data["id"] != resultado_id:
+                    continue
+                if paciente_id is not None and data["paciente_id"] != paciente_id:
+                    continue
+                row = self._from_dict(data)
+                if desde is not None and as_utc(row.fecha_examen) < as_utc(desde):
+                    continue
+                if hasta is not None and as_utc(row.fecha_examen) >= as_utc(hasta):
+                    continue
+                rows[row.id] = row
+        return sorted(rows.values(), key=_sort_key)
+    
+    def daily_counts(
+        self,
+        db: Session,
+        day: Callable[[datetime], date],
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None
+    ) -> Counter:
+        """Count archived resultados in [desde, hasta) per (tenant_id,
+        ``day(fecha_examen)``, tipo_examen), without building rows"""
+        counts: Counter = Counter()
+        for path in self._files(db, desde, hasta):
+            latest = {data["id"]: data for data in self._read(path)}
+            for data in latest.values():
+                fecha_examen = datetime.fromisoformat(data["fecha_examen"])
+                if desde is not None and as_utc(fecha_examen) < as_utc(desde):
+                    continue
+                if hasta is not None and as_utc(fecha_examen) >= as_utc(hasta):
+                    continue
+                counts[(data["tenant_id"], day(fecha_examen), data["tipo_examen"])] += 1
+        return counts
+    
+    def delete_paciente(self, db: Session, paciente_id: int) -> None:
+        """Rewrite the archive files holding a paciente's resultados without them"""
+        with self._lock:
+            for tenant_dir in self._tenant_dirs(db):
+                index = self._index(tenant_dir)
+                stamps = index.pop(str(paciente_id), None)
+                if stamps is None:
+                    continue
+                for stamp in stamps:
+                    self._drop_paciente(tenant_dir / f"resultados-{stamp}.jsonl.gz", paciente_id)
+                self._write_index(tenant_dir, index)
+    
+    def _drop_paciente(self, path: Path, paciente_id: int) -> None:
+        if not path.exists():
+            return
+        entries = list(self._read(path))
+        kept = [data for data in entries if data["paciente_id"] != paciente_id]
+        if len(kept) == len(entries):
+            return
+        if not kept:
+            path.unlink()
+            return
+        temporary = path.with_suffix(".tmp")
+        with gzip.open(temporary, "wt", encoding="utf-8") as archive_file:
+            archive_file.write("".join(json.dumps(data) + "\n" for data in kept))
+        os.replace(temporary, path)
+    
+    def _path(self, tenant_id: str, fecha_examen: datetime) -> Path:
+        return self.directory / tenant_id / f"resultados-{fecha_examen:%Y%m}.jsonl.gz"
+    
+    def _tenant_dirs(self, db: Session) -> List[Path]:
+        """Directory of the session's tenant (all tenants if unscoped)"""
+        tenant_id = current_tenant(db)
+        if tenant_id is not None:
+            return [self.directory / tenant_id]
+        if self.directory.is_dir():
+            return [path for path in self.directory.iterdir() if path.is_dir()]
+        return []
+    
+    def _index(self, tenant_dir: Path) -> Dict[str, List[str]]:
+        """Paciente id -> archive months of a tenant, built from the files
+        for archives written before the index existed"""
+        path = tenant_dir / "pacientes.json"
+        if path.exists():
+            return json.loads(path.read_text())
+        index = defaultdict(set)
+        for archive_path in sorted(tenant_dir.glob("resultados-*.jsonl.gz")):
+            stamp = archive_path.name[len("resultados-"):len("resultados-") + 6]
+            for data in self._read(archive_path):
+                index[str(data["paciente_id"])].add(stamp)
+        index = {paciente_id: sorted(stamps) for paciente_id, stamps in index.items()}
+        if index:
+            with self._lock:
+                self._write_index(tenant_dir, index)
+        return index
+    
+    @staticmethod
+    def _write_index(tenant_dir: Path, index: Dict[str, List[str]]) -> None:
+        temporary = tenant_dir / "pacientes.json.tmp"
+        temporary.write_text(json.dumps(index))
+        os.replace(temporary, tenant_dir / "pacientes.json")
+    
+    def _paciente_files(self, db: Session, paciente_id: int) -> List[Path]:
+        """Archive files holding a paciente's resultados"""
+        files = []
+        for tenant_dir in self._tenant_dirs(db):
+            if not tenant_dir.is_dir():
+                continue
+            for stamp in self._index(tenant_dir).get(str(paciente_id), ()):
+                path = tenant_dir / f"resultados-{stamp}.jsonl.gz"
+                if path.exists():
+                    files.append(path)
+        return files
+    
+    def _files(
+        self,
+        db: Session,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None
+    ) -> List[Path]:
+        """Archive files of the session's tenant (all tenants if unscoped)
+        whose month overlaps [desde, hasta)"""
+        files = []
+        for tenant_dir in self._tenant_dirs(db):
+            for path in sorted(tenant_dir.glob("resultados-*.jsonl.gz")):
+                stamp = path.name[len("resultados-"):len("resultados-") + 6]
+                month = date(int(stamp[:4]), int(stamp[4:]), 1)
+                if hasta is not None and month > hasta.date():
+                    continue
+                if desde is not None and (month.year, month.month) < (desde.year, desde.month):
+                    continue
+                files.append(path)
+        return files
+    
+    @staticmethod
+    def _read(path: Path) -> Iterator[dict]:
+        with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+            for line in archive_file:
+                if line.strip():
+                    yield json.loads(line)
+    
+    @staticmethod
+    def _to_dict(resultado: Resultado) -> dict:
+        data = {column: getattr(resultado, column) for column in ARCHIVED_COLUMNS}
+        for column in _DATETIME_COLUMNS:
+            if data[column] is not None:
+                data[column] = data[column].isoformat()
+        return data
+    
+    @staticmethod
+    def _from_dict(data: dict) -> ResultadoArchivado:
+        values = dict(data)
+        for column in _DATETIME_COLUMNS:
+            if values.get(column) is not None:
+                values[column] = datetime.fromisoformat(values[column])
+        return ResultadoArchivado(**values)
+
+
+@lru_cache()
+def get_archive():
+    """Get the configured resultados archive"""
+    settings = get_settings()
+    if settings.archive_backend == "files":
+        return FileArchive(settings.archive_dir)
+    return TableArchive()
@@ -0,0 +1,106 @@
+"""Small in-process caches."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe cache whose entries expire ``ttl_seconds`` after being set.
+    
+    Holds at most ``maxsize`` entries, evicting the oldest first. A TTL of 0
+    disables caching.
+    """
+    
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value"""
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses with per-scope generations.
+    
+    Writers ``bump`` the generation of a scope (e.g. a resource); readers
+    put the generations they saw before building a response in its key, so
+    a bump makes older entries unreachable and LRU eviction reclaims them.
+    Memory is bounded by ``maxsize`` entries and ``max_bytes`` of bodies. A
+    ``maxsize`` of 0 disables caching.
+    """
+    
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._size = 0
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+    
+    def generation(self, scope: Hashable) -> int:
+        """Current generation of ``scope``"""
+        return self._generations.get(scope, 0)
+    
+    def bump(self, scope: Hashable) -> None:
+        """Invalidate every entry built with the current generation of ``scope``"""
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+    
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Get a cached body, marking it recently used"""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+    
+    def set(self, key: Hashable, body: bytes) -> None:
+        """Cache a body, evicting least recently used entries to fit"""
+        if self.maxsize <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while len(self._entries) > self.maxsize or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,176 @@
+"""In-process change feed pushed to clients over server-sent events.
+
+Services publish create/update/delete events after committing; each SSE
+connection holds a bounded asyncio queue fed from the (threaded) request
+handlers. A subscriber that falls too far behind is sent a ``reset`` event
+and disconnected, so it resyncs with ``updated_since`` instead of buffering
+without limit. With a shared invalidation bus (``INVALIDATION_BACKEND=
+postgres``) events are also broadcast to the other pods, so clients see
+writes whichever pod handled them; a record too large for one bus message
+is sent with its id only. When the bus may have lost messages (its listener
+reconnected) every subscriber is sent a ``reset``.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+from app.config import get_settings
+from app.invalidation import ALL, MAX_MESSAGE_BYTES, get_invalidation_bus
+
+# Bus message kind carrying change events between pods
+BUS_KIND = "change"
+
+RESOURCES = ("pacientes", "citas", "resultados")
+
+
+class TooManySubscribers(Exception):
+    """Raised when the feed is at its subscriber limit"""
+
+
+class Subscription:
+    """An SSE client's queue of pending events"""
+
+    def __init__(self, resources: Set[str], maxsize: int, tenant_id: Optional[str] = None):
+        self.resources = resources
+        self.tenant_id = tenant_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event: dict) -> None:
+        """Queue an event; runs on the subscriber's event loop"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "event": "reset", "data": {}})
+
+
+class ChangeFeed:
+    """Fan out change events to subscribed SSE clients"""
+
+    def __init__(self, max_subscribers: int = 1000, queue_size: int = 1000, bus=None):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.bus = bus
+        self._subscriptions: Set[Subscription] = set()
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        if bus is not None:
+            bus.listen(BUS_KIND, self._receive)
+            bus.subscribe(self._on_invalidate)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(self, resources: Iterable[str], tenant_id: Optional[str] = None) -> Subscription:
+        """Register a subscription for ``resources`` of ``tenant_id`` (all tenants
+        when ``None``); call from the event loop"""
+        subscription = Subscription(set(resources), self.queue_size, tenant_id)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription"""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(
+        self,
+        resource: str,
+        action: str,
+        record_id: Optional[int],
+        data: Optional[Callable[[], dict]] = None,
+        tenant_id: Optional[str] = None
+    ) -> None:
+        """Send an event to subscribers of ``resource`` in ``tenant_id``.
+
+        ``data`` is called to build the payload only when someone listens,
+        here or, with a shared bus, possibly on another pod. Safe to call
+        from any thread. Events about many records at once (imports) have
+        no ``record_id``.
+        """
+        shared = self.bus is not None and self.bus.shared
+        targets = self._targets(resource, tenant_id)
+        if not targets and not shared:
+            return
+        payload = {"id": record_id, **(data() if data else {})}
+        self._offer(targets, resource, action, payload)
+        if shared:
+            message = {"r": resource, "a": action, "t": tenant_id, "d": payload}
+            if len(json.dumps(message, default=str)) > MAX_MESSAGE_BYTES:
+                message["d"] = {"id": record_id}
+            self.bus.broadcast(BUS_KIND, message)
+
+    def _targets(self, resource: str, tenant_id: Optional[str]) -> List[Subscription]:
+        with self._lock:
+            return [
+                s for s in self._subscriptions
+                if resource in s.resources and s.tenant_id in (None, tenant_id)
+            ]
+
+    def _offer(self, targets: List[Subscription], resource: str, action: str, payload: dict) -> None:
+        if not targets:
+            return
+        event = {"id": next(self._sequence), "event": f"{resource}.{action}", "data": payload}
+        for subscription in targets:
+            subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+    def _receive(self, message: dict) -> None:
+        """Deliver an event broadcast by another pod"""
+        targets = self._targets(message["r"], message.get("t"))
+        self._offer(targets, message["r"], message["a"], message["d"])
+
+    def _on_invalidate(self, resource: str, tenant_id: Optional[str]) -> None:
+        if resource != ALL:
+            return
+        # Events from other pods may have been lost: every client resyncs
+        with self._lock:
+            targets = list(self._subscriptions)
+        event = {"id": next(self._sequence), "event": "reset", "data": {}}
+        for subscription in targets:
+            subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+
+def format_event(event: dict) -> str:
+    """Encode an event in the text/event-stream format"""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def sse_stream(
+    feed: ChangeFeed,
+    subscription: Subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    keepalive_seconds: float = 15.0
+):
+    """Yield SSE frames for a subscription until the client goes away"""
+    try:
+        yield "retry: 3000\n\n"
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event)
+            if event["event"] == "reset":
+                break
+    finally:
+        feed.unsubscribe(subscription)
+
+
+settings = get_settings()
+
+change_feed = ChangeFeed(
+    max_subscribers=settings.change_feed_max_subscribers,
+    queue_size=settings.change_feed_queue_size,
+    bus=get_invalidation_bus()
+)
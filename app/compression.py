@@ -0,0 +1,90 @@
+"""Transparent compression of large text columns.
+
+``CompressedText`` stores values of at least ``COMPRESSION_MIN_BYTES``
+(UTF-8) compressed with zlib or, when the optional ``zstandard`` package is
+installed and ``COMPRESSION_ALGORITHM=zstd``, with zstd. Compressed values
+are kept in the same text column, base64-encoded behind a short marker that
+starts with a control character real text doesn't contain, so rows written
+before compression was enabled (or below the threshold) read back as is.
+
+Note that Postgres already TOAST-compresses values over ~2 KB with pglz/lz4;
+zstd/zlib still compress clinical text noticeably better, and SQLite has no
+compression of its own.
+"""
+import base64
+import zlib
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy.types import Text, TypeDecorator
+from app.config import get_settings
+
+MARKER_PREFIX = "\x1f"
+ZLIB_MARKER = MARKER_PREFIX + "z1:"
+ZSTD_MARKER = MARKER_PREFIX + "s1:"
+
+
+@lru_cache()
+def _zstd():
+    """The optional ``zstandard`` module"""
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            "zstd compression requires the optional 'zstandard' package: "
+            "pip install -r requirements-optional.txt"
+        ) from exc
+    return zstandard
+
+
+def compress_text(value: str, algorithm: str = "zlib", level: int = 6) -> str:
+    """Compress ``value`` into its marked, text-safe form"""
+    data = value.encode("utf-8")
+    if algorithm == "zstd":
+        packed = _zstd().ZstdCompressor(level=level).compress(data)
+        marker = ZSTD_MARKER
+    else:
+        packed = zlib.compress(data, level)
+        marker = ZLIB_MARKER
+    return marker + base64.b64encode(packed).decode("ascii")
+
+
+def decompress_text(value: str) -> str:
+    """Inverse of ``compress_text``; unmarked values are returned unchanged"""
+    if not value.startswith(MARKER_PREFIX):
+        return value
+    if value.startswith(ZLIB_MARKER):
+        return zlib.decompress(base64.b64decode(value[len(ZLIB_MARKER):])).decode("utf-8")
+    if value.startswith(ZSTD_MARKER):
+        packed = base64.b64decode(value[len(ZSTD_MARKER):])
+        return _zstd().ZstdDecompressor().decompress(packed).decode("utf-8")
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """Text column compressing values at or above the configured size"""
+    
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        settings = get_settings()
+        # Text that happens to start with the marker is always compressed,
+        # so stored values are never ambiguous
+        escape = value.startswith(MARKER_PREFIX)
+        if not escape and (
+            not settings.compression_min_bytes
+            or len(value.encode("utf-8")) < settings.compression_min_bytes
+        ):
+            return value
+        compressed = compress_text(
+            value, settings.compression_algorithm, settings.compression_level
+        )
+        # Incompressible values are stored as is
+        return compressed if escape or len(compressed) < len(value) else value
+    
+    def process_result_value(self, value: Optional[str], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -0,0 +1,95 @@
+"""Storage and read-latency benchmark for ``CompressedText``.
+
+Writes the same synthetic lab/imaging reports into SQLite tables using plain
+``Text`` and ``CompressedText`` (zlib, and zstd when ``zstandard`` is
+installed), then reports database size and the time to read every row back.
+
+Usage:
+    python -m app.compression_benchmark [rows] [report_kb]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine, select, text
+from app.compression import CompressedText, _zstd
+from app.config import get_settings
+
+ANALYTES = ["Hemoglobina", "Hematocrito", "Leucocitos", "Plaquetas", "Glucosa", "Creatinina",
+            "Urea", "Colesterol", "Triglicéridos", "Sodio", "Potasio", "Cloro", "TSH", "T4 libre"]
+FINDINGS = [
+    "Parénquima de ecogenicidad conservada, sin lesiones focales.",
+    "No se observan colecciones ni líquido libre.",
+    "Estructuras vasculares de calibre y trayecto normales.",
+    "Se recomienda control evolutivo según criterio clínico.",
+]
+
+
+def synthetic_report(size_kb: int, rng: random.Random) -> str:
+    """A lab panel plus imaging narrative of roughly ``size_kb`` KB"""
+    lines: List[str] = []
+    while sum(len(line) + 1 for line in lines) < size_kb * 1024:
+        analyte = rng.choice(ANALYTES)
+        lines.append(f"{analyte}: {rng.uniform(0.5, 300):.2f} (ref {rng.randint(1, 50)}-{rng.randint(60, 400)})")
+        if rng.random() < 0.3:
+            lines.append(rng.choice(FINDINGS))
+    return "\n".join(lines)
+
+
+def run_case(column_type, reports: List[str]) -> Dict[str, float]:
+    """Store ``reports`` in a fresh SQLite file; return size (KB) and read time (ms)"""
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = MetaData()
+    table = Table("reports", metadata, Column("id", Integer, primary_key=True), Column("body", column_type))
+    try:
+        metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [{"body": report} for report in reports])
+        with engine.connect() as conn:
+            conn.execute(text("VACUUM"))
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            rows = conn.execute(select(table.c.body)).scalars().all()
+        elapsed = (time.perf_counter() - start) * 1000
+        assert rows == reports
+        return {"size_kb": os.path.getsize(path) / 1024, "read_ms": elapsed}
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def main():
+    """Print the benchmark results"""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    report_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = random.Random(42)
+    reports = [synthetic_report(report_kb, rng) for _ in range(rows)]
+    
+    settings = get_settings()
+    settings.compression_min_bytes = 4096
+    cases = [("text", Text, None), ("zlib", CompressedText, "zlib")]
+    try:
+        _zstd()
+        cases.append(("zstd", CompressedText, "zstd"))
+    except RuntimeError:
+        print("zstandard not installed, skipping zstd")
+    
+    print(f"{rows} reports of ~{report_kb} KB")
+    baseline = None
+    for name, column_type, algorithm in cases:
+        if algorithm:
+            settings.compression_algorithm = algorithm
+        result = run_case(column_type, reports)
+        baseline = baseline or result["size_kb"]
+        print(
+            f"  {name:<5} size {result['size_kb']:10.0f} KB ({result['size_kb'] / baseline:5.1%})"
+            f"  read all {result['read_ms']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
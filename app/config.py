@@ -12,6 +12,43 @@ class Settings(BaseSettings):
     
     # Database Configuration
     database_url: str = ""
+    database_replica_urls: str = ""  # comma-separated read replica URLs
+    replica_sticky_seconds: float = 5.0  # read from primary this long after a client's write
+    replica_retry_seconds: float = 30.0  # skip a failed replica this long
+    db_prepare_threshold: int = 5  # psycopg 3: prepare statements server-side after N runs; 0 disables
+    
+    # Multi-tenancy Configuration
+    default_tenant: str = "default"  # tenant for requests without X-Tenant-ID; empty requires the header
+    partition_strategy: str = ""  # "", tenant, month (Postgres only)
+    partition_count: int = 8  # hash partitions per table with the tenant strategy
+    partition_months_ahead: int = 3  # monthly partitions created in advance
+    partition_maintenance_interval_seconds: int = 86400
+    
+    # Archive Configuration
+    archive_backend: str = "table"  # table, files
+    archive_dir: str = "./archive"  # used by the files backend
+    resultados_archive_after_days: int = 0  # archive resultados older than this; 0 disables
+    resultados_archive_interval_seconds: int = 86400
+    
+    # Compression Configuration
+    compression_min_bytes: int = 4096  # compress resultado texts this large; 0 disables
+    compression_algorithm: str = "zlib"  # zlib, zstd (needs the optional zstandard package)
+    compression_level: int = 6
+    
+    # Soft Delete Configuration
+    soft_delete_enabled: bool = False  # mark rows deleted; the purge job removes them later
+    soft_delete_retention_days: int = 30  # marked rows are kept this long (audits)
+    soft_delete_purge_hours: str = "2-5"  # off-peak UTC hours [start-end) the purge runs in
+    soft_delete_purge_batch_size: int = 500  # rows per purge transaction
+    soft_delete_purge_interval_seconds: int = 900
+    
+    # Export Configuration
+    export_batch_size: int = 10000  # rows per Parquet row group / Arrow batch
+    
+    # Import Configuration
+    import_batch_size: int = 5000  # rows per transaction
+    import_max_rejects: int = 1000  # rejected rows listed in the report
+    import_spool_bytes: int = 16777216  # uploads larger than this are spooled to disk
     
     # Application Configuration
     app_name: str = "VitalApp Backend"
@@ -21,6 +58,65 @@ class Settings(BaseSettings):
     # API Configuration
     api_prefix: str = "/api/v1"
     
+    # Idempotency Configuration
+    idempotency_store: str = "database"  # database, memory
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lease_seconds: int = 90  # in-progress keys are taken over after this (> request timeout)
+    idempotency_purge_interval_seconds: int = 3600
+    
+    # Admission Control Configuration
+    rate_limit_enabled: bool = True
+    rate_limit_per_second: float = 20.0
+    rate_limit_burst: int = 40
+    max_in_flight: int = 100
+    max_in_flight_per_client: int = 20
+    trusted_proxies: str = ""  # comma-separated proxy IPs/CIDRs whose X-Forwarded-For is honoured
+    max_page_size: int = 500
+    
+    # Statistics Configuration
+    stats_cache_ttl_seconds: int = 0  # 0 disables caching
+    stats_use_summary: bool = True  # serve whole-day queries from resumen_diario
+    resumen_refresh_interval_seconds: int = 0  # 0 disables the periodic refresh
+    resumen_refresh_days: int = 7  # days rebuilt by each periodic refresh
+    
+    # Response Cache Configuration
+    response_cache_max_entries: int = 0  # cached list pages; 0 disables
+    response_cache_max_bytes: int = 67108864  # total size of cached bodies
+    invalidation_backend: str = "memory"  # memory, postgres (LISTEN/NOTIFY across pods)
+    invalidation_reconnect_seconds: float = 5.0
+    
+    # Tracing Configuration
+    tracing_enabled: bool = False  # needs the optional opentelemetry-sdk package
+    tracing_sample_ratio: float = 1.0  # fraction of new traces recorded
+    tracing_exporter: str = "otlp"  # otlp, console, file
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file: str = "./traces.jsonl"  # used by the file exporter
+    
+    # Profiling Configuration
+    admin_token: str = ""  # X-Admin-Token for /admin endpoints; empty disables them
+    profiling_enabled: bool = False  # allow on-demand CPU profiles at /admin/profile
+    profiling_max_seconds: float = 60.0
+    runtime_metrics_interval_seconds: float = 1.0  # event loop lag / threadpool gauges; 0 disables
+    
+    # Change Feed Configuration
+    change_feed_max_subscribers: int = 1000
+    change_feed_queue_size: int = 1000
+    change_feed_keepalive_seconds: float = 15.0
+    
+    # Delta Sync Configuration
+    sync_safety_lag_seconds: float = 5.0  # hold back rows younger than this
+    sync_tombstone_retention_days: int = 90  # older tokens require a full resync
+    sync_tombstone_purge_interval_seconds: int = 86400
+    
+    # Background Jobs Configuration
+    job_backend: str = "memory"  # memory, database
+    job_workers: int = 2
+    job_queue_maxsize: int = 1000
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 1.0
+    job_poll_interval_seconds: float = 1.0
+    paciente_inline_delete_limit: int = 1000  # larger histories are deleted in the background
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=False
@@ -1,26 +1,227 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.datastructures import MutableHeaders
 from app.config import get_settings
+from app.tenancy import get_tenant_id, set_tenant
 
 settings = get_settings()
 
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Time of a client's last write (Unix seconds), echoed back by the client
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+# Session.info flag of request sessions bound to a replica
+_REPLICA_INFO = "replica"
+
+
+def connect_args(url: str) -> dict:
+    """Driver options; psycopg 3 prepares frequently run statements server-side"""
+    if make_url(url).drivername == "postgresql+psycopg":
+        return {"prepare_threshold": settings.db_prepare_threshold or None}
+    return {}
+
+
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    echo=settings.debug
+    echo=settings.debug,
+    connect_args=connect_args(settings.database_url)
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request sessions keep loaded objects after commit, so responses serialize
+# without checking a connection out again; jobs keep the default
+REQUEST_SESSION_OPTIONS = {"expire_on_commit": False}
+
 # Create Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for getting database session"""
-    db = SessionLocal()
+def utcnow() -> datetime:
+    """Current UTC time, used for client-side timestamps (microsecond precision)"""
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Normalize a timestamp to aware UTC; naive values are taken as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class ReplicaRouter:
+    """Pick the engine for read-only requests.
+    
+    Replicas are used round-robin. A replica that fails is skipped for
+    ``retry_seconds``, and a client that wrote in the last
+    ``sticky_seconds`` reads from the primary so it sees its own writes
+    despite replication lag. The write time travels with the client (see
+    ``ReadYourWritesMiddleware``), so this holds whichever pod serves it.
+    """
+    
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        sticky_seconds: float,
+        retry_seconds: float
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._cycle = itertools.cycle(replicas) if replicas else None
+        self._unhealthy_until: Dict[Engine, float] = {}
+        self._lock = threading.Lock()
+    
+    def mark_unhealthy(self, replica: Engine) -> None:
+        """Skip a failing replica for a while"""
+        with self._lock:
+            self._unhealthy_until[replica] = time.monotonic() + self.retry_seconds
+    
+    def engine_for_read(self, last_write: Optional[float] = None) -> Engine:
+        """Return the engine for a read from a client that last wrote at
+        ``last_write`` (Unix seconds, None if unknown)"""
+        if not self.replicas:
+            return self.primary
+        if last_write is not None and time.time() - last_write < self.sticky_seconds:
+            return self.primary
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if self._unhealthy_until.get(replica, 0) <= now:
+                    return replica
+        return self.primary
+
+
+replica_router = ReplicaRouter(
+    engine,
+    [
+        create_engine(
+            url.strip(), pool_pre_ping=True, echo=settings.debug, connect_args=connect_args(url.strip())
+        )
+        for url in settings.database_replica_urls.split(",")
+        if url.strip()
+    ],
+    sticky_seconds=settings.replica_sticky_seconds,
+    retry_seconds=settings.replica_retry_seconds
+)
+
+
+@contextmanager
+def read_only(db: Session) -> Iterator[Session]:
+    """Run a block in a read-only transaction and release its connection.
+    
+    On Postgres the transaction is declared READ ONLY. It ends with the
+    block, returning the connection to the pool before the response is
+    serialized; objects loaded by a request session stay usable.
+    """
+    if not db.in_transaction() and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SET TRANSACTION READ ONLY"))
+    try:
+        yield db
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+
+def get_db(request: Request):
+    """Dependency for getting database session scoped to the request's tenant
+    
+    The session checks a connection out on its first query and returns it
+    when the service commits (or ``read_only`` ends), not when the request
+    finishes.
+    """
+    tenant_id = get_tenant_id(request)
+    db = SessionLocal(**REQUEST_SESSION_OPTIONS)
+    set_tenant(db, tenant_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def last_write(request: Request) -> Optional[float]:
+    """Time of the client's last write from its header or cookie, if any"""
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """Stamp successful writes with ``X-Last-Write`` and a matching cookie
+    
+    Browsers send the cookie back and other clients can echo the header;
+    reads carrying a recent stamp go to the primary on any pod. Stamps use
+    the wall clock, so pods need roughly synchronized clocks (NTP).
+    """
+    
+    def __init__(self, app, sticky_seconds: float):
+        self.app = app
+        self.max_age = max(1, math.ceil(sticky_seconds))
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_stamp(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                stamp = f"{time.time():.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(LAST_WRITE_HEADER, stamp)
+                headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={stamp}; Max-Age={self.max_age}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+        
+        await self.app(scope, receive, send_with_stamp)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _fail_over_to_primary(state):
+    """Run a read on the primary when the session's replica fails"""
+    session = state.session
+    if not session.info.get(_REPLICA_INFO):
+        return None
+    try:
+        return state.invoke_statement()
+    except OperationalError:
+        replica_router.mark_unhealthy(session.bind)
+        session.info[_REPLICA_INFO] = False
+        session.rollback()
+        session.bind = replica_router.primary
+        return state.invoke_statement()
+
+
+def get_read_db(request: Request):
+    """Dependency for getting a session for read-only requests (replica if
+    available, falling back to the primary if it fails)"""
+    tenant_id = get_tenant_id(request)
+    read_engine = replica_router.engine_for_read(last_write(request))
+    db = SessionLocal(bind=read_engine, **REQUEST_SESSION_OPTIONS)
+    db.info[_REPLICA_INFO] = read_engine is not replica_router.primary
+    set_tenant(db, tenant_id)
     try:
         yield db
     finally:
@@ -30,3 +231,52 @@ def get_db():
 def create_tables():
     """Create all tables in the database"""
     Base.metadata.create_all(bind=engine)
+
+
+# Full unique email index of databases created before tenancy, replaced by
+# the per-tenant case-insensitive one
+LEGACY_EMAIL_INDEX = "ix_pacientes_email"
+
+
+def add_tenant_columns(bind: Engine) -> None:
+    """Add ``tenant_id`` to tables created before tenancy existed, giving
+    their rows ``DEFAULT_TENANT`` (``default`` if unset), and drop the
+    global unique email index.
+    
+    Runs before ``add_soft_delete_columns``, whose partial indexes lead with
+    ``tenant_id``.
+    """
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if "tenant_id" not in table.c or table.name not in existing:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            if "tenant_id" in columns:
+                continue
+            column_type = table.c.tenant_id.type.compile(dialect=bind.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN tenant_id {column_type}"))
+            conn.execute(
+                text(f"UPDATE {table.name} SET tenant_id = :tenant_id"),
+                {"tenant_id": settings.default_tenant or "default"}
+            )
+            if bind.dialect.name == "postgresql":
+                # SQLite can't add the constraint to an existing column
+                conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN tenant_id SET NOT NULL"))
+        conn.execute(text(f"DROP INDEX IF EXISTS {LEGACY_EMAIL_INDEX}"))
+
+
+# Tables whose rows created before updated_at was set on insert have it NULL
+UPDATED_AT_TABLES = ("pacientes", "citas", "resultados")
+
+
+def backfill_updated_at(bind: Engine) -> None:
+    """Give rows without ``updated_at`` their creation time, so
+    ``updated_since`` queries and sync cursors don't skip them"""
+    with bind.begin() as conn:
+        for table in UPDATED_AT_TABLES:
+            conn.execute(text(
+                f"UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) "
+                "WHERE updated_at IS NULL"
+            ))
@@ -0,0 +1,159 @@
+"""Idempotency-Key support for create endpoints.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets the
+response of the first attempt replayed instead of creating a duplicate. Keys
+are scoped per tenant and resource and expire after ``idempotency_ttl_seconds``.
+A key is held for ``idempotency_lease_seconds`` while its request runs; if the
+worker dies before completing it, a retry takes the key over after that.
+"""
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Type
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.jobs import job
+from app.models.idempotency import IdempotencyKey
+from app.services.idempotency_service import IdempotencyService
+from app.tenancy import current_tenant
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class InMemoryIdempotencyStore:
+    """Process-local idempotency store, mainly for tests and single-worker setups.
+    
+    Exposes the same interface as ``IdempotencyService``; the ``db`` argument
+    is accepted and ignored.
+    """
+    
+    def __init__(self):
+        self._records: Dict[Tuple[str, str], Tuple[float, IdempotencyKey]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, db: Session, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """Get a non-expired idempotency record"""
+        with self._lock:
+            entry = self._records.get((scope, key))
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+    
+    def reserve(
+        self,
+        db: Session,
+        scope: str,
+        key: str,
+        request_hash: str,
+        lease_seconds: int
+    ) -> Optional[IdempotencyKey]:
+        """Reserve a key for ``lease_seconds``, or return the record already holding it"""
+        with self._lock:
+            entry = self._records.get((scope, key))
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            record = IdempotencyKey(scope=scope, key=key, request_hash=request_hash)
+            self._records[(scope, key)] = (time.monotonic() + lease_seconds, record)
+            return None
+    
+    def complete(
+        self,
+        db: Session,
+        scope: str,
+        key: str,
+        status_code: int,
+        response_body: str,
+        ttl_seconds: int
+    ) -> None:
+        """Store the response for a reserved key, kept for ``ttl_seconds``"""
+        with self._lock:
+            entry = self._records.get((scope, key))
+            if entry:
+                entry[1].status_code = status_code
+                entry[1].response_body = response_body
+                self._records[(scope, key)] = (time.monotonic() + ttl_seconds, entry[1])
+    
+    def release(self, db: Session, scope: str, key: str) -> None:
+        """Release a reserved key after its request failed"""
+        with self._lock:
+            entry = self._records.get((scope, key))
+            if entry and entry[1].status_code is None:
+                del self._records[(scope, key)]
+    
+    def purge_expired(self, db: Session) -> int:
+        """Delete expired idempotency records"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (expires, _) in self._records.items() if expires <= now]
+            for k in expired:
+                del self._records[k]
+        return len(expired)
+
+
+@lru_cache()
+def get_idempotency_store():
+    """Get the configured idempotency store"""
+    if get_settings().idempotency_store == "memory":
+        return InMemoryIdempotencyStore()
+    return IdempotencyService
+
+
+def idempotent_create(
+    db: Session,
+    scope: str,
+    idempotency_key: Optional[str],
+    payload: BaseModel,
+    create: Callable[[], object],
+    response_model: Type[BaseModel],
+    status_code: int = status.HTTP_201_CREATED
+):
+    """Run ``create`` at most once per idempotency key.
+    
+    Without a key, ``create()`` is returned as is. With a key, the serialized
+    response is stored and replayed for later requests with the same key and
+    body; reusing a key with a different body is rejected.
+    """
+    if not idempotency_key:
+        return create()
+    
+    tenant_id = current_tenant(db)
+    if tenant_id is not None:
+        scope = f"{tenant_id}:{scope}"
+    settings = get_settings()
+    store = get_idempotency_store()
+    request_hash = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+    existing = store.reserve(db, scope, idempotency_key, request_hash, settings.idempotency_lease_seconds)
+    if existing:
+        if existing.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if existing.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        return Response(
+            content=existing.response_body,
+            status_code=existing.status_code,
+            media_type="application/json",
+            headers={REPLAY_HEADER: "true"}
+        )
+    
+    try:
+        body = response_model.model_validate(create()).model_dump_json()
+    except BaseException:
+        store.release(db, scope, idempotency_key)
+        raise
+    store.complete(db, scope, idempotency_key, status_code, body, settings.idempotency_ttl_seconds)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+@job("idempotency.purge")
+def purge_idempotency_keys_job(db: Session):
+    """Periodic job deleting expired idempotency keys"""
+    get_idempotency_store().purge_expired(db)
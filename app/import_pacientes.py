@@ -0,0 +1,64 @@
+"""Bulk import pacientes from a CSV or NDJSON file.
+
+CSV files need a header row with the ``PacienteCreate`` field names
+(``nombre``, ``apellido``, ``email``, ...); NDJSON files hold one object per
+line. Emails already registered in the tenant are skipped, invalid rows are
+reported with their line number.
+
+Usage:
+    python -m app.import_pacientes FILE [--formato csv|ndjson] [--tenant TENANT] [--batch-size N]
+"""
+import argparse
+import sys
+import time
+from app.config import get_settings
+from app.database import SessionLocal
+from app.schemas.importacion import ImportacionResponse
+from app.services.importacion_service import FORMATS, ImportacionService
+from app.tenancy import set_tenant
+
+
+def main(argv=None):
+    """Run the import and print progress and rejects"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.import_pacientes", description=__doc__.splitlines()[0])
+    parser.add_argument("file")
+    parser.add_argument("--formato", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--tenant", default=settings.default_tenant)
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    args = parser.parse_args(argv)
+    formato = args.formato or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+    
+    start = time.perf_counter()
+    
+    def progress(report: ImportacionResponse) -> None:
+        rate = report.filas / max(time.perf_counter() - start, 1e-9)
+        print(
+            f"{report.filas} rows: {report.importados} imported, {report.duplicados} duplicates, "
+            f"{report.rechazados} rejected ({rate:,.0f} rows/s)",
+            file=sys.stderr
+        )
+    
+    db = SessionLocal()
+    set_tenant(db, args.tenant)
+    try:
+        with open(args.file, "rb") as stream:
+            report = ImportacionService.import_pacientes(
+                db, stream, formato, args.batch_size, settings.import_max_rejects, progress
+            )
+    finally:
+        db.close()
+    for rechazo in report.rechazos:
+        print(f"line {rechazo.linea}: {rechazo.error}")
+    if report.rechazados > len(report.rechazos):
+        print(f"... {report.rechazados - len(report.rechazos)} more rejects")
+    print(
+        f"Imported {report.importados} of {report.filas} rows "
+        f"({report.duplicados} duplicates, {report.rechazados} rejected) "
+        f"in {time.perf_counter() - start:.1f} s"
+    )
+    return 1 if report.rechazados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Invalidation bus keeping per-process caches consistent across pods.
+
+Writers publish ``(resource, tenant_id)`` after committing; every process
+subscribed to the bus hands it to its local caches. ``INVALIDATION_BACKEND=
+memory`` (default, SQLite, tests, single pod) delivers to the current
+process only. ``postgres`` also sends a ``NOTIFY`` on ``CHANNEL``; each pod
+runs a thread that ``LISTEN``s, on a connection of its own outside the
+pool, and delivers the messages it didn't send. Both psycopg2 and psycopg 3
+(3.2 or later, for ``notifies(timeout=...)``) are supported. When the
+listener loses its connection, notifications may have been missed, so it
+delivers ``ALL`` (drop everything) once it reconnects.
+
+Other per-process state can ride the same channel: ``broadcast(kind,
+message)`` sends a JSON message to the ``kind`` listeners of the other
+processes (the change feed uses it to reach SSE clients on every pod).
+Messages must fit in a ``NOTIFY`` payload (``MAX_MESSAGE_BYTES``).
+"""
+import json
+import logging
+import select
+import threading
+import uuid
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+from app.config import get_settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+LISTEN_DRIVERS = ("psycopg2", "psycopg")
+
+CHANNEL = "vitalapp_invalidation"
+ALL = "*"
+# NOTIFY payloads are limited to 8000 bytes; leave room for the envelope
+MAX_MESSAGE_BYTES = 7500
+
+Handler = Callable[[str, Optional[str]], None]
+Listener = Callable[[dict], None]
+
+
+class InMemoryInvalidationBus:
+    """Bus delivering invalidations to the current process only"""
+    
+    # Whether broadcasts reach other processes
+    shared = False
+    
+    def __init__(self):
+        self._handlers: List[Handler] = []
+        self._listeners: Dict[str, List[Listener]] = {}
+    
+    def subscribe(self, handler: Handler) -> None:
+        """Call ``handler(resource, tenant_id)`` for every invalidation"""
+        self._handlers.append(handler)
+    
+    def publish(self, resource: str, tenant_id: Optional[str] = None) -> None:
+        """Invalidate ``resource`` for ``tenant_id`` (every tenant if None)"""
+        self._deliver(resource, tenant_id)
+    
+    def listen(self, kind: str, listener: Listener) -> None:
+        """Call ``listener(message)`` for every ``kind`` message broadcast by
+        another process"""
+        self._listeners.setdefault(kind, []).append(listener)
+    
+    def broadcast(self, kind: str, message: dict) -> None:
+        """Send ``message`` to the ``kind`` listeners of the other processes"""
+    
+    def start(self) -> None:
+        pass
+    
+    def stop(self) -> None:
+        pass
+    
+    def _deliver(self, resource: str, tenant_id: Optional[str]) -> None:
+        for handler in self._handlers:
+            handler(resource, tenant_id)
+    
+    def _dispatch(self, kind: str, message: dict) -> None:
+        for listener in self._listeners.get(kind, ()):
+            listener(message)
+
+
+class PostgresInvalidationBus(InMemoryInvalidationBus):
+    """Bus fanning invalidations out to every pod with Postgres LISTEN/NOTIFY.
+    
+    Local caches are invalidated right away; the NOTIFY is sent on its own
+    autocommit connection, after the writer's commit.
+    """
+    
+    shared = True
+    
+    def __init__(self, engine: Engine, reconnect_seconds: float = 5.0):
+        super().__init__()
+        self.engine = engine
+        self.reconnect_seconds = reconnect_seconds
+        self.origin = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listener_engine: Optional[Engine] = None
+    
+    def publish(self, resource: str, tenant_id: Optional[str] = None) -> None:
+        """Invalidate locally and notify the other pods"""
+        self._deliver(resource, tenant_id)
+        self._notify({"o": self.origin, "r": resource, "t": tenant_id})
+    
+    def broadcast(self, kind: str, message: dict) -> None:
+        """Send ``message`` to the ``kind`` listeners of the other pods"""
+        self._notify({"o": self.origin, "k": kind, "m": message})
+    
+    def _notify(self, message: dict) -> None:
+        payload = json.dumps(message)
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                    "channel": CHANNEL, "payload": payload
+                })
+                conn.commit()
+        except Exception:
+            logger.exception("Could not publish bus message %s", payload[:200])
+    
+    def start(self) -> None:
+        """Start the listener thread"""
+        if self.engine.dialect.driver not in LISTEN_DRIVERS:
+            raise RuntimeError("The postgres invalidation backend requires the psycopg2 or psycopg driver")
+        # The listener holds its connection for good; keep it out of the pool
+        self._listener_engine = create_engine(self.engine.url, poolclass=NullPool)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="invalidation-listener", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the listener thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._listener_engine:
+            self._listener_engine.dispose()
+            self._listener_engine = None
+    
+    def _listen(self) -> None:
+        first = True
+        while not self._stop.is_set():
+            try:
+                connection = self._listener_engine.raw_connection()
+            except Exception:
+                logger.exception("Invalidation listener could not connect")
+                self._stop.wait(self.reconnect_seconds)
+                continue
+            try:
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if not first:
+                    # Notifications sent while disconnected are lost
+                    self._deliver(ALL, None)
+                first = False
+                if self.engine.dialect.driver == "psycopg":
+                    self._wait_psycopg(dbapi_connection)
+                else:
+                    self._wait_psycopg2(dbapi_connection)
+            except Exception:
+                logger.exception("Invalidation listener lost its connection")
+                self._stop.wait(self.reconnect_seconds)
+            finally:
+                connection.invalidate()
+    
+    def _wait_psycopg2(self, dbapi_connection) -> None:
+        while not self._stop.is_set():
+            if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                self._handle(dbapi_connection.notifies.pop(0).payload)
+    
+    def _wait_psycopg(self, dbapi_connection) -> None:
+        while not self._stop.is_set():
+            for notify in dbapi_connection.notifies(timeout=1.0):
+                self._handle(notify.payload)
+    
+    def _handle(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("o") == self.origin:
+            return
+        if "k" in message:
+            self._dispatch(message["k"], message["m"])
+        else:
+            self._deliver(message["r"], message.get("t"))
+
+
+@lru_cache()
+def get_invalidation_bus():
+    """Get the configured invalidation bus"""
+    settings = get_settings()
+    if settings.invalidation_backend == "postgres":
+        return PostgresInvalidationBus(engine, settings.invalidation_reconnect_seconds)
+    return InMemoryInvalidationBus()
@@ -0,0 +1,398 @@
+"""Background job queue for post-commit side effects and long-running work.
+
+Handlers are registered by name with ``@job("name")`` and called as
+``handler(db, **payload)`` with a fresh session, which is committed when the
+handler returns. Failed jobs are retried with exponential backoff up to
+``job_max_attempts`` times.
+
+Two backends are available (``JOB_BACKEND``):
+
+* ``memory``: a bounded in-process queue served by worker threads.
+* ``database``: jobs are rows in ``background_jobs``, so they survive
+  restarts; ``enqueue_after_commit`` writes the row in the caller's own
+  transaction (outbox), and workers claim rows with a lease.
+
+Services use ``emit(db, event, **payload)`` to run subscribers of an event
+after the current transaction commits; with no subscribers it costs nothing
+and, with the database backend, writes no row: only names with a registered
+handler are ever queued.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import event, func, or_, update
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+PENDING_JOBS_KEY = "pending_jobs"
+
+_handlers: Dict[str, Callable] = {}
+_subscribers: Dict[str, List[str]] = defaultdict(list)
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue is at capacity"""
+
+
+@dataclass
+class Job:
+    """A unit of work for a registered handler"""
+    name: str
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+    id: Optional[int] = None
+
+
+def job(name: str):
+    """Register a function as the handler for jobs called ``name``"""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def on_event(event_name: str):
+    """Run the decorated handler in the background after ``event_name`` is emitted"""
+    def decorator(func):
+        name = f"{event_name}:{func.__module__}.{func.__qualname__}"
+        _handlers[name] = func
+        _subscribers[event_name].append(name)
+        return func
+    return decorator
+
+
+def emit(db: Session, event_name: str, **payload) -> None:
+    """Queue the subscribers of ``event_name`` to run once ``db`` commits"""
+    for name in _subscribers.get(event_name, ()):
+        job_queue.enqueue_after_commit(db, name, **payload)
+
+
+class JobQueue:
+    """Bounded in-process job queue served by worker threads"""
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: int = 2,
+        maxsize: int = 1000,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 1.0
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize)
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._stats: Counter = Counter()
+        self._in_progress = 0
+        self._retrying = 0
+        self._lock = threading.Lock()
+
+    # Producers
+
+    def enqueue(self, name: str, **payload) -> None:
+        """Queue a job; raises JobQueueFull when the queue is at capacity"""
+        if name not in _handlers:
+            raise KeyError(f"No handler registered for job '{name}'")
+        try:
+            self._queue.put_nowait(Job(name, payload))
+        except queue.Full:
+            self._count("rejected")
+            raise JobQueueFull(f"Job queue is full ({self.maxsize} jobs)")
+        self._count("enqueued")
+
+    def enqueue_after_commit(self, db: Session, name: str, **payload) -> None:
+        """Queue a job once ``db`` commits; dropped if it rolls back"""
+        if name not in _handlers:
+            raise KeyError(f"No handler registered for job '{name}'")
+        db.info.setdefault(PENDING_JOBS_KEY, []).append(Job(name, payload))
+
+    def flush_pending(self, db: Session) -> None:
+        """Queue the jobs a committed session collected.
+
+        When the queue is full the job runs in the committing thread instead,
+        slowing producers down rather than losing work.
+        """
+        for pending in db.info.pop(PENDING_JOBS_KEY, []):
+            try:
+                self.enqueue(pending.name, **pending.payload)
+            except JobQueueFull:
+                self.run(pending)
+
+    def schedule(self, name: str, interval_seconds: float, **payload) -> None:
+        """Enqueue a job every ``interval_seconds`` while the queue is running"""
+        def loop():
+            while not self._stopping.wait(interval_seconds):
+                try:
+                    self.enqueue(name, **payload)
+                except JobQueueFull:
+                    logger.warning("Skipped periodic job %s: queue full", name)
+        self._spawn(loop, f"job-schedule-{name}")
+
+    # Workers
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        self._stopping.clear()
+        for index in range(self.workers):
+            self._spawn(self._work, f"job-worker-{index}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers, waiting up to ``timeout`` seconds for running jobs"""
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        self._threads = []
+
+    def join(self, timeout: float = 5.0) -> bool:
+        """Wait until no job is queued or running; return False on timeout"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.depth() == 0 and self._in_progress == 0 and self._retrying == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def run(self, item: Job) -> bool:
+        """Run a job in the current thread; return whether it succeeded"""
+        with self._lock:
+            self._in_progress += 1
+        db = self.session_factory()
+        try:
+            _handlers[item.name](db, **item.payload)
+            db.commit()
+            self._count("processed")
+            return True
+        except Exception:
+            db.rollback()
+            item.attempts += 1
+            logger.exception("Job %s failed (attempt %d)", item.name, item.attempts)
+            if item.attempts < self.max_attempts:
+                self._count("retried")
+                self._retry(item)
+            else:
+                self._count("failed")
+            return False
+        finally:
+            db.close()
+            with self._lock:
+                self._in_progress -= 1
+
+    def depth(self) -> int:
+        """Number of queued jobs"""
+        return self._queue.qsize()
+
+    def metrics(self) -> dict:
+        """Queue depth and job counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            in_progress = self._in_progress
+        return {
+            "backend": self.backend,
+            "depth": self.depth(),
+            "in_progress": in_progress,
+            "workers": len([t for t in self._threads if t.is_alive()]),
+            **{key: stats.get(key, 0) for key in ("enqueued", "processed", "retried", "failed", "rejected")},
+        }
+
+    # Internals
+
+    def _retry_delay(self, attempts: int) -> float:
+        return self.retry_backoff_seconds * 2 ** (attempts - 1)
+
+    def _retry(self, item: Job) -> None:
+        def requeue():
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._count("failed")
+            finally:
+                with self._lock:
+                    self._retrying -= 1
+        with self._lock:
+            self._retrying += 1
+        timer = threading.Timer(self._retry_delay(item.attempts), requeue)
+        timer.daemon = True
+        timer.start()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.run(item)
+
+    def _spawn(self, target, name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+
+class DatabaseJobQueue(JobQueue):
+    """Durable job queue stored in the background_jobs table"""
+
+    backend = "database"
+
+    def __init__(self, *args, poll_interval_seconds: float = 1.0, lease_seconds: float = 300.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+
+    def enqueue(self, name: str, **payload) -> None:
+        """Insert a pending job row; raises JobQueueFull when at capacity"""
+        if name not in _handlers:
+            raise KeyError(f"No handler registered for job '{name}'")
+        db = self.session_factory()
+        try:
+            if self.depth(db) >= self.maxsize:
+                self._count("rejected")
+                raise JobQueueFull(f"Job queue is full ({self.maxsize} jobs)")
+            db.add(self._row(name, payload))
+            db.commit()
+        finally:
+            db.close()
+        self._count("enqueued")
+
+    def enqueue_after_commit(self, db: Session, name: str, **payload) -> None:
+        """Insert the job row in the caller's transaction"""
+        if name not in _handlers:
+            raise KeyError(f"No handler registered for job '{name}'")
+        db.add(self._row(name, payload))
+        self._count("enqueued")
+
+    def depth(self, db: Optional[Session] = None) -> int:
+        """Number of pending jobs"""
+        session = db or self.session_factory()
+        try:
+            return session.query(func.count(BackgroundJob.id)).filter(
+                BackgroundJob.status == "pending"
+            ).scalar()
+        finally:
+            if db is None:
+                session.close()
+
+    def run(self, item: Job) -> bool:
+        """Run a claimed job and record the outcome in its row"""
+        succeeded = super().run(item)
+        db = self.session_factory()
+        try:
+            row = db.get(BackgroundJob, item.id)
+            if row is None:
+                # Removed meanwhile (another worker after the lease ran out,
+                # or a purge): nothing is left to record
+                logger.info("Job %s (row %d) was already removed", item.name, item.id)
+            elif succeeded:
+                db.delete(row)
+            elif item.attempts < self.max_attempts:
+                row.status = "pending"
+                row.attempts = item.attempts
+                row.run_after = self._now() + timedelta(seconds=self._retry_delay(item.attempts))
+            else:
+                row.status = "failed"
+                row.attempts = item.attempts
+            db.commit()
+        finally:
+            db.close()
+        return succeeded
+
+    def _retry(self, item: Job) -> None:
+        """Retries are rescheduled through the job row (see ``run``)"""
+
+    def _claim(self) -> Optional[Job]:
+        """Lease the oldest runnable job, if any"""
+        db = self.session_factory()
+        try:
+            now = self._now()
+            runnable = or_(BackgroundJob.status == "pending", BackgroundJob.status == "running")
+            row = db.query(BackgroundJob).filter(
+                runnable, BackgroundJob.run_after <= now
+            ).order_by(BackgroundJob.id).with_for_update(skip_locked=True).first()
+            if row is None:
+                return None
+            # Conditional update so two workers can't claim the same row
+            claimed = db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == row.id, BackgroundJob.run_after == row.run_after)
+                .values(status="running", run_after=now + timedelta(seconds=self.lease_seconds))
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return None
+            return Job(row.name, json.loads(row.payload), row.attempts, row.id)
+        finally:
+            db.close()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                item = self._claim()
+            except Exception:
+                logger.exception("Could not claim a background job")
+                item = None
+            if item is None:
+                self._stopping.wait(self.poll_interval_seconds)
+            else:
+                self.run(item)
+
+    @staticmethod
+    def _row(name: str, payload: dict) -> BackgroundJob:
+        return BackgroundJob(
+            name=name,
+            payload=json.dumps(payload),
+            status="pending",
+            attempts=0,
+            run_after=DatabaseJobQueue._now()
+        )
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+
+def _build_job_queue() -> JobQueue:
+    settings = get_settings()
+    options = dict(
+        workers=settings.job_workers,
+        maxsize=settings.job_queue_maxsize,
+        max_attempts=settings.job_max_attempts,
+        retry_backoff_seconds=settings.job_retry_backoff_seconds,
+    )
+    if settings.job_backend == "database":
+        return DatabaseJobQueue(poll_interval_seconds=settings.job_poll_interval_seconds, **options)
+    return JobQueue(**options)
+
+
+job_queue = _build_job_queue()
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_pending_jobs(session):
+    if session.info.get(PENDING_JOBS_KEY):
+        job_queue.flush_pending(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_jobs(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_JOBS_KEY, None)
@@ -1,9 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from app.admission import AdmissionControlMiddleware, parse_networks
 from app.config import get_settings
-from app.database import create_tables
-from app.routers import health, pacientes, citas, resultados
+from app.database import (
+    ReadYourWritesMiddleware, SessionLocal, add_tenant_columns, backfill_updated_at, create_tables, engine,
+    replica_router
+)
+from app.idempotency import get_idempotency_store
+from app.invalidation import get_invalidation_bus
+from app.jobs import job_queue
+from app.partitioning import setup_partitioning
+from app.profiling import runtime_monitor
+from app.services.resumen_service import ResumenDiarioService
+from app.soft_delete import add_soft_delete_columns
+from app.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from app.routers import health, pacientes, citas, resultados, estadisticas, eventos, sync, exportaciones, ingresos, importaciones, admin
 
 settings = get_settings()
 
@@ -11,9 +23,45 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown events"""
     # Startup
+    setup_tracing()
     create_tables()
+    add_tenant_columns(engine)
+    backfill_updated_at(engine)
+    add_soft_delete_columns(engine)
+    setup_partitioning(engine)
+    db = SessionLocal()
+    try:
+        get_idempotency_store().purge_expired(db)
+        ResumenDiarioService.backfill_if_empty(db)
+    finally:
+        db.close()
+    get_invalidation_bus().start()
+    runtime_monitor.start()
+    job_queue.start()
+    job_queue.schedule("idempotency.purge", settings.idempotency_purge_interval_seconds)
+    job_queue.schedule("sync.purge_tombstones", settings.sync_tombstone_purge_interval_seconds)
+    if settings.soft_delete_enabled:
+        job_queue.schedule("soft_delete.purge", settings.soft_delete_purge_interval_seconds)
+    if settings.partition_strategy == "month":
+        job_queue.schedule("partitions.ensure", settings.partition_maintenance_interval_seconds)
+    if settings.resultados_archive_after_days:
+        job_queue.schedule(
+            "resultados.archive",
+            settings.resultados_archive_interval_seconds,
+            dias=settings.resultados_archive_after_days
+        )
+    if settings.resumen_refresh_interval_seconds:
+        job_queue.schedule(
+            "resumen.refresh",
+            settings.resumen_refresh_interval_seconds,
+            dias=settings.resumen_refresh_days
+        )
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    job_queue.stop()
+    await runtime_monitor.stop()
+    get_invalidation_bus().stop()
+    shutdown_tracing()
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,6 +71,26 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Middleware added last runs first: admission control sits inside CORS so
+# its 429/503 responses carry CORS headers and browsers can retry them
+
+# Add admission control (rate limiting and in-flight caps)
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        rate_per_second=settings.rate_limit_per_second,
+        burst=settings.rate_limit_burst,
+        max_in_flight=settings.max_in_flight,
+        max_in_flight_per_client=settings.max_in_flight_per_client,
+        # Long-lived event streams are capped by the change feed itself
+        exempt_paths=("/health", f"{settings.api_prefix}/eventos/stream"),
+        trusted_proxies=parse_networks(settings.trusted_proxies),
+    )
+
+# Stamp writes so any pod sends the client's next reads to the primary
+if replica_router.replicas:
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.replica_sticky_seconds)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,13 +98,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+# Add tracing (request, service and SQL spans); nothing is installed when disabled
+if settings.tracing_enabled:
+    app.add_middleware(
+        TracingMiddleware,
+        exempt_paths=("/health", f"{settings.api_prefix}/eventos/stream"),
+    )
+
 # Include routers
 app.include_router(health.router, tags=["health"])
 app.include_router(pacientes.router, prefix=settings.api_prefix)
 app.include_router(citas.router, prefix=settings.api_prefix)
 app.include_router(resultados.router, prefix=settings.api_prefix)
+app.include_router(estadisticas.router, prefix=settings.api_prefix)
+app.include_router(eventos.router, prefix=settings.api_prefix)
+app.include_router(sync.router, prefix=settings.api_prefix)
+app.include_router(exportaciones.router, prefix=settings.api_prefix)
+app.include_router(ingresos.router, prefix=settings.api_prefix)
+app.include_router(importaciones.router, prefix=settings.api_prefix)
+app.include_router(admin.router, prefix=settings.api_prefix)
 
 
 @app.get("/")
@@ -1,5 +1,14 @@
 from app.models.paciente import Paciente
 from app.models.cita import Cita
 from app.models.resultado import Resultado
+from app.models.resultado_archivado import ResultadoArchivado
+from app.models.medicion import Medicion
+from app.models.idempotency import IdempotencyKey
+from app.models.resumen_diario import ResumenDiario
+from app.models.job import BackgroundJob
+from app.models.tombstone import Tombstone
 
-__all__ = ["Paciente", "Cita", "Resultado"]
+__all__ = [
+    "Paciente", "Cita", "Resultado", "ResultadoArchivado", "Medicion",
+    "IdempotencyKey", "ResumenDiario", "BackgroundJob", "Tombstone"
+]
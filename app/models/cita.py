@@ -1,10 +1,12 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, utcnow
+from app.soft_delete import SoftDeleteMixin, deleted_index, live_index
+from app.tenancy import TenantMixin
 
 
-class Cita(Base):
+class Cita(TenantMixin, SoftDeleteMixin, Base):
     """Modelo de cita médica"""
     __tablename__ = "citas"
     
@@ -15,7 +17,16 @@ class Cita(Base):
     estado = Column(String(50), default="programada")  # programada, confirmada, completada, cancelada
     notas = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
     
     # Relationships
     paciente = relationship("Paciente", back_populates="citas")
+    
+    # Tenant-leading so per-clinic queries only walk that clinic's entries,
+    # and partial so deleted rows awaiting the purge aren't indexed
+    __table_args__ = (
+        live_index("ix_citas_tenant_paciente_live", "tenant_id", "paciente_id"),
+        live_index("ix_citas_tenant_fecha_hora_live", "tenant_id", "fecha_hora"),
+        live_index("ix_citas_tenant_updated_at_live", "tenant_id", "updated_at"),
+        deleted_index("citas"),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from app.database import Base
+from app.soft_delete import SoftDeleteMixin, deleted_index, live_index
+from app.tenancy import TenantMixin
+
+
+class Medicion(TenantMixin, SoftDeleteMixin, Base):
+    """Modelo de medición numérica de un resultado (analito, valor, unidad, rango)"""
+    __tablename__ = "mediciones"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: measurements outlive their resultado's move to the archive
+    resultado_id = Column(Integer, nullable=False, index=True)
+    paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
+    fecha = Column(DateTime(timezone=True), nullable=False)  # fecha_examen of the resultado
+    analito = Column(String(100), nullable=False)
+    valor = Column(Float, nullable=False)
+    unidad = Column(String(20), nullable=True)
+    rango_min = Column(Float, nullable=True)
+    rango_max = Column(Float, nullable=True)
+    
+    # A paciente's series for one analito is a single index range scan
+    __table_args__ = (
+        live_index(
+            "ix_mediciones_tenant_paciente_analito_fecha_live",
+            "tenant_id", "paciente_id", "analito", "fecha"
+        ),
+        deleted_index("mediciones"),
+    )
@@ -1,23 +1,36 @@
 from sqlalchemy import Column, Integer, String, DateTime, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, utcnow
+from app.soft_delete import SoftDeleteMixin, deleted_index, live_index
+from app.tenancy import TenantMixin
 
+# Unique index behind EmailAlreadyRegistered
+EMAIL_INDEX = "ix_pacientes_tenant_email_lower_live"
 
-class Paciente(Base):
+
+class Paciente(TenantMixin, SoftDeleteMixin, Base):
     """Modelo de paciente"""
     __tablename__ = "pacientes"
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
     apellido = Column(String(100), nullable=False)
-    email = Column(String(255), unique=True, index=True, nullable=False)
+    email = Column(String(255), nullable=False)
     telefono = Column(String(20), nullable=True)
     fecha_nacimiento = Column(Date, nullable=True)
     direccion = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
     
     # Relationships
     citas = relationship("Cita", back_populates="paciente", cascade="all, delete-orphan")
     resultados = relationship("Resultado", back_populates="paciente", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Case-insensitive: sign-up relies on this index instead of a lookup.
+        # Live rows only, so a deleted paciente's email can sign up again
+        live_index(EMAIL_INDEX, "tenant_id", func.lower(email), unique=True),
+        live_index("ix_pacientes_tenant_updated_at_live", "tenant_id", "updated_at"),
+        deleted_index("pacientes"),
+    )
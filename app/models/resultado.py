@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.compression import CompressedText
+from app.database import Base, utcnow
+from app.soft_delete import SoftDeleteMixin, deleted_index, live_index
+from app.tenancy import TenantMixin
 
 
-class Resultado(Base):
+class Resultado(TenantMixin, SoftDeleteMixin, Base):
     """Modelo de resultado médico"""
     __tablename__ = "resultados"
     
@@ -12,10 +15,25 @@ class Resultado(Base):
     paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
     tipo_examen = Column(String(100), nullable=False)
     fecha_examen = Column(DateTime(timezone=True), nullable=False)
-    resultado = Column(Text, nullable=False)
-    observaciones = Column(Text, nullable=True)
+    resultado = Column(CompressedText, nullable=False)
+    observaciones = Column(CompressedText, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
     
     # Relationships
     paciente = relationship("Paciente", back_populates="resultados")
+    mediciones = relationship(
+        "Medicion",
+        primaryjoin="Resultado.id == foreign(Medicion.resultado_id)",
+        order_by="Medicion.id",
+        viewonly=True
+    )
+    
+    # Tenant-leading so per-clinic queries only walk that clinic's entries,
+    # and partial so deleted rows awaiting the purge aren't indexed
+    __table_args__ = (
+        live_index("ix_resultados_tenant_paciente_live", "tenant_id", "paciente_id"),
+        live_index("ix_resultados_tenant_fecha_examen_live", "tenant_id", "fecha_examen"),
+        live_index("ix_resultados_tenant_updated_at_live", "tenant_id", "updated_at"),
+        deleted_index("resultados"),
+    )
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.compression import CompressedText
+from app.database import Base, utcnow
+from app.tenancy import TenantMixin
+
+
+class ResultadoArchivado(TenantMixin, Base):
+    """Resultado moved out of the hot ``resultados`` table by the archival job"""
+    __tablename__ = "resultados_archivo"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # id it had in resultados
+    paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
+    tipo_examen = Column(String(100), nullable=False)
+    fecha_examen = Column(DateTime(timezone=True), nullable=False, index=True)
+    resultado = Column(CompressedText, nullable=False)
+    observaciones = Column(CompressedText, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    
+    mediciones = relationship(
+        "Medicion",
+        primaryjoin="ResultadoArchivado.id == foreign(Medicion.resultado_id)",
+        order_by="Medicion.id",
+        viewonly=True
+    )
+    
+    archivado = True
+    
+    __table_args__ = (
+        Index("ix_resultados_archivo_tenant_paciente", "tenant_id", "paciente_id", "fecha_examen"),
+    )
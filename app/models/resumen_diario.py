@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Date
+from app.database import Base
+from app.tenancy import TenantMixin, default_tenant
+
+
+class ResumenDiario(TenantMixin, Base):
+    """Daily count of citas per estado and resultados per tipo_examen"""
+    __tablename__ = "resumen_diario"
+    
+    tenant_id = Column(String(64), primary_key=True, default=default_tenant)
+    recurso = Column(String(20), primary_key=True)  # cita_estado, resultado_tipo_examen
+    fecha = Column(Date, primary_key=True)
+    clave = Column(String(100), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from app.database import Base, utcnow
+from app.tenancy import TenantMixin
+
+
+class Tombstone(TenantMixin, Base):
+    """Record of a deleted paciente, cita or resultado, kept for delta sync"""
+    __tablename__ = "tombstones"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    recurso = Column(String(20), nullable=False)  # pacientes, citas, resultados
+    record_id = Column(Integer, nullable=False)
+    paciente_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, index=True)
+    
+    __table_args__ = (
+        Index("ix_tombstones_tenant_paciente_deleted_at", "tenant_id", "paciente_id", "deleted_at", "id"),
+    )
@@ -0,0 +1,196 @@
+"""Optional Postgres declarative partitioning of citas and resultados.
+
+``PARTITION_STRATEGY=tenant`` hash-partitions both tables on ``tenant_id``
+into ``PARTITION_COUNT`` partitions; ``month`` range-partitions them on the
+cita/examen date, one partition per month, created ``PARTITION_MONTHS_AHEAD``
+months in advance by the ``partitions.ensure`` job; rows dated past that
+horizon (citas booked far ahead) land in a default partition and are moved
+out when their month is created. Queries filtered by
+tenant (all request queries, see ``app.tenancy``) or by date then only scan
+the matching partitions.
+
+Existing tables are converted on startup: rows are copied into a new
+partitioned table that takes over the name, indexes and id sequence.
+Postgres requires the partition key in the primary key, so the database key
+becomes (id, key) while the ORM keeps mapping on ``id``. Other databases and
+an empty strategy leave the tables untouched.
+"""
+from datetime import date
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import Base, utcnow
+from app.jobs import job
+
+STRATEGIES = ("tenant", "month")
+
+# Table -> date column used by the month strategy
+PARTITIONED_TABLES = {"citas": "fecha_hora", "resultados": "fecha_examen"}
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_key(table: str, strategy: str) -> str:
+    return "tenant_id" if strategy == "tenant" else PARTITIONED_TABLES[table]
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    """Whether ``table`` is already a partitioned table"""
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": table}).scalar())
+
+
+def month_partition_statements(table: str, first: date, last: date) -> List[str]:
+    """DDL creating the monthly partitions of ``table`` from ``first`` to ``last``"""
+    statements = []
+    month = first.replace(day=1)
+    while month <= last:
+        following = _add_months(month, 1)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {table}_{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{following.isoformat()} 00:00:00+00')"
+        )
+        month = following
+    return statements
+
+
+def split_default_statements(table: str, first: date, last: date) -> List[str]:
+    """DDL creating the monthly partitions of ``table`` from ``first`` to
+    ``last`` when its default partition holds rows in that range, which
+    Postgres refuses: the default is detached, the months created, the rows
+    moved into them and the default attached back"""
+    key = PARTITIONED_TABLES[table]
+    start, end = first.replace(day=1), _add_months(last.replace(day=1), 1)
+    in_range = f"{key} >= '{start.isoformat()} 00:00:00+00' AND {key} < '{end.isoformat()} 00:00:00+00'"
+    return [
+        f"ALTER TABLE {table} DETACH PARTITION {table}_default",
+        *month_partition_statements(table, first, last),
+        f"INSERT INTO {table} SELECT * FROM {table}_default WHERE {in_range}",
+        f"DELETE FROM {table}_default WHERE {in_range}",
+        f"ALTER TABLE {table} ATTACH PARTITION {table}_default DEFAULT",
+    ]
+
+
+def conversion_statements(table: str, strategy: str, partition_count: int) -> List[str]:
+    """DDL replacing ``table`` with a partitioned copy (partitions excluded
+    for the month strategy, see ``month_partition_statements``)"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown partition strategy '{strategy}'")
+    key = _partition_key(table, strategy)
+    old = f"{table}_unpartitioned"
+    method = "HASH" if strategy == "tenant" else "RANGE"
+    statements = [
+        f"ALTER TABLE {table} RENAME TO {old}",
+        f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey",
+        f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY {method} ({key})",
+        f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})",
+        f"ALTER TABLE {table} ADD FOREIGN KEY (paciente_id) REFERENCES pacientes (id)",
+    ]
+    if strategy == "tenant":
+        statements += [
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {partition_count}, REMAINDER {remainder})"
+            for remainder in range(partition_count)
+        ]
+    else:
+        # Catches rows outside the pre-created months instead of failing inserts
+        statements.append(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    return statements
+
+
+def convert_table(conn: Connection, table: str, strategy: str, partition_count: int) -> None:
+    """Convert ``table`` into a partitioned table, keeping its rows"""
+    old = f"{table}_unpartitioned"
+    key = _partition_key(table, strategy)
+    for statement in conversion_statements(table, strategy, partition_count):
+        conn.execute(text(statement))
+    if strategy == "month":
+        bounds = conn.execute(text(f"SELECT min({key}), max({key}) FROM {old}")).one()
+        today = utcnow().date()
+        first = bounds[0].date() if bounds[0] else today
+        last = max(bounds[1].date() if bounds[1] else today, today)
+        for statement in month_partition_statements(table, first, last):
+            conn.execute(text(statement))
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": old}).scalar()
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM {old}"))
+    if sequence:
+        # Dropping the old table would otherwise drop the id sequence with it
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    conn.execute(text(f"DROP TABLE {old}"))
+    for index in Base.metadata.tables[table].indexes:
+        index.create(conn)
+
+
+def ensure_month_partitions(conn: Connection, months_ahead: int) -> None:
+    """Create the monthly partitions up to ``months_ahead`` months from now,
+    moving rows already in the default partition into them"""
+    today = utcnow().date()
+    last = _add_months(today, months_ahead)
+    start, end = today.replace(day=1), _add_months(last.replace(day=1), 1)
+    for table, key in PARTITIONED_TABLES.items():
+        held = conn.execute(
+            text(f"SELECT 1 FROM {table}_default WHERE {key} >= :start AND {key} < :end LIMIT 1"),
+            {"start": start, "end": end}
+        ).scalar()
+        if held:
+            statements = split_default_statements(table, today, last)
+        else:
+            statements = month_partition_statements(table, today, last)
+        for statement in statements:
+            conn.execute(text(statement))
+
+
+def archive_month_partitions(conn: Connection, before: date, columns: List[str]) -> int:
+    """Move whole monthly resultados partitions ending by ``before`` into
+    ``resultados_archivo`` and drop them; return the number of rows moved"""
+    if not is_partitioned(conn, "resultados"):
+        return 0
+    partitions = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'resultados' AND c.relname ~ '^resultados_[0-9]{6}$'"
+    )).scalars().all()
+    column_list = ", ".join(columns)
+    moved = 0
+    for partition in sorted(partitions):
+        stamp = partition[-6:]
+        month = date(int(stamp[:4]), int(stamp[4:]), 1)
+        if _add_months(month, 1) > before:
+            continue
+        moved += conn.execute(text(
+            f"INSERT INTO resultados_archivo ({column_list}, archived_at) "
+            # Rows marked deleted are dropped with the partition, not archived
+            f"SELECT {column_list}, now() FROM {partition} WHERE deleted_at IS NULL"
+        )).rowcount
+        conn.execute(text(f"DROP TABLE {partition}"))
+    return moved
+
+
+def setup_partitioning(engine: Engine) -> None:
+    """Partition citas and resultados according to ``PARTITION_STRATEGY``"""
+    settings = get_settings()
+    strategy = settings.partition_strategy
+    if not strategy or engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                convert_table(conn, table, strategy, settings.partition_count)
+        if strategy == "month":
+            ensure_month_partitions(conn, settings.partition_months_ahead)
+
+
+@job("partitions.ensure")
+def ensure_partitions_job(db: Session):
+    """Periodic job creating upcoming monthly partitions"""
+    settings = get_settings()
+    if settings.partition_strategy == "month" and db.get_bind().dialect.name == "postgresql":
+        ensure_month_partitions(db.connection(), settings.partition_months_ahead)
@@ -0,0 +1,136 @@
+"""On-demand sampling profiler and runtime gauges for diagnosing latency spikes.
+
+``sample_stacks`` walks the Python stack of every thread (event loop and
+threadpool workers alike) every few milliseconds via
+``sys._current_frames()`` and counts identical stacks; ``collapsed`` renders
+them in the collapsed-stack format read by flamegraph.pl, speedscope and
+similar tools. Nothing runs between captures, so the profiler costs nothing
+until an admin asks for a profile.
+
+``RuntimeMonitor`` is a small task on the event loop that measures how late
+its own wake-ups are (event loop lag, i.e. time the loop spent blocked) and
+the AnyIO threadpool's busy and waiting slots, where sync routes queue.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional
+import anyio.to_thread
+from app.config import get_settings
+
+# Leaf frames of threads waiting for work rather than running it
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+
+# One capture at a time; a second request gets 409
+capture_lock = threading.Lock()
+
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    """``function (path:line)`` for a code object, path relative to the cwd"""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        try:
+            relative = os.path.relpath(filename)
+            if not relative.startswith(".."):
+                filename = relative
+        except ValueError:
+            pass
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, include_idle: bool = False) -> Counter:
+    """Sample every thread's stack for ``seconds``; return counts per collapsed stack"""
+    counts: Counter = Counter()
+    own = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if not include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def collapsed(counts: Counter) -> str:
+    """Render stack counts as ``frame;frame;frame count`` lines, hottest first"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class RuntimeMonitor:
+    """Periodic event loop lag and threadpool queue depth gauges"""
+    
+    def __init__(self, interval: float = 1.0, window: int = 60):
+        self.interval = interval
+        self.lag: Deque[float] = deque(maxlen=window)
+        self.waiting: Deque[int] = deque(maxlen=window)
+        self.busy = 0
+        self.size = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Start sampling on the running event loop"""
+        if self.interval and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - start - self.interval)
+    
+    def record(self, lag: float) -> None:
+        """Record one lag measurement and the threadpool state (on the loop)"""
+        stats = anyio.to_thread.current_default_thread_limiter().statistics()
+        self.lag.append(max(lag, 0.0))
+        self.waiting.append(stats.tasks_waiting)
+        self.busy = stats.borrowed_tokens
+        self.size = int(stats.total_tokens)
+    
+    def metrics(self) -> dict:
+        """Gauges over the last ``window`` samples"""
+        lag_ms = [value * 1000 for value in self.lag]
+        return {
+            "running": self._task is not None,
+            "samples": len(lag_ms),
+            "event_loop_lag_ms": {
+                "last": round(lag_ms[-1], 3) if lag_ms else None,
+                "max": round(max(lag_ms), 3) if lag_ms else None,
+                "mean": round(sum(lag_ms) / len(lag_ms), 3) if lag_ms else None,
+            },
+            "threadpool": {
+                "size": self.size,
+                "busy": self.busy,
+                "waiting": self.waiting[-1] if self.waiting else 0,
+                "max_waiting": max(self.waiting) if self.waiting else 0,
+            },
+        }
+
+
+runtime_monitor = RuntimeMonitor(get_settings().runtime_metrics_interval_seconds)
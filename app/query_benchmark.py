@@ -0,0 +1,123 @@
+"""Per-call overhead of the hot lookups: ad-hoc ``db.query()`` vs prebuilt statements.
+
+Runs the paciente/cita/resultado lookups against an in-memory SQLite database
+through a tenant-scoped session, once with the ``db.query(...).filter(...)``
+form the services used to build on every call and once through the services'
+prebuilt ``select()`` statements, and reports microseconds per call. The
+database work is identical, so the difference is Python-side statement
+construction and compilation. A prebuilt lookup slower than its ad-hoc
+form is flagged and makes the command exit with status 1, since the
+prebuilt statement then does extra work (e.g. an eager load) the ad-hoc one
+doesn't.
+
+Usage:
+    python -m app.query_benchmark [calls]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models.cita import Cita
+from app.models.paciente import Paciente
+from app.models.resultado import Resultado
+from app.services.cita_service import CitaService
+from app.services.paciente_service import PacienteService
+from app.services.resultado_service import ResultadoService
+from app.tenancy import set_tenant
+
+PACIENTES = 200
+
+
+def seed(db) -> None:
+    """Insert pacientes with a cita and a resultado each"""
+    start = datetime(2026, 1, 1)
+    for index in range(PACIENTES):
+        paciente = Paciente(nombre="Bench", apellido=str(index), email=f"bench{index}@example.com")
+        db.add(paciente)
+        db.flush()
+        db.add(Cita(paciente_id=paciente.id, fecha_hora=start + timedelta(days=index), motivo="Control"))
+        db.add(Resultado(
+            paciente_id=paciente.id, tipo_examen="Hemograma",
+            fecha_examen=start + timedelta(days=index), resultado="Normal"
+        ))
+    db.commit()
+
+
+def per_call_us(lookup: Callable[[int], object], calls: int) -> float:
+    """Average microseconds per ``lookup(i)`` call"""
+    for i in range(100):
+        lookup(i % PACIENTES + 1)
+    start = time.perf_counter()
+    for i in range(calls):
+        lookup(i % PACIENTES + 1)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> int:
+    """Print the benchmark results; returns 1 if a prebuilt lookup is slower"""
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(autoflush=False, bind=engine)()
+    set_tenant(db, "default")
+    seed(db)
+    
+    cases = [
+        (
+            "paciente by id",
+            lambda i: db.query(Paciente).filter(Paciente.id == i).first(),
+            lambda i: PacienteService.get_by_id(db, i),
+        ),
+        (
+            "paciente by email",
+            lambda i: db.query(Paciente).filter(
+                func.lower(Paciente.email) == f"bench{i - 1}@example.com"
+            ).first(),
+            lambda i: PacienteService.get_by_email(db, f"bench{i - 1}@example.com"),
+        ),
+        (
+            "cita by id",
+            lambda i: db.query(Cita).filter(Cita.id == i).first(),
+            lambda i: CitaService.get_by_id(db, i),
+        ),
+        (
+            "citas by paciente",
+            lambda i: db.query(Cita).filter(Cita.paciente_id == i).all(),
+            lambda i: CitaService.get_by_paciente(db, i),
+        ),
+        (
+            "resultado by id",
+            lambda i: db.query(Resultado).filter(Resultado.id == i).first(),
+            lambda i: ResultadoService.get_by_id(db, i),
+        ),
+        (
+            "resultados by paciente",
+            lambda i: db.query(Resultado).filter(Resultado.paciente_id == i).all(),
+            lambda i: ResultadoService.get_by_paciente(db, i),
+        ),
+    ]
+    print(f"{calls} calls per lookup, µs per call")
+    slower = []
+    for name, adhoc, prebuilt in cases:
+        before = per_call_us(adhoc, calls)
+        after = per_call_us(prebuilt, calls)
+        flag = "   SLOWER" if after > before else ""
+        print(f"  {name:<24} query() {before:8.1f}   prebuilt {after:8.1f}   ({after / before:5.1%}){flag}")
+        if after > before:
+            slower.append(name)
+    db.close()
+    engine.dispose()
+    if slower:
+        print(f"Prebuilt lookups slower than query(): {', '.join(slower)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Query capture and plan inspection for index regression tests.
+
+``capture_queries`` records the SQL statements an engine executes;
+``explain`` returns the plan of a captured statement (``EXPLAIN QUERY PLAN``
+on SQLite, ``EXPLAIN (FORMAT JSON)`` on Postgres) and ``full_scans`` lists
+the tables it reads in full (for the session's tenant), so a test can fail
+when a model or query change turns an index seek into a scan.
+"""
+import re
+from contextlib import contextmanager
+from typing import Any, Iterator, List, NamedTuple
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+# "SCAN pacientes" and "SCAN pacientes USING [COVERING] INDEX ..." both read
+# every row; so does a seek on the tenant prefix alone, which reads the
+# tenant's whole table
+_SQLITE_SCAN = re.compile(
+    r"^(?:SCAN (?:TABLE )?(\w+)"
+    r"|SEARCH (?:TABLE )?(\w+) USING (?:COVERING )?INDEX \w+ \(tenant_id=\?\)$)"
+)
+
+
+class CapturedQuery(NamedTuple):
+    statement: str
+    parameters: Any
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[List[CapturedQuery]]:
+    """Collect the statements ``engine`` executes inside the block"""
+    queries: List[CapturedQuery] = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(CapturedQuery(statement, parameters))
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def is_select(query: CapturedQuery) -> bool:
+    return query.statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+def explain(conn: Connection, query: CapturedQuery) -> Any:
+    """Plan of a captured statement: SQLite detail lines or the Postgres JSON plan"""
+    if conn.dialect.name == "postgresql":
+        row = conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + query.statement, query.parameters
+        ).scalar()
+        return row[0]["Plan"]
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + query.statement, query.parameters)
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan: Any) -> List[str]:
+    """Tables read in full according to ``plan``"""
+    if isinstance(plan, dict):
+        scans = []
+        if plan.get("Node Type") == "Seq Scan":
+            scans.append(plan["Relation Name"])
+        for child in plan.get("Plans", []):
+            scans += full_scans(child)
+        return scans
+    return [match.group(1) or match.group(2) for match in map(_SQLITE_SCAN.match, plan) if match]
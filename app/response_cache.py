@@ -0,0 +1,70 @@
+"""In-process cache of serialized list responses.
+
+Hot list pages (``GET /pacientes/``, ``/citas/``, ``/resultados/``) are
+stored as JSON bytes keyed by tenant, path and query parameters, plus the
+resource's generation. Services call ``invalidate`` after committing a
+change, which bumps the generation so later requests miss and rebuild the
+page. Invalidations go through the invalidation bus (``app.invalidation``),
+so with the postgres backend every pod drops its pages. Pages read from a
+replica are not stored, since they may predate the latest write.
+"""
+from typing import Callable, Optional
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from app.cache import ResponseCache
+from app.config import get_settings
+from app.database import replica_router
+from app.invalidation import ALL, get_invalidation_bus
+from app.tenancy import current_tenant
+
+CACHE_HEADER = "X-Cache"
+
+settings = get_settings()
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_max_bytes)
+
+
+def _on_invalidate(resource: str, tenant_id: Optional[str]) -> None:
+    response_cache.bump(ALL if resource == ALL else (resource, tenant_id))
+
+
+get_invalidation_bus().subscribe(_on_invalidate)
+
+
+def invalidate(resource: str, tenant_id: Optional[str] = None) -> None:
+    """Drop cached pages of ``resource`` for ``tenant_id`` (every tenant if None),
+    in this process and, through the bus, in the others"""
+    if not response_cache.maxsize:
+        # The cache size is deployment-wide: no pod has pages to drop
+        return
+    get_invalidation_bus().publish(resource, tenant_id)
+
+
+def cached_response(
+    request: Request,
+    db: Session,
+    resource: str,
+    adapter: TypeAdapter,
+    build: Callable[[], object]
+) -> Response:
+    """Serve a list page from the cache, or build, serialize and cache it"""
+    tenant_id = current_tenant(db)
+    # Generations are read before building, so a concurrent write can only
+    # make the stored page unreachable, never fresh-looking
+    key = (
+        resource,
+        tenant_id,
+        response_cache.generation(ALL),
+        response_cache.generation((resource, None)),
+        response_cache.generation((resource, tenant_id)),
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+    )
+    body = response_cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers={CACHE_HEADER: "HIT"})
+    
+    body = adapter.dump_json(adapter.validate_python(build(), from_attributes=True))
+    if db.get_bind() not in replica_router.replicas:
+        response_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers={CACHE_HEADER: "MISS"})
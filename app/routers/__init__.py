@@ -1,3 +1,3 @@
-from app.routers import health, pacientes, citas, resultados
+from app.routers import health, pacientes, citas, resultados, estadisticas, eventos, sync, exportaciones, ingresos, importaciones, admin
 
-__all__ = ["health", "pacientes", "citas", "resultados"]
+__all__ = ["health", "pacientes", "citas", "resultados", "estadisticas", "eventos", "sync", "exportaciones", "ingresos", "importaciones", "admin"]
@@ -0,0 +1,51 @@
+import asyncio
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.config import get_settings
+from app.profiling import capture_lock, collapsed, sample_stacks
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+settings = get_settings()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow only callers presenting ``ADMIN_TOKEN``; without one configured
+    the admin endpoints don't exist"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+@router.get("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def cpu_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    idle: bool = False
+):
+    """Capture a CPU profile of all threads for ``seconds``
+    
+    Returns collapsed stacks (``thread;frame;frame count`` per line), ready
+    for flamegraph.pl or speedscope. Threads waiting for work are left out
+    unless ``idle`` is set. Only one profile runs at a time.
+    """
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    if seconds > settings.profiling_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be at most {settings.profiling_max_seconds:g}"
+        )
+    if not capture_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    try:
+        # Sampled from a thread outside the request threadpool, which it observes
+        counts = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, idle)
+    finally:
+        capture_lock.release()
+    return PlainTextResponse(
+        collapsed(counts),
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'}
+    )
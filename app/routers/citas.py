@@ -1,25 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from datetime import datetime
+from app.config import get_settings
+from app.database import get_db, get_read_db, read_only
+from app.idempotency import idempotent_create
+from app.response_cache import cached_response
 from app.schemas.cita import CitaCreate, CitaUpdate, CitaResponse
 from app.services.cita_service import CitaService
 from app.services.paciente_service import PacienteService
 
 router = APIRouter(prefix="/citas", tags=["citas"])
+settings = get_settings()
+
+_list_adapter = TypeAdapter(List[CitaResponse])
 
 
 @router.get("/", response_model=List[CitaResponse])
-def get_citas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all citas"""
-    citas = CitaService.get_all(db, skip=skip, limit=limit)
-    return citas
+def get_citas(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.max_page_size),
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get all citas
+    
+    With ``updated_since`` only citas created or changed since then are
+    returned, oldest change first, for incremental sync.
+    """
+    def build():
+        with read_only(db):
+            return CitaService.get_all(
+                db, skip=skip, limit=limit, updated_since=updated_since
+            )
+    
+    return cached_response(request, db, "citas", _list_adapter, build)
 
 
 @router.get("/{cita_id}", response_model=CitaResponse)
-def get_cita(cita_id: int, db: Session = Depends(get_db)):
+def get_cita(cita_id: int, db: Session = Depends(get_read_db)):
     """Get a cita by ID"""
-    cita = CitaService.get_by_id(db, cita_id)
+    with read_only(db):
+        cita = CitaService.get_by_id(db, cita_id)
     if not cita:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,29 +53,42 @@ def get_cita(cita_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/paciente/{paciente_id}", response_model=List[CitaResponse])
-def get_citas_by_paciente(paciente_id: int, db: Session = Depends(get_db)):
-    """Get all citas for a paciente"""
-    # Verify paciente exists
-    paciente = PacienteService.get_by_id(db, paciente_id)
-    if not paciente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Paciente not found"
-        )
-    return CitaService.get_by_paciente(db, paciente_id)
+def get_citas_by_paciente(
+    paciente_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.max_page_size),
+    db: Session = Depends(get_read_db)
+):
+    """Get a page of a paciente's citas"""
+    with read_only(db):
+        # Verify paciente exists
+        paciente = PacienteService.get_by_id(db, paciente_id)
+        if not paciente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Paciente not found"
+            )
+        return CitaService.get_by_paciente(db, paciente_id, skip=skip, limit=limit)
 
 
 @router.post("/", response_model=CitaResponse, status_code=status.HTTP_201_CREATED)
-def create_cita(cita: CitaCreate, db: Session = Depends(get_db)):
+def create_cita(
+    cita: CitaCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """Create a new cita"""
-    # Verify paciente exists
-    paciente = PacienteService.get_by_id(db, cita.paciente_id)
-    if not paciente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Paciente not found"
-        )
-    return CitaService.create(db, cita)
+    def create():
+        # Verify paciente exists
+        paciente = PacienteService.get_by_id(db, cita.paciente_id)
+        if not paciente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Paciente not found"
+            )
+        return CitaService.create(db, cita)
+    
+    return idempotent_create(db, "citas", idempotency_key, cita, create, CitaResponse)
 
 
 @router.put("/{cita_id}", response_model=CitaResponse)
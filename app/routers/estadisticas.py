@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from app.database import get_read_db
+from app.schemas.estadistica import ConteoResponse, EstadisticaPacienteResponse, TendenciaResponse
+from app.services.estadistica_service import EstadisticaService
+from app.services.paciente_service import PacienteService
+
+router = APIRouter(prefix="/estadisticas", tags=["estadisticas"])
+
+
+@router.get("/citas/estado", response_model=List[ConteoResponse])
+def get_citas_por_estado(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    paciente_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Count citas by estado"""
+    return EstadisticaService.count_citas_by_estado(db, desde, hasta, paciente_id)
+
+
+@router.get("/citas/periodo", response_model=List[ConteoResponse])
+def get_citas_por_periodo(
+    period: str = Query("day", pattern="^(day|week)$"),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    paciente_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Count citas per day or week"""
+    return EstadisticaService.count_citas_by_period(db, period, desde, hasta, paciente_id)
+
+
+@router.get("/resultados/tipo-examen", response_model=List[ConteoResponse])
+def get_resultados_por_tipo_examen(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    paciente_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Count resultados by tipo_examen"""
+    return EstadisticaService.count_resultados_by_tipo_examen(db, desde, hasta, paciente_id)
+
+
+@router.get("/pacientes/{paciente_id}", response_model=EstadisticaPacienteResponse)
+def get_estadisticas_paciente(paciente_id: int, db: Session = Depends(get_read_db)):
+    """Get citas and resultados counts for a paciente"""
+    # Verify paciente exists
+    paciente = PacienteService.get_by_id(db, paciente_id)
+    if not paciente:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Paciente not found"
+        )
+    return {
+        "paciente_id": paciente_id,
+        "citas_por_estado": EstadisticaService.count_citas_by_estado(
+            db, paciente_id=paciente_id
+        ),
+        "resultados_por_tipo_examen": EstadisticaService.count_resultados_by_tipo_examen(
+            db, paciente_id=paciente_id
+        ),
+    }
+
+
+@router.get("/pacientes/{paciente_id}/tendencia", response_model=TendenciaResponse)
+def get_tendencia_paciente(
+    paciente_id: int,
+    analito: str = Query(..., max_length=100),
+    ventana: int = Query(5, ge=1, le=365, description="Points in the rolling window"),
+    db: Session = Depends(get_read_db)
+):
+    """Get a paciente's trend for one analito
+    
+    Returns the series in columnar form with rolling mean/std, deltas
+    between consecutive values, out-of-range flags and the slope per day.
+    """
+    # Verify paciente exists
+    paciente = PacienteService.get_by_id(db, paciente_id)
+    if not paciente:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Paciente not found"
+        )
+    return EstadisticaService.tendencia(db, paciente_id, analito, ventana)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from app.change_feed import RESOURCES, TooManySubscribers, change_feed, sse_stream
+from app.config import get_settings
+from app.tenancy import get_tenant_id
+
+router = APIRouter(prefix="/eventos", tags=["eventos"])
+settings = get_settings()
+
+
+@router.get("/stream")
+async def stream_eventos(
+    request: Request,
+    resources: str = Query(",".join(RESOURCES), description="Comma-separated resources")
+):
+    """Stream create/update/delete events as server-sent events"""
+    requested = {resource.strip() for resource in resources.split(",") if resource.strip()}
+    unknown = requested - set(RESOURCES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown resources: {', '.join(sorted(unknown))}"
+        )
+    try:
+        subscription = change_feed.subscribe(requested, get_tenant_id(request))
+    except TooManySubscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event stream subscribers"
+        )
+    return StreamingResponse(
+        sse_stream(
+            change_feed,
+            subscription,
+            request.is_disconnected,
+            settings.change_feed_keepalive_seconds
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
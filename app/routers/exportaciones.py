@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date, datetime
+from app.config import get_settings
+from app.database import get_read_db
+from app.services.exportacion_service import FORMATS, ExportacionService
+
+router = APIRouter(prefix="/exportaciones", tags=["exportaciones"])
+settings = get_settings()
+
+
+@router.get("/resultados")
+def export_resultados(
+    formato: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    tipo_examen: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    nacido_desde: Optional[date] = Query(None, description="Paciente born on or after"),
+    nacido_hasta: Optional[date] = Query(None, description="Paciente born before"),
+    incluir_texto: bool = Query(True, description="Include resultado and observaciones texts"),
+    db: Session = Depends(get_read_db)
+):
+    """Export a cohort of resultados as Parquet or Arrow IPC
+    
+    The file is streamed in batches of ``EXPORT_BATCH_SIZE`` rows, each a
+    Parquet row group (zstd) or Arrow record batch.
+    """
+    try:
+        ExportacionService.check_available()
+    except RuntimeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(exc)
+        )
+    media_type, extension = FORMATS[formato]
+    return StreamingResponse(
+        ExportacionService.stream_resultados(
+            db,
+            formato,
+            settings.export_batch_size,
+            tipo_examen=tipo_examen,
+            desde=desde,
+            hasta=hasta,
+            nacido_desde=nacido_desde,
+            nacido_hasta=nacido_hasta,
+            incluir_texto=incluir_texto,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="resultados.{extension}"'}
+    )
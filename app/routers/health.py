@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from app.config import get_settings
+from app.jobs import job_queue
+from app.profiling import runtime_monitor
 
 router = APIRouter()
 settings = get_settings()
@@ -13,3 +15,15 @@ async def health_check():
         "app_name": settings.app_name,
         "version": settings.app_version
     }
+
+
+@router.get("/health/jobs")
+def job_queue_metrics():
+    """Background job queue depth and counters"""
+    return job_queue.metrics()
+
+
+@router.get("/health/runtime")
+async def runtime_metrics():
+    """Event loop lag and threadpool queue depth gauges"""
+    return runtime_monitor.metrics()
@@ -0,0 +1,52 @@
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.config import get_settings
+from app.database import get_db
+from app.schemas.importacion import ImportacionResponse
+from app.services.importacion_service import ImportacionService
+
+router = APIRouter(prefix="/importaciones", tags=["importaciones"])
+settings = get_settings()
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.post("/pacientes", response_model=ImportacionResponse)
+async def import_pacientes(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    """Bulk import pacientes from a CSV or NDJSON request body
+    
+    The format comes from ``formato`` or the Content-Type (``text/csv``,
+    ``application/x-ndjson``). The body is spooled to disk past
+    ``IMPORT_SPOOL_BYTES`` and loaded in batches of ``IMPORT_BATCH_SIZE``;
+    registered emails are skipped and invalid rows reported.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    formato = formato or CONTENT_TYPES.get(content_type)
+    if formato is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or set formato"
+        )
+    with tempfile.SpooledTemporaryFile(max_size=settings.import_spool_bytes) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        return await run_in_threadpool(
+            ImportacionService.import_pacientes,
+            db,
+            upload,
+            formato,
+            settings.import_batch_size,
+            settings.import_max_rejects
+        )
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.idempotency import idempotent_create
+from app.schemas.ingreso import IngresoCreate, IngresoResponse
+from app.services.ingreso_service import IngresoService
+from app.services.paciente_service import EmailAlreadyRegistered
+
+router = APIRouter(prefix="/ingresos", tags=["ingresos"])
+
+
+@router.post("/", response_model=IngresoResponse, status_code=status.HTTP_201_CREATED)
+def create_ingreso(
+    ingreso: IngresoCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Create a paciente with its first citas and resultados
+    
+    Everything is inserted in a single transaction: either the whole
+    ingreso is created or nothing is.
+    """
+    def create():
+        try:
+            return IngresoService.create(db, ingreso)
+        except EmailAlreadyRegistered:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+    
+    return idempotent_create(
+        db, "ingresos", idempotency_key, ingreso, create, IngresoResponse
+    )
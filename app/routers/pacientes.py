@@ -1,24 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from datetime import datetime
+from app.config import get_settings
+from app.database import get_db, get_read_db, read_only
+from app.idempotency import idempotent_create
+from app.response_cache import cached_response
+from app.jobs import JobQueueFull, job_queue
 from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
-from app.services.paciente_service import PacienteService
+from app.services.paciente_service import EmailAlreadyRegistered, PacienteService
+from app.tenancy import current_tenant
 
 router = APIRouter(prefix="/pacientes", tags=["pacientes"])
+settings = get_settings()
+
+_list_adapter = TypeAdapter(List[PacienteResponse])
 
 
 @router.get("/", response_model=List[PacienteResponse])
-def get_pacientes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all pacientes"""
-    pacientes = PacienteService.get_all(db, skip=skip, limit=limit)
-    return pacientes
+def get_pacientes(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.max_page_size),
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get all pacientes
+    
+    With ``updated_since`` only pacientes created or changed since then are
+    returned, oldest change first, for incremental sync.
+    """
+    def build():
+        with read_only(db):
+            return PacienteService.get_all(
+                db, skip=skip, limit=limit, updated_since=updated_since
+            )
+    
+    return cached_response(request, db, "pacientes", _list_adapter, build)
 
 
 @router.get("/{paciente_id}", response_model=PacienteResponse)
-def get_paciente(paciente_id: int, db: Session = Depends(get_db)):
+def get_paciente(paciente_id: int, db: Session = Depends(get_read_db)):
     """Get a paciente by ID"""
-    paciente = PacienteService.get_by_id(db, paciente_id)
+    with read_only(db):
+        paciente = PacienteService.get_by_id(db, paciente_id)
     if not paciente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -28,16 +54,24 @@ def get_paciente(paciente_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=PacienteResponse, status_code=status.HTTP_201_CREATED)
-def create_paciente(paciente: PacienteCreate, db: Session = Depends(get_db)):
+def create_paciente(
+    paciente: PacienteCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """Create a new paciente"""
-    # Check if email already exists
-    existing_paciente = PacienteService.get_by_email(db, paciente.email)
-    if existing_paciente:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    return PacienteService.create(db, paciente)
+    def create():
+        try:
+            return PacienteService.create(db, paciente)
+        except EmailAlreadyRegistered:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+    
+    return idempotent_create(
+        db, "pacientes", idempotency_key, paciente, create, PacienteResponse
+    )
 
 
 @router.put("/{paciente_id}", response_model=PacienteResponse)
@@ -47,7 +81,13 @@ def update_paciente(
     db: Session = Depends(get_db)
 ):
     """Update a paciente"""
-    updated_paciente = PacienteService.update(db, paciente_id, paciente)
+    try:
+        updated_paciente = PacienteService.update(db, paciente_id, paciente)
+    except EmailAlreadyRegistered:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     if not updated_paciente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -58,7 +98,23 @@ def update_paciente(
 
 @router.delete("/{paciente_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_paciente(paciente_id: int, db: Session = Depends(get_db)):
-    """Delete a paciente"""
+    """Delete a paciente
+    
+    Pacientes with a long history are deleted by a background job and the
+    response is 202 Accepted.
+    """
+    if PacienteService.count_history(db, paciente_id) > settings.paciente_inline_delete_limit:
+        try:
+            job_queue.enqueue(
+                "pacientes.delete", paciente_id=paciente_id, tenant_id=current_tenant(db)
+            )
+        except JobQueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending deletions, retry later"
+            )
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+    
     deleted = PacienteService.delete(db, paciente_id)
     if not deleted:
         raise HTTPException(
@@ -1,25 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from datetime import datetime
+from app.config import get_settings
+from app.database import get_db, get_read_db, read_only
+from app.idempotency import idempotent_create
+from app.response_cache import cached_response
 from app.schemas.resultado import ResultadoCreate, ResultadoUpdate, ResultadoResponse
 from app.services.resultado_service import ResultadoService
 from app.services.paciente_service import PacienteService
 
 router = APIRouter(prefix="/resultados", tags=["resultados"])
+settings = get_settings()
+
+_list_adapter = TypeAdapter(List[ResultadoResponse])
 
 
 @router.get("/", response_model=List[ResultadoResponse])
-def get_resultados(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all resultados"""
-    resultados = ResultadoService.get_all(db, skip=skip, limit=limit)
-    return resultados
+def get_resultados(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.max_page_size),
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get all resultados
+    
+    With ``updated_since`` only resultados created or changed since then are
+    returned, oldest change first, for incremental sync.
+    """
+    def build():
+        with read_only(db):
+            return ResultadoService.get_all(
+                db, skip=skip, limit=limit, updated_since=updated_since, mediciones=True
+            )
+    
+    return cached_response(request, db, "resultados", _list_adapter, build)
 
 
 @router.get("/{resultado_id}", response_model=ResultadoResponse)
-def get_resultado(resultado_id: int, db: Session = Depends(get_db)):
-    """Get a resultado by ID"""
-    resultado = ResultadoService.get_by_id(db, resultado_id)
+def get_resultado(
+    resultado_id: int,
+    include_archived: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """Get a resultado by ID
+    
+    Archived resultados are only found with ``include_archived``.
+    """
+    with read_only(db):
+        resultado = ResultadoService.get_by_id(
+            db, resultado_id, include_archived=include_archived, mediciones=True
+        )
     if not resultado:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,29 +62,51 @@ def get_resultado(resultado_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/paciente/{paciente_id}", response_model=List[ResultadoResponse])
-def get_resultados_by_paciente(paciente_id: int, db: Session = Depends(get_db)):
-    """Get all resultados for a paciente"""
-    # Verify paciente exists
-    paciente = PacienteService.get_by_id(db, paciente_id)
-    if not paciente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Paciente not found"
+def get_resultados_by_paciente(
+    paciente_id: int,
+    include_archived: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.max_page_size),
+    db: Session = Depends(get_read_db)
+):
+    """Get a page of a paciente's resultados
+    
+    With ``include_archived`` archived resultados are included, ordered by
+    fecha_examen.
+    """
+    with read_only(db):
+        # Verify paciente exists
+        paciente = PacienteService.get_by_id(db, paciente_id)
+        if not paciente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Paciente not found"
+            )
+        return ResultadoService.get_by_paciente(
+            db, paciente_id, include_archived=include_archived, mediciones=True, skip=skip, limit=limit
         )
-    return ResultadoService.get_by_paciente(db, paciente_id)
 
 
 @router.post("/", response_model=ResultadoResponse, status_code=status.HTTP_201_CREATED)
-def create_resultado(resultado: ResultadoCreate, db: Session = Depends(get_db)):
+def create_resultado(
+    resultado: ResultadoCreate,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """Create a new resultado"""
-    # Verify paciente exists
-    paciente = PacienteService.get_by_id(db, resultado.paciente_id)
-    if not paciente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Paciente not found"
-        )
-    return ResultadoService.create(db, resultado)
+    def create():
+        # Verify paciente exists
+        paciente = PacienteService.get_by_id(db, resultado.paciente_id)
+        if not paciente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Paciente not found"
+            )
+        return ResultadoService.create(db, resultado)
+    
+    return idempotent_create(
+        db, "resultados", idempotency_key, resultado, create, ResultadoResponse
+    )
 
 
 @router.put("/{resultado_id}", response_model=ResultadoResponse)
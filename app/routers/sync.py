@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.config import get_settings
+from app.database import get_db
+from app.schemas.sync import SyncResponse
+from app.services.paciente_service import PacienteService
+from app.services.sync_service import InvalidSyncToken, SyncService, SyncTokenExpired
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+settings = get_settings()
+
+
+@router.get("/pacientes/{paciente_id}", response_model=SyncResponse)
+def sync_paciente(
+    paciente_id: int,
+    token: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=settings.max_page_size),
+    db: Session = Depends(get_db)
+):
+    """Get a paciente's records changed since a sync token
+    
+    Returns created/updated pacientes, citas and resultados plus tombstones
+    for deletions. Repeat with ``next_token`` while ``has_more`` is true.
+    Reads go to the primary so a token never skips rows a replica hasn't
+    received yet.
+    """
+    if not token:
+        # Verify paciente exists
+        paciente = PacienteService.get_by_id(db, paciente_id)
+        if not paciente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Paciente not found"
+            )
+    try:
+        return SyncService.changes(db, paciente_id, token, limit)
+    except InvalidSyncToken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    except SyncTokenExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired, a full resync is required"
+        )
@@ -1,9 +1,20 @@
 from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
 from app.schemas.cita import CitaCreate, CitaUpdate, CitaResponse
-from app.schemas.resultado import ResultadoCreate, ResultadoUpdate, ResultadoResponse
+from app.schemas.resultado import (
+    MedicionCreate, MedicionResponse, ResultadoCreate, ResultadoUpdate, ResultadoResponse
+)
+from app.schemas.estadistica import ConteoResponse, EstadisticaPacienteResponse, TendenciaResponse
+from app.schemas.sync import TombstoneResponse, SyncResponse
+from app.schemas.ingreso import IngresoCita, IngresoResultado, IngresoCreate, IngresoResponse
+from app.schemas.importacion import ImportacionRechazo, ImportacionResponse
 
 __all__ = [
     "PacienteCreate", "PacienteUpdate", "PacienteResponse",
     "CitaCreate", "CitaUpdate", "CitaResponse",
-    "ResultadoCreate", "ResultadoUpdate", "ResultadoResponse"
+    "ResultadoCreate", "ResultadoUpdate", "ResultadoResponse",
+    "MedicionCreate", "MedicionResponse",
+    "ConteoResponse", "EstadisticaPacienteResponse", "TendenciaResponse",
+    "TombstoneResponse", "SyncResponse",
+    "IngresoCita", "IngresoResultado", "IngresoCreate", "IngresoResponse",
+    "ImportacionRechazo", "ImportacionResponse"
 ]
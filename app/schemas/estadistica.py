@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class ConteoResponse(BaseModel):
+    """Schema for a grouped count"""
+    clave: str
+    total: int
+
+
+class EstadisticaPacienteResponse(BaseModel):
+    """Schema for a paciente's statistics"""
+    paciente_id: int
+    citas_por_estado: List[ConteoResponse]
+    resultados_por_tipo_examen: List[ConteoResponse]
+
+
+class TendenciaResponse(BaseModel):
+    """Schema for a paciente's series of one analito, in columnar form"""
+    paciente_id: int
+    analito: str
+    unidad: Optional[str] = None
+    ventana: int
+    fechas: List[datetime]
+    valores: List[float]
+    media_movil: List[float]
+    desviacion_movil: List[float]
+    delta: List[Optional[float]]
+    fuera_de_rango: List[bool]
+    total: int
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    media: Optional[float] = None
+    pendiente_por_dia: Optional[float] = None
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ImportacionRechazo(BaseModel):
+    """A rejected row of an import file"""
+    linea: int
+    error: str
+
+
+class ImportacionResponse(BaseModel):
+    """Progress or final report of a bulk import"""
+    filas: int = 0
+    importados: int = 0
+    duplicados: int = 0
+    rechazados: int = 0
+    rechazos: List[ImportacionRechazo] = []  # first IMPORT_MAX_REJECTS rejects
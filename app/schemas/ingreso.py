@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from app.schemas.paciente import PacienteCreate
+from app.schemas.resultado import MedicionCreate
+
+
+class IngresoCita(BaseModel):
+    """Cita of an ingreso; the paciente is the one being created"""
+    fecha_hora: datetime
+    motivo: str
+    estado: Optional[str] = "programada"
+    notas: Optional[str] = None
+
+
+class IngresoResultado(BaseModel):
+    """Resultado of an ingreso; the paciente is the one being created"""
+    tipo_examen: str
+    fecha_examen: datetime
+    resultado: str
+    observaciones: Optional[str] = None
+    mediciones: List[MedicionCreate] = []
+
+
+class IngresoCreate(BaseModel):
+    """Schema for creating a paciente with its citas and resultados"""
+    paciente: PacienteCreate
+    citas: List[IngresoCita] = Field(default_factory=list, max_length=100)
+    resultados: List[IngresoResultado] = Field(default_factory=list, max_length=100)
+
+
+class IngresoResponse(BaseModel):
+    """Ids created by an ingreso"""
+    paciente_id: int
+    cita_ids: List[int]
+    resultado_ids: List[int]
@@ -1,8 +1,29 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 from datetime import datetime
 
 
+class MedicionBase(BaseModel):
+    """Base schema for a numeric Medicion of a Resultado"""
+    analito: str = Field(..., max_length=100)
+    valor: float
+    unidad: Optional[str] = Field(None, max_length=20)
+    rango_min: Optional[float] = None
+    rango_max: Optional[float] = None
+
+
+class MedicionCreate(MedicionBase):
+    """Schema for creating a Medicion"""
+    pass
+
+
+class MedicionResponse(MedicionBase):
+    """Schema for Medicion response"""
+    id: int
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ResultadoBase(BaseModel):
     """Base schema for Resultado"""
     paciente_id: int
@@ -14,7 +35,7 @@ class ResultadoBase(BaseModel):
 
 class ResultadoCreate(ResultadoBase):
     """Schema for creating a Resultado"""
-    pass
+    mediciones: List[MedicionCreate] = []
 
 
 class ResultadoUpdate(BaseModel):
@@ -23,6 +44,7 @@ class ResultadoUpdate(BaseModel):
     fecha_examen: Optional[datetime] = None
     resultado: Optional[str] = None
     observaciones: Optional[str] = None
+    mediciones: Optional[List[MedicionCreate]] = None  # replaces all mediciones when given
 
 
 class ResultadoResponse(ResultadoBase):
@@ -30,5 +52,7 @@ class ResultadoResponse(ResultadoBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    archivado: bool = False
+    mediciones: List[MedicionResponse] = []
     
     model_config = ConfigDict(from_attributes=True)
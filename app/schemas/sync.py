@@ -0,0 +1,25 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List
+from datetime import datetime
+from app.schemas.paciente import PacienteResponse
+from app.schemas.cita import CitaResponse
+from app.schemas.resultado import ResultadoResponse
+
+
+class TombstoneResponse(BaseModel):
+    """Schema for a deleted record"""
+    recurso: str
+    record_id: int
+    deleted_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SyncResponse(BaseModel):
+    """Schema for a page of changes since a sync token"""
+    pacientes: List[PacienteResponse]
+    citas: List[CitaResponse]
+    resultados: List[ResultadoResponse]
+    tombstones: List[TombstoneResponse]
+    next_token: str
+    has_more: bool
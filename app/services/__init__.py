@@ -1,5 +1,11 @@
 from app.services.paciente_service import PacienteService
 from app.services.cita_service import CitaService
 from app.services.resultado_service import ResultadoService
+from app.services.estadistica_service import EstadisticaService
+from app.services.sync_service import SyncService
+from app.services.exportacion_service import ExportacionService
+from app.services.ingreso_service import IngresoService
+from app.services.importacion_service import ImportacionService
+from app.services.purga_service import PurgaService
 
-__all__ = ["PacienteService", "CitaService", "ResultadoService"]
+__all__ = ["PacienteService", "CitaService", "ResultadoService", "EstadisticaService", "SyncService", "ExportacionService", "IngresoService", "ImportacionService", "PurgaService"]
@@ -1,34 +1,89 @@
+from datetime import datetime
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from app.change_feed import change_feed
+from app.database import as_utc
+from app.jobs import emit
 from app.models.cita import Cita
-from app.schemas.cita import CitaCreate, CitaUpdate
+from app.response_cache import invalidate
+from app.schemas.cita import CitaCreate, CitaUpdate, CitaResponse
+from app.services.resumen_service import ResumenDiarioService
+from app.services.sync_service import SyncService
+from app.soft_delete import remove
+from app.tracing import traced
 
+# Hot lookups are built once; their compiled SQL is reused from SQLAlchemy's cache
+_BY_ID = select(Cita).where(Cita.id == bindparam("cita_id"))
+_BY_PACIENTE = select(Cita).where(Cita.paciente_id == bindparam("paciente_id")).order_by(
+    Cita.id
+).offset(bindparam("skip")).limit(bindparam("limit"))
 
+
+def _publish(action: str, db_cita: Cita) -> None:
+    """Publish a committed cita to the change feed"""
+    change_feed.publish(
+        "citas",
+        action,
+        db_cita.id,
+        lambda: CitaResponse.model_validate(db_cita).model_dump(mode="json"),
+        tenant_id=db_cita.tenant_id
+    )
+
+
+@traced
 class CitaService:
     """Service for Cita CRUD operations"""
     
     @staticmethod
-    def get_all(db: Session, skip: int = 0, limit: int = 100) -> List[Cita]:
-        """Get all citas"""
-        return db.query(Cita).offset(skip).limit(limit).all()
+    def get_all(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        updated_since: Optional[datetime] = None
+    ) -> List[Cita]:
+        """Get all citas, or only those changed since ``updated_since``"""
+        query = db.query(Cita)
+        if updated_since is not None:
+            query = query.filter(Cita.updated_at >= as_utc(updated_since)).order_by(
+                Cita.updated_at, Cita.id
+            )
+        else:
+            # Partial indexes leave SQLite free to pick any scan order
+            query = query.order_by(Cita.id)
+        return query.offset(skip).limit(limit).all()
     
     @staticmethod
     def get_by_id(db: Session, cita_id: int) -> Optional[Cita]:
         """Get a cita by ID"""
-        return db.query(Cita).filter(Cita.id == cita_id).first()
+        return db.execute(_BY_ID, {"cita_id": cita_id}).scalars().first()
     
     @staticmethod
-    def get_by_paciente(db: Session, paciente_id: int) -> List[Cita]:
-        """Get all citas for a paciente"""
-        return db.query(Cita).filter(Cita.paciente_id == paciente_id).all()
+    def get_by_paciente(db: Session, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Cita]:
+        """Get a page of a paciente's citas"""
+        return db.execute(
+            _BY_PACIENTE, {"paciente_id": paciente_id, "skip": skip, "limit": limit}
+        ).scalars().all()
     
     @staticmethod
-    def create(db: Session, cita: CitaCreate) -> Cita:
-        """Create a new cita"""
+    def add(db: Session, cita: CitaCreate) -> Cita:
+        """Insert a new cita in the current transaction, without committing"""
         db_cita = Cita(**cita.model_dump())
         db.add(db_cita)
-        db.commit()
+        db.flush()
+        ResumenDiarioService.track_cita(db, db_cita)
+        emit(db, "cita.created", cita_id=db_cita.id)
+        return db_cita
+    
+    @staticmethod
+    def create(db: Session, cita: CitaCreate) -> Cita:
+        """Create a new cita"""
+        db_cita = CitaService.add(db, cita)
+        db.flush()
         db.refresh(db_cita)
+        db.commit()
+        invalidate("citas", db_cita.tenant_id)
+        _publish("created", db_cita)
         return db_cita
     
     @staticmethod
@@ -38,12 +93,18 @@ class CitaService:
         if not db_cita:
             return None
         
+        ResumenDiarioService.track_cita(db, db_cita, -1)
         update_data = cita.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_cita, field, value)
+        ResumenDiarioService.track_cita(db, db_cita)
+        emit(db, "cita.updated", cita_id=cita_id)
         
-        db.commit()
+        db.flush()
         db.refresh(db_cita)
+        db.commit()
+        invalidate("citas", db_cita.tenant_id)
+        _publish("updated", db_cita)
         return db_cita
     
     @staticmethod
@@ -53,6 +114,12 @@ class CitaService:
         if not db_cita:
             return False
         
-        db.delete(db_cita)
+        tenant_id = db_cita.tenant_id
+        ResumenDiarioService.track_cita(db, db_cita, -1)
+        remove(db, db_cita)
+        SyncService.add_tombstone(db, "citas", cita_id, db_cita.paciente_id)
+        emit(db, "cita.deleted", cita_id=cita_id)
         db.commit()
+        invalidate("citas", tenant_id)
+        change_feed.publish("citas", "deleted", cita_id, tenant_id=tenant_id)
         return True
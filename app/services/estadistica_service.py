@@ -0,0 +1,269 @@
+from collections import Counter
+from datetime import datetime, time
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from app.archive import get_archive
+from app.cache import TTLCache
+from app.config import get_settings
+from app.database import as_utc
+from app.models.cita import Cita
+from app.models.medicion import Medicion
+from app.models.resultado import Resultado
+from app.models.resultado_archivado import ResultadoArchivado
+from app.tenancy import current_tenant
+from app.services.resumen_service import (
+    CITA_ESTADO,
+    RESULTADO_TIPO_EXAMEN,
+    ResumenDiarioService,
+)
+from app.tracing import traced
+
+PERIODS = ("day", "week")
+
+settings = get_settings()
+_cache = TTLCache(settings.stats_cache_ttl_seconds)
+
+
+def _period_bucket(db: Session, column, period: str):
+    """SQL expression truncating ``column`` to the day or week (Monday) as YYYY-MM-DD"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(period, column), "YYYY-MM-DD")
+    if period == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column)
+
+
+def _grouped_count(
+    db: Session,
+    key,
+    date_column,
+    paciente_column,
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+    paciente_id: Optional[int]
+) -> List[Dict]:
+    """Run a ``GROUP BY key`` count with the common filters"""
+    query = db.query(key.label("clave"), func.count().label("total"))
+    if desde is not None:
+        query = query.filter(date_column >= desde)
+    if hasta is not None:
+        query = query.filter(date_column < hasta)
+    if paciente_id is not None:
+        query = query.filter(paciente_column == paciente_id)
+    rows = query.group_by(key).order_by(key).all()
+    return [{"clave": "" if clave is None else str(clave), "total": total} for clave, total in rows]
+
+
+def _count_resultados_by_tipo_examen(
+    db: Session,
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+    paciente_id: Optional[int]
+) -> List[Dict]:
+    """Count hot and archived resultados by tipo_examen, as the summary does"""
+    archive = get_archive()
+    models = [Resultado]
+    if archive.backend == "table":
+        models.append(ResultadoArchivado)
+    counts = Counter()
+    for model in models:
+        for row in _grouped_count(
+            db, model.tipo_examen, model.fecha_examen, model.paciente_id, desde, hasta, paciente_id
+        ):
+            counts[row["clave"]] += row["total"]
+    if archive.backend != "table":
+        for resultado in archive.find(db, paciente_id=paciente_id, desde=desde, hasta=hasta):
+            counts[resultado.tipo_examen or ""] += 1
+    return [{"clave": clave, "total": total} for clave, total in sorted(counts.items())]
+
+
+def _summary_range(
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+    paciente_id: Optional[int]
+) -> Optional[tuple]:
+    """Return the (desde, hasta) days when resumen_diario can answer the query.
+    
+    The summary holds whole UTC days for all pacientes, so it is used only
+    when no paciente filter is given and both bounds fall on UTC midnight.
+    """
+    if not settings.stats_use_summary or paciente_id is not None:
+        return None
+    days = []
+    for bound in (desde, hasta):
+        if bound is not None:
+            bound = as_utc(bound)
+            if bound.time() != time.min:
+                return None
+        days.append(None if bound is None else bound.date())
+    return tuple(days)
+
+
+def _cached(db: Session, name: str, compute, *args):
+    """Return a cached result for the session's tenant and ``name``/``args``,
+    or compute and cache it"""
+    key = (current_tenant(db), name, *args)
+    result = _cache.get(key)
+    if result is None:
+        result = compute()
+        _cache.set(key, result)
+    return result
+
+
+def _rolling(values, window: int) -> Tuple:
+    """Trailing rolling mean and standard deviation over ``window`` points"""
+    import numpy as np
+    
+    # Shifting by the first value keeps the cumulative sums well conditioned
+    shifted = values - values[0]
+    index = np.arange(len(values))
+    start = np.maximum(index + 1 - window, 0)
+    counts = index + 1 - start
+    sums = np.concatenate(([0.0], np.cumsum(shifted)))
+    squares = np.concatenate(([0.0], np.cumsum(shifted ** 2)))
+    mean = (sums[index + 1] - sums[start]) / counts
+    variance = (squares[index + 1] - squares[start]) / counts - mean ** 2
+    return mean + values[0], np.sqrt(np.clip(variance, 0, None))
+
+
+@traced
+class EstadisticaService:
+    """Service for aggregate statistics computed in SQL"""
+    
+    @staticmethod
+    def count_citas_by_estado(
+        db: Session,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        paciente_id: Optional[int] = None
+    ) -> List[Dict]:
+        """Count citas grouped by estado"""
+        days = _summary_range(desde, hasta, paciente_id)
+        if days:
+            return _cached(
+                db,
+                "citas_by_estado",
+                lambda: ResumenDiarioService.count(db, CITA_ESTADO, *days),
+                desde, hasta, paciente_id
+            )
+        return _cached(
+            db,
+            "citas_by_estado",
+            lambda: _grouped_count(
+                db, Cita.estado, Cita.fecha_hora, Cita.paciente_id, desde, hasta, paciente_id
+            ),
+            desde, hasta, paciente_id
+        )
+    
+    @staticmethod
+    def count_citas_by_period(
+        db: Session,
+        period: str = "day",
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        paciente_id: Optional[int] = None
+    ) -> List[Dict]:
+        """Count citas grouped by day or week of fecha_hora"""
+        days = _summary_range(desde, hasta, paciente_id)
+        if days:
+            return _cached(
+                db,
+                "citas_by_period",
+                lambda: ResumenDiarioService.count(
+                    db, CITA_ESTADO, *days, bucket=lambda column: _period_bucket(db, column, period)
+                ),
+                period, desde, hasta, paciente_id
+            )
+        return _cached(
+            db,
+            "citas_by_period",
+            lambda: _grouped_count(
+                db, _period_bucket(db, Cita.fecha_hora, period), Cita.fecha_hora,
+                Cita.paciente_id, desde, hasta, paciente_id
+            ),
+            period, desde, hasta, paciente_id
+        )
+    
+    @staticmethod
+    def count_resultados_by_tipo_examen(
+        db: Session,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        paciente_id: Optional[int] = None
+    ) -> List[Dict]:
+        """Count resultados grouped by tipo_examen"""
+        days = _summary_range(desde, hasta, paciente_id)
+        if days:
+            return _cached(
+                db,
+                "resultados_by_tipo_examen",
+                lambda: ResumenDiarioService.count(db, RESULTADO_TIPO_EXAMEN, *days),
+                desde, hasta, paciente_id
+            )
+        return _cached(
+            db,
+            "resultados_by_tipo_examen",
+            lambda: _count_resultados_by_tipo_examen(db, desde, hasta, paciente_id),
+            desde, hasta, paciente_id
+        )
+    
+    @staticmethod
+    def tendencia(db: Session, paciente_id: int, analito: str, ventana: int = 5) -> Dict:
+        """Get a paciente's series for ``analito`` with trend statistics.
+        
+        The series is loaded in one index scan and the rolling mean/std over
+        ``ventana`` points, deltas, out-of-range flags and the least-squares
+        slope per day are computed with vectorized NumPy operations.
+        """
+        # NumPy is only needed here, so it is kept out of the startup imports
+        import numpy as np
+        
+        rows = db.query(
+            Medicion.fecha, Medicion.valor, Medicion.rango_min, Medicion.rango_max, Medicion.unidad
+        ).filter(
+            Medicion.paciente_id == paciente_id, Medicion.analito == analito
+        ).order_by(Medicion.fecha, Medicion.id).all()
+        result = {
+            "paciente_id": paciente_id,
+            "analito": analito,
+            "ventana": ventana,
+            "total": len(rows),
+            "fechas": [],
+            "valores": [],
+            "media_movil": [],
+            "desviacion_movil": [],
+            "delta": [],
+            "fuera_de_rango": [],
+        }
+        if not rows:
+            return result
+        
+        fechas, valores, minimos, maximos, unidades = zip(*rows)
+        values = np.asarray(valores, dtype=float)
+        # Missing bounds become NaN, which never compares as out of range
+        low = np.asarray(minimos, dtype=float)
+        high = np.asarray(maximos, dtype=float)
+        mean, std = _rolling(values, ventana)
+        days = np.asarray([as_utc(fecha).timestamp() for fecha in fechas]) / 86400
+        days -= days[0]
+        
+        result.update({
+            "unidad": next((unidad for unidad in reversed(unidades) if unidad), None),
+            "fechas": list(fechas),
+            "valores": values.tolist(),
+            "media_movil": mean.tolist(),
+            "desviacion_movil": std.tolist(),
+            "delta": [None] + np.diff(values).tolist(),
+            "fuera_de_rango": ((values < low) | (values > high)).tolist(),
+            "minimo": float(values.min()),
+            "maximo": float(values.max()),
+            "media": float(values.mean()),
+            "pendiente_por_dia": float(np.polyfit(days, values, 1)[0]) if days[-1] > 0 else None,
+        })
+        return result
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop cached statistics"""
+        _cache.clear()
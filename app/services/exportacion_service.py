@@ -0,0 +1,225 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterator, List, Optional
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+from app.archive import get_archive
+from app.database import SessionLocal
+from app.models.paciente import Paciente
+from app.models.resultado import Resultado
+from app.models.resultado_archivado import ResultadoArchivado
+from app.tenancy import current_tenant, set_tenant
+from app.tracing import traced
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+@lru_cache()
+def _pyarrow():
+    """The optional ``pyarrow`` package (``pyarrow``, ``pyarrow.parquet``)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError(
+            "Cohort export requires the optional 'pyarrow' package: "
+            "pip install -r requirements-optional.txt"
+        ) from exc
+    return pyarrow, pyarrow.parquet
+
+
+class _ChunkSink:
+    """Write-only file object collecting bytes until the stream drains them"""
+    
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _schema(incluir_texto: bool):
+    pa, _ = _pyarrow()
+    fields = [
+        ("resultado_id", pa.int64()),
+        ("paciente_id", pa.int64()),
+        ("tipo_examen", pa.string()),
+        ("fecha_examen", pa.timestamp("us", tz="UTC")),
+        ("fecha_nacimiento", pa.date32()),
+    ]
+    if incluir_texto:
+        fields += [("resultado", pa.string()), ("observaciones", pa.string())]
+    return pa.schema(fields)
+
+
+def _cohort_select(
+    model,
+    tipo_examen: Optional[str],
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+    nacido_desde: Optional[date],
+    nacido_hasta: Optional[date],
+    incluir_texto: bool
+):
+    """Select the cohort columns of ``model`` (Resultado or ResultadoArchivado)"""
+    columns = [
+        model.id.label("resultado_id"), model.paciente_id, model.tipo_examen,
+        model.fecha_examen, Paciente.fecha_nacimiento,
+    ]
+    if incluir_texto:
+        columns += [model.resultado, model.observaciones]
+    stmt = select(*columns).join(Paciente, Paciente.id == model.paciente_id)
+    if tipo_examen is not None:
+        stmt = stmt.where(model.tipo_examen == tipo_examen)
+    if desde is not None:
+        stmt = stmt.where(model.fecha_examen >= desde)
+    if hasta is not None:
+        stmt = stmt.where(model.fecha_examen < hasta)
+    if nacido_desde is not None:
+        stmt = stmt.where(Paciente.fecha_nacimiento >= nacido_desde)
+    if nacido_hasta is not None:
+        stmt = stmt.where(Paciente.fecha_nacimiento < nacido_hasta)
+    return stmt
+
+
+def _file_archive_rows(
+    session: Session,
+    batch_size: int,
+    tipo_examen: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    nacido_desde: Optional[date] = None,
+    nacido_hasta: Optional[date] = None,
+    incluir_texto: bool = True
+) -> Iterator[List[tuple]]:
+    """Batches of cohort rows read from the files archive.
+    
+    Paciente birth dates are fetched per batch; rows of pacientes not
+    visible to ``session`` are dropped, as the join does for hot rows.
+    """
+    archived = [
+        row for row in get_archive().find(session, desde=desde, hasta=hasta)
+        if tipo_examen is None or row.tipo_examen == tipo_examen
+    ]
+    for start in range(0, len(archived), batch_size):
+        chunk = archived[start:start + batch_size]
+        stmt = select(Paciente.id, Paciente.fecha_nacimiento).where(
+            Paciente.id.in_({row.paciente_id for row in chunk})
+        )
+        if nacido_desde is not None:
+            stmt = stmt.where(Paciente.fecha_nacimiento >= nacido_desde)
+        if nacido_hasta is not None:
+            stmt = stmt.where(Paciente.fecha_nacimiento < nacido_hasta)
+        nacimientos = dict(session.execute(stmt).all())
+        rows = []
+        for row in chunk:
+            if row.paciente_id not in nacimientos:
+                continue
+            values = (row.id, row.paciente_id, row.tipo_examen, row.fecha_examen, nacimientos[row.paciente_id])
+            rows.append(values + ((row.resultado, row.observaciones) if incluir_texto else ()))
+        if rows:
+            yield rows
+
+
+@traced
+class ExportacionService:
+    """Service for columnar cohort exports"""
+    
+    @staticmethod
+    def check_available() -> None:
+        """Raise RuntimeError if the optional export dependency is missing"""
+        _pyarrow()
+    
+    @staticmethod
+    def cohort_query(
+        tipo_examen: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        nacido_desde: Optional[date] = None,
+        nacido_hasta: Optional[date] = None,
+        incluir_texto: bool = True
+    ):
+        """Select hot and (with the table archive) archived resultados joined
+        with paciente attributes, in id order"""
+        filters = dict(
+            tipo_examen=tipo_examen, desde=desde, hasta=hasta,
+            nacido_desde=nacido_desde, nacido_hasta=nacido_hasta, incluir_texto=incluir_texto
+        )
+        stmt = _cohort_select(Resultado, **filters)
+        if get_archive().backend == "table":
+            cohort = union_all(stmt, _cohort_select(ResultadoArchivado, **filters)).subquery()
+            return select(*cohort.c).order_by(cohort.c.resultado_id)
+        return stmt.order_by(Resultado.id)
+    
+    @staticmethod
+    def stream_resultados(
+        db: Session,
+        formato: str = "parquet",
+        batch_size: int = 10000,
+        **filters
+    ) -> Iterator[bytes]:
+        """Stream the cohort as Parquet or Arrow IPC, one batch at a time.
+        
+        Rows are fetched through a server-side cursor (``yield_per``) in
+        batches of ``batch_size``, each written as a Parquet row group or
+        Arrow record batch, so memory stays bounded by one batch. The
+        generator uses its own session on ``db``'s engine and tenant because
+        the request's session may be closed before the body is streamed.
+        Archived resultados are included: in the query with the table
+        backend, after the hot rows with the files backend.
+        """
+        pa, pq = _pyarrow()
+        schema = _schema(filters.get("incluir_texto", True))
+        stmt = ExportacionService.cohort_query(**filters).execution_options(yield_per=batch_size)
+        
+        session = SessionLocal(bind=db.get_bind())
+        set_tenant(session, current_tenant(db))
+        sink = _ChunkSink()
+        if formato == "arrow":
+            writer = pa.ipc.new_stream(sink, schema)
+        else:
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        
+        def batches():
+            yield from session.execute(stmt).partitions()
+            if get_archive().backend != "table":
+                yield from _file_archive_rows(session, batch_size, **filters)
+        
+        try:
+            for rows in batches():
+                columns = list(zip(*rows))
+                batch = pa.record_batch(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema
+                )
+                if formato == "arrow":
+                    writer.write_batch(batch)
+                else:
+                    writer.write_table(pa.Table.from_batches([batch]))
+                yield sink.drain()
+            writer.close()
+            yield sink.drain()
+        finally:
+            session.close()
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.models.idempotency import IdempotencyKey
+from app.tracing import traced
+
+
+@traced
+class IdempotencyService:
+    """Service for the database-backed idempotency key store"""
+    
+    @staticmethod
+    def get(db: Session, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """Get a non-expired idempotency record"""
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.now(timezone.utc)
+        ).first()
+    
+    @staticmethod
+    def reserve(
+        db: Session,
+        scope: str,
+        key: str,
+        request_hash: str,
+        lease_seconds: int
+    ) -> Optional[IdempotencyKey]:
+        """Reserve a key for a new request for ``lease_seconds``.
+        
+        Returns None when the key was reserved, or the existing record when
+        another request already holds (or completed) it. A reservation whose
+        lease ran out (its worker died) is taken over.
+        """
+        existing = IdempotencyService.get(db, scope, key)
+        if existing:
+            return existing
+        
+        # Drop an expired record so the key can be reused
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        ).delete(synchronize_session=False)
+        db.add(IdempotencyKey(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request reserved the same key first
+            db.rollback()
+            return IdempotencyService.get(db, scope, key)
+        return None
+    
+    @staticmethod
+    def complete(
+        db: Session,
+        scope: str,
+        key: str,
+        status_code: int,
+        response_body: str,
+        ttl_seconds: int
+    ) -> None:
+        """Store the response for a reserved key, kept for ``ttl_seconds``"""
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        ).update(
+            {
+                "status_code": status_code,
+                "response_body": response_body,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+            },
+            synchronize_session=False
+        )
+        db.commit()
+    
+    @staticmethod
+    def release(db: Session, scope: str, key: str) -> None:
+        """Release a reserved key after its request failed"""
+        db.rollback()
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None)
+        ).delete(synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """Delete expired idempotency records"""
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+import re
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError, field_validator
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+from app.change_feed import change_feed
+from app.database import utcnow
+from app.models.paciente import Paciente
+from app.response_cache import invalidate
+from app.schemas.importacion import ImportacionRechazo, ImportacionResponse
+from app.schemas.paciente import PacienteCreate
+from app.tenancy import current_tenant, default_tenant
+from app.tracing import traced
+
+FORMATS = ("csv", "ndjson")
+
+_COLUMNS = ("tenant_id", "nombre", "apellido", "email", "telefono", "fecha_nacimiento", "direccion", "updated_at")
+
+# Plain ASCII local parts, which email_validator leaves unchanged
+_LOCAL_PART = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+
+
+@lru_cache(maxsize=4096)
+def _email_domain(domain: str) -> Optional[str]:
+    """Normalized form of a valid email domain, None if invalid"""
+    try:
+        return validate_email(f"x@{domain}")[1].split("@", 1)[1]
+    except PydanticCustomError:
+        return None
+
+
+def normalize_email(email: str) -> str:
+    """Validate and normalize an email like ``EmailStr``.
+    
+    Domain checks (IDNA) dominate ``EmailStr`` validation and imported
+    emails share few domains, so the domain result is cached and plain local
+    parts are checked with a regex; anything else takes the full path.
+    """
+    local, _, domain = email.rpartition("@")
+    if len(email) <= 254 and len(local) <= 64 and _LOCAL_PART.match(local):
+        normalized_domain = _email_domain(domain)
+        if normalized_domain is not None:
+            return f"{local}@{normalized_domain}"
+    return validate_email(email)[1]
+
+
+class _PacienteImport(PacienteCreate):
+    """``PacienteCreate`` with the cached email check"""
+    email: str
+    
+    @field_validator("email")
+    @classmethod
+    def _check_email(cls, value: str) -> str:
+        return normalize_email(value)
+
+
+def read_rows(stream: BinaryIO, formato: str) -> Iterator[Tuple[int, object]]:
+    """Yield ``(line number, row)`` from a CSV (with header) or NDJSON stream.
+    
+    Empty CSV cells become None; NDJSON lines that aren't valid JSON are
+    yielded as None.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if formato == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, {
+                    key: value if value != "" else None for key, value in row.items() if key
+                }
+        else:
+            for number, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+    finally:
+        # Leave the caller's stream open
+        text.detach()
+
+
+def _copy_value(value) -> str:
+    """Encode a value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return "\\N"
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+_COPY = f"COPY pacientes ({', '.join(_COLUMNS)}) FROM STDIN"
+
+
+def _uses_copy(bind: Engine) -> bool:
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+
+def _copy(db: Session, rows: List[dict]) -> None:
+    """COPY pacientes on the raw psycopg2 connection"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in _COLUMNS) + "\n")
+    buffer.seek(0)
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(_COPY, buffer)
+    finally:
+        cursor.close()
+
+
+def _insert(db: Session, rows: List[dict]) -> None:
+    """Insert pacientes with COPY on Postgres (psycopg2), executemany elsewhere"""
+    bind = db.get_bind()
+    if not _uses_copy(bind):
+        db.execute(insert(Paciente.__table__), rows)
+        return
+    dbapi_error = bind.dialect.loaded_dbapi.Error
+    try:
+        _copy(db, rows)
+    except dbapi_error as exc:
+        # Raw cursor errors bypass SQLAlchemy; wrap them as it would
+        # (a unique violation becomes IntegrityError)
+        raise DBAPIError.instance(_COPY, None, exc, dbapi_error) from exc
+
+
+@traced
+class ImportacionService:
+    """Service for bulk imports"""
+    
+    @staticmethod
+    def import_pacientes(
+        db: Session,
+        stream: BinaryIO,
+        formato: str = "csv",
+        batch_size: int = 5000,
+        max_rejects: int = 1000,
+        progress: Optional[Callable[[ImportacionResponse], None]] = None
+    ) -> ImportacionResponse:
+        """Import pacientes from a CSV or NDJSON stream.
+        
+        Rows are validated with ``PacienteCreate`` and loaded in batches of
+        ``batch_size``, one transaction each, so memory stays bounded by a
+        batch. Emails already registered (case-insensitive), in the database
+        or earlier in the file, are skipped as duplicates. ``progress`` is
+        called with the running report after every batch.
+        
+        COPY returns no rows, so instead of one event per paciente the change
+        feed gets a single ``pacientes.imported`` event with the count and the
+        ``updated_since`` that lists the imported rows.
+        """
+        report = ImportacionResponse()
+        tenant_id = current_tenant(db) or default_tenant()
+        started = utcnow()
+        batch: List[dict] = []
+        keys = set()
+        
+        def reject(line: int, error: str) -> None:
+            report.rechazados += 1
+            if len(report.rechazos) < max_rejects:
+                report.rechazos.append(ImportacionRechazo(linea=line, error=error))
+        
+        def flush() -> None:
+            ImportacionService._load_batch(db, batch, report)
+            batch.clear()
+            keys.clear()
+            if progress:
+                progress(report)
+        
+        for line, data in read_rows(stream, formato):
+            report.filas += 1
+            if not isinstance(data, dict):
+                reject(line, "Invalid JSON object")
+                continue
+            try:
+                paciente = _PacienteImport.model_validate(data)
+            except ValidationError as exc:
+                error = exc.errors()[0]
+                reject(line, f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}")
+                continue
+            key = paciente.email.lower()
+            if key in keys:
+                report.duplicados += 1
+                continue
+            keys.add(key)
+            batch.append({**paciente.model_dump(), "tenant_id": tenant_id, "updated_at": utcnow()})
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        if report.importados:
+            invalidate("pacientes", tenant_id)
+            change_feed.publish(
+                "pacientes",
+                "imported",
+                None,
+                lambda: {"importados": report.importados, "updated_since": started.isoformat()},
+                tenant_id=tenant_id
+            )
+        return report
+    
+    @staticmethod
+    def _load_batch(db: Session, batch: List[dict], report: ImportacionResponse) -> None:
+        """De-duplicate a batch against the database and insert the rest"""
+        for attempt in range(2):
+            emails = [row["email"].lower() for row in batch]
+            existing = set(db.execute(
+                select(func.lower(Paciente.email)).where(func.lower(Paciente.email).in_(emails))
+            ).scalars())
+            fresh = [row for row in batch if row["email"].lower() not in existing]
+            try:
+                if fresh:
+                    _insert(db, fresh)
+                db.commit()
+                break
+            except IntegrityError:
+                # A concurrent sign-up took one of the emails; check again
+                db.rollback()
+                if attempt:
+                    raise
+        report.importados += len(fresh)
+        report.duplicados += len(batch) - len(fresh)
@@ -0,0 +1,66 @@
+from sqlalchemy.orm import Session
+from app.change_feed import change_feed
+from app.response_cache import invalidate
+from app.schemas.cita import CitaCreate, CitaResponse
+from app.schemas.ingreso import IngresoCreate, IngresoResponse
+from app.schemas.paciente import PacienteResponse
+from app.schemas.resultado import ResultadoCreate, ResultadoResponse
+from app.services.cita_service import CitaService
+from app.services.paciente_service import PacienteService
+from app.services.resultado_service import ResultadoService
+from app.tracing import traced
+
+
+def _publish(resource: str, response_model, db_object) -> None:
+    """Publish a committed row of an ingreso to the change feed"""
+    change_feed.publish(
+        resource,
+        "created",
+        db_object.id,
+        lambda: response_model.model_validate(db_object).model_dump(mode="json"),
+        tenant_id=db_object.tenant_id
+    )
+
+
+@traced
+class IngresoService:
+    """Service creating a paciente with its citas and resultados at once"""
+    
+    @staticmethod
+    def create(db: Session, ingreso: IngresoCreate) -> IngresoResponse:
+        """Create the whole ingreso in one transaction.
+        
+        Rows are flushed as they are added, so children get the new
+        paciente's id, and committed once at the end; any failure rolls
+        back the whole ingreso.
+        """
+        try:
+            db_paciente = PacienteService.add(db, ingreso.paciente)
+            db_citas = [
+                CitaService.add(db, CitaCreate(paciente_id=db_paciente.id, **cita.model_dump()))
+                for cita in ingreso.citas
+            ]
+            db_resultados = [
+                ResultadoService.add(
+                    db, ResultadoCreate(paciente_id=db_paciente.id, **resultado.model_dump())
+                )
+                for resultado in ingreso.resultados
+            ]
+            response = IngresoResponse(
+                paciente_id=db_paciente.id,
+                cita_ids=[cita.id for cita in db_citas],
+                resultado_ids=[resultado.id for resultado in db_resultados],
+            )
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        
+        for resource in ("pacientes", "citas", "resultados"):
+            invalidate(resource, db_paciente.tenant_id)
+        _publish("pacientes", PacienteResponse, db_paciente)
+        for db_cita in db_citas:
+            _publish("citas", CitaResponse, db_cita)
+        for db_resultado in db_resultados:
+            _publish("resultados", ResultadoResponse, db_resultado)
+        return response
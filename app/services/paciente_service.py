@@ -1,34 +1,112 @@
+from datetime import datetime
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.models.paciente import Paciente
-from app.schemas.paciente import PacienteCreate, PacienteUpdate
+from app.archive import get_archive
+from app.change_feed import change_feed
+from app.database import as_utc
+from app.jobs import emit, job
+from app.models.cita import Cita
+from app.models.medicion import Medicion
+from app.models.paciente import EMAIL_INDEX, Paciente
+from app.models.resultado import Resultado
+from app.response_cache import invalidate
+from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
+from app.services.resumen_service import ResumenDiarioService
+from app.services.sync_service import SyncService
+from app.soft_delete import INCLUDE_DELETED_OPTION, remove, remove_where, soft_delete_enabled
+from app.tenancy import set_tenant
+from app.tracing import traced
 
+# Hot lookups are built once; their compiled SQL is reused from SQLAlchemy's cache
+_BY_ID = select(Paciente).where(Paciente.id == bindparam("paciente_id"))
+_BY_EMAIL = select(Paciente).where(func.lower(Paciente.email) == func.lower(bindparam("email")))
 
+
+def _publish(action: str, db_paciente: Paciente) -> None:
+    """Publish a committed paciente to the change feed"""
+    change_feed.publish(
+        "pacientes",
+        action,
+        db_paciente.id,
+        lambda: PacienteResponse.model_validate(db_paciente).model_dump(mode="json"),
+        tenant_id=db_paciente.tenant_id
+    )
+
+
+class EmailAlreadyRegistered(Exception):
+    """Raised when a paciente's email is already taken (case-insensitive)"""
+
+
+def _is_email_conflict(exc: IntegrityError) -> bool:
+    """Whether an IntegrityError was raised by the unique email index
+    (Postgres and SQLite both name the index in the message)"""
+    return EMAIL_INDEX in str(exc.orig)
+
+
+@traced
 class PacienteService:
     """Service for Paciente CRUD operations"""
     
     @staticmethod
-    def get_all(db: Session, skip: int = 0, limit: int = 100) -> List[Paciente]:
-        """Get all pacientes"""
-        return db.query(Paciente).offset(skip).limit(limit).all()
+    def get_all(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        updated_since: Optional[datetime] = None
+    ) -> List[Paciente]:
+        """Get all pacientes, or only those changed since ``updated_since``"""
+        query = db.query(Paciente)
+        if updated_since is not None:
+            query = query.filter(Paciente.updated_at >= as_utc(updated_since)).order_by(
+                Paciente.updated_at, Paciente.id
+            )
+        else:
+            # Partial indexes leave SQLite free to pick any scan order
+            query = query.order_by(Paciente.id)
+        return query.offset(skip).limit(limit).all()
     
     @staticmethod
     def get_by_id(db: Session, paciente_id: int) -> Optional[Paciente]:
         """Get a paciente by ID"""
-        return db.query(Paciente).filter(Paciente.id == paciente_id).first()
+        return db.execute(_BY_ID, {"paciente_id": paciente_id}).scalars().first()
     
     @staticmethod
     def get_by_email(db: Session, email: str) -> Optional[Paciente]:
-        """Get a paciente by email"""
-        return db.query(Paciente).filter(Paciente.email == email).first()
+        """Get a paciente by email, ignoring case"""
+        return db.execute(_BY_EMAIL, {"email": email}).scalars().first()
     
     @staticmethod
-    def create(db: Session, paciente: PacienteCreate) -> Paciente:
-        """Create a new paciente"""
+    def add(db: Session, paciente: PacienteCreate) -> Paciente:
+        """Insert a new paciente in the current transaction, without committing.
+        
+        The unique email index is the duplicate check, so concurrent sign-ups
+        can't both succeed; on EmailAlreadyRegistered the caller must roll back.
+        """
         db_paciente = Paciente(**paciente.model_dump())
         db.add(db_paciente)
+        try:
+            db.flush()
+        except IntegrityError as exc:
+            if not _is_email_conflict(exc):
+                raise
+            raise EmailAlreadyRegistered(paciente.email) from exc
+        emit(db, "paciente.created", paciente_id=db_paciente.id)
+        return db_paciente
+    
+    @staticmethod
+    def create(db: Session, paciente: PacienteCreate) -> Paciente:
+        """Create a new paciente"""
+        try:
+            db_paciente = PacienteService.add(db, paciente)
+        except EmailAlreadyRegistered:
+            db.rollback()
+            raise
+        # add() flushed; server defaults came back with the INSERT
         db.commit()
-        db.refresh(db_paciente)
+        invalidate("pacientes", db_paciente.tenant_id)
+        _publish("created", db_paciente)
         return db_paciente
     
     @staticmethod
@@ -41,9 +119,19 @@ class PacienteService:
         update_data = paciente.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_paciente, field, value)
+        emit(db, "paciente.updated", paciente_id=paciente_id)
         
-        db.commit()
+        try:
+            db.flush()
+        except IntegrityError as exc:
+            db.rollback()
+            if not _is_email_conflict(exc):
+                raise
+            raise EmailAlreadyRegistered(update_data.get("email")) from exc
         db.refresh(db_paciente)
+        db.commit()
+        invalidate("pacientes", db_paciente.tenant_id)
+        _publish("updated", db_paciente)
         return db_paciente
     
     @staticmethod
@@ -53,6 +141,89 @@ class PacienteService:
         if not db_paciente:
             return False
         
-        db.delete(db_paciente)
+        # Children are removed by the delete cascade; uncount them first
+        tenant_id = db_paciente.tenant_id
+        cita_ids = [cita.id for cita in db_paciente.citas]
+        resultado_ids = [resultado.id for resultado in db_paciente.resultados]
+        for cita in db_paciente.citas:
+            ResumenDiarioService.track_cita(db, cita, -1)
+            SyncService.add_tombstone(db, "citas", cita.id, paciente_id)
+        for resultado in db_paciente.resultados:
+            ResumenDiarioService.track_resultado(db, resultado, -1)
+            SyncService.add_tombstone(db, "resultados", resultado.id, paciente_id)
+        archive = get_archive()
+        archived = archive.find(db, paciente_id=paciente_id)
+        for resultado in archived:
+            ResumenDiarioService.track_resultado(db, resultado, -1)
+            SyncService.add_tombstone(db, "resultados", resultado.id, paciente_id)
+        if archived and not soft_delete_enabled():
+            # Soft-deleted pacientes keep their archive until the purge
+            archive.delete_paciente(db, paciente_id)
+        remove_where(db, Medicion, Medicion.paciente_id == paciente_id)
+        if soft_delete_enabled():
+            # Only hard deletes cascade to the children
+            remove_where(db, Cita, Cita.paciente_id == paciente_id)
+            remove_where(db, Resultado, Resultado.paciente_id == paciente_id)
+        else:
+            # Children marked deleted earlier are hidden from the cascade
+            for model in (Medicion, Cita, Resultado):
+                db.query(model).execution_options(**{INCLUDE_DELETED_OPTION: True}).filter(
+                    model.paciente_id == paciente_id, model.deleted_at.isnot(None)
+                ).delete(synchronize_session=False)
+        remove(db, db_paciente)
+        SyncService.add_tombstone(db, "pacientes", paciente_id, paciente_id)
+        emit(db, "paciente.deleted", paciente_id=paciente_id)
         db.commit()
+        for resource in ("pacientes", "citas", "resultados"):
+            invalidate(resource, tenant_id)
+        for cita_id in cita_ids:
+            change_feed.publish("citas", "deleted", cita_id, tenant_id=tenant_id)
+        for resultado_id in resultado_ids:
+            change_feed.publish("resultados", "deleted", resultado_id, tenant_id=tenant_id)
+        change_feed.publish("pacientes", "deleted", paciente_id, tenant_id=tenant_id)
         return True
+    
+    @staticmethod
+    def count_history(db: Session, paciente_id: int) -> int:
+        """Count the citas and resultados of a paciente"""
+        citas = db.query(func.count(Cita.id)).filter(Cita.paciente_id == paciente_id).scalar()
+        resultados = db.query(func.count(Resultado.id)).filter(
+            Resultado.paciente_id == paciente_id
+        ).scalar()
+        return citas + resultados
+    
+    @staticmethod
+    def delete_with_history(db: Session, paciente_id: int, batch_size: int = 500) -> bool:
+        """Delete a paciente, removing its history in batches of ``batch_size``.
+        
+        Each batch is its own transaction, so locks are held briefly even for
+        pacientes with thousands of citas and resultados.
+        """
+        children = [
+            (Cita, ResumenDiarioService.track_cita),
+            (Resultado, ResumenDiarioService.track_resultado),
+        ]
+        for model, track in children:
+            while True:
+                batch = db.query(model).filter(
+                    model.paciente_id == paciente_id
+                ).limit(batch_size).all()
+                if not batch:
+                    break
+                deleted = [(row.id, row.tenant_id) for row in batch]
+                for row in batch:
+                    track(db, row, -1)
+                    remove(db, row)
+                    SyncService.add_tombstone(db, model.__tablename__, row.id, paciente_id)
+                db.commit()
+                for row_id, tenant_id in deleted:
+                    change_feed.publish(model.__tablename__, "deleted", row_id, tenant_id=tenant_id)
+                invalidate(model.__tablename__, tenant_id)
+        return PacienteService.delete(db, paciente_id)
+
+
+@job("pacientes.delete")
+def delete_paciente_job(db: Session, paciente_id: int, tenant_id: Optional[str] = None):
+    """Background job deleting a paciente with a long history"""
+    set_tenant(db, tenant_id)
+    PacienteService.delete_with_history(db, paciente_id)
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.archive import get_archive
+from app.config import get_settings
+from app.database import as_utc, utcnow
+from app.jobs import job
+from app.models.cita import Cita
+from app.models.medicion import Medicion
+from app.models.paciente import Paciente
+from app.models.resultado import Resultado
+from app.soft_delete import INCLUDE_DELETED_OPTION
+from app.tracing import traced
+
+# Children before the pacientes they reference
+PURGE_ORDER = (Medicion, Cita, Resultado, Paciente)
+
+
+def purge_window_end(now: datetime, hours: str) -> Optional[datetime]:
+    """End of the purge window ``"start-end"`` (UTC hours) containing ``now``,
+    or None outside it; windows may wrap past midnight (``"22-4"``)"""
+    start, end = (int(hour) for hour in hours.split("-"))
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if start <= end:
+        inside = start <= now.hour < end
+    else:
+        inside = now.hour >= start or now.hour < end
+    if not inside:
+        return None
+    window_end = midnight + timedelta(hours=end)
+    return window_end if window_end > now else window_end + timedelta(days=1)
+
+
+@traced
+class PurgaService:
+    """Service hard-deleting soft-deleted rows"""
+    
+    @staticmethod
+    def purge(
+        db: Session,
+        before: datetime,
+        batch_size: int = 500,
+        until: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """Hard-delete rows marked deleted before ``before``, ``batch_size``
+        rows per transaction, stopping at ``until``. Returns rows per table.
+        
+        Counters, tombstones and the change feed were updated when the rows
+        were marked, so this only removes them, together with the archived
+        resultados of the purged pacientes.
+        """
+        archive = get_archive()
+        options = {INCLUDE_DELETED_OPTION: True}
+        purged = {}
+        for model in PURGE_ORDER:
+            purged[model.__tablename__] = 0
+            while until is None or utcnow() < as_utc(until):
+                ids = db.execute(
+                    select(model.id).where(model.deleted_at < before).order_by(model.id).limit(batch_size),
+                    execution_options=options
+                ).scalars().all()
+                if not ids:
+                    break
+                if model is Paciente:
+                    for paciente_id in ids:
+                        archive.delete_paciente(db, paciente_id)
+                db.execute(
+                    delete(model).where(model.id.in_(ids)),
+                    execution_options={**options, "synchronize_session": False}
+                )
+                db.commit()
+                purged[model.__tablename__] += len(ids)
+        return purged
+
+
+@job("soft_delete.purge")
+def purge_deleted_job(db: Session):
+    """Periodic job purging soft-deleted rows, only within the off-peak hours"""
+    settings = get_settings()
+    now = utcnow()
+    until = purge_window_end(now, settings.soft_delete_purge_hours)
+    if until is None:
+        return
+    PurgaService.purge(
+        db,
+        now - timedelta(days=settings.soft_delete_retention_days),
+        settings.soft_delete_purge_batch_size,
+        until=until
+    )
@@ -1,34 +1,154 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
+from app.archive import ARCHIVED_COLUMNS, get_archive
+from app.change_feed import change_feed
+from app.config import get_settings
+from app.database import as_utc, utcnow
+from app.jobs import emit, job
+from app.models.medicion import Medicion
+from app.models.paciente import Paciente
 from app.models.resultado import Resultado
-from app.schemas.resultado import ResultadoCreate, ResultadoUpdate
+from app.models.resultado_archivado import ResultadoArchivado
+from app.partitioning import archive_month_partitions
+from app.response_cache import invalidate
+from app.schemas.resultado import ResultadoCreate, ResultadoUpdate, ResultadoResponse
+from app.services.resumen_service import ResumenDiarioService
+from app.services.sync_service import SyncService
+from app.soft_delete import remove, remove_where
+from app.tenancy import current_tenant
+from app.tracing import traced
 
+# Hot lookups are built once; their compiled SQL is reused from SQLAlchemy's cache.
+# Mediciones are loaded only by the reads whose responses serialize them, so
+# writes and existence checks don't pay for the extra SELECT
+_WITH_MEDICIONES = selectinload(Resultado.mediciones)
+_BY_ID = select(Resultado).where(Resultado.id == bindparam("resultado_id"))
+_BY_PACIENTE = select(Resultado).where(Resultado.paciente_id == bindparam("paciente_id")).order_by(
+    Resultado.id
+).offset(bindparam("skip")).limit(bindparam("limit"))
+_BY_ID_WITH_MEDICIONES = _BY_ID.options(_WITH_MEDICIONES)
+_BY_PACIENTE_WITH_MEDICIONES = _BY_PACIENTE.options(_WITH_MEDICIONES)
 
+
+def _publish(action: str, db_resultado: Resultado) -> None:
+    """Publish a committed resultado to the change feed"""
+    change_feed.publish(
+        "resultados",
+        action,
+        db_resultado.id,
+        lambda: ResultadoResponse.model_validate(db_resultado).model_dump(mode="json"),
+        tenant_id=db_resultado.tenant_id
+    )
+
+
+def _add_mediciones(db: Session, db_resultado: Resultado, mediciones: List[dict]) -> None:
+    """Attach numeric mediciones to a flushed resultado"""
+    for medicion in mediciones:
+        db.add(Medicion(
+            resultado_id=db_resultado.id,
+            paciente_id=db_resultado.paciente_id,
+            fecha=db_resultado.fecha_examen,
+            **medicion
+        ))
+
+
+@traced
 class ResultadoService:
     """Service for Resultado CRUD operations"""
     
     @staticmethod
-    def get_all(db: Session, skip: int = 0, limit: int = 100) -> List[Resultado]:
-        """Get all resultados"""
-        return db.query(Resultado).offset(skip).limit(limit).all()
+    def get_all(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        updated_since: Optional[datetime] = None,
+        mediciones: bool = False
+    ) -> List[Resultado]:
+        """Get all resultados, or only those changed since ``updated_since``,
+        with their mediciones loaded if asked"""
+        query = db.query(Resultado)
+        if mediciones:
+            query = query.options(_WITH_MEDICIONES)
+        if updated_since is not None:
+            query = query.filter(Resultado.updated_at >= as_utc(updated_since)).order_by(
+                Resultado.updated_at, Resultado.id
+            )
+        else:
+            # Partial indexes leave SQLite free to pick any scan order
+            query = query.order_by(Resultado.id)
+        return query.offset(skip).limit(limit).all()
     
     @staticmethod
-    def get_by_id(db: Session, resultado_id: int) -> Optional[Resultado]:
-        """Get a resultado by ID"""
-        return db.query(Resultado).filter(Resultado.id == resultado_id).first()
+    def get_by_id(
+        db: Session,
+        resultado_id: int,
+        include_archived: bool = False,
+        mediciones: bool = False
+    ) -> Optional[Union[Resultado, ResultadoArchivado]]:
+        """Get a resultado by ID, looking in the archive too if asked, with
+        its mediciones loaded if asked"""
+        statement = _BY_ID_WITH_MEDICIONES if mediciones else _BY_ID
+        resultado = db.execute(statement, {"resultado_id": resultado_id}).scalars().first()
+        if resultado is None and include_archived:
+            archived = get_archive().find(db, resultado_id=resultado_id, mediciones=mediciones)
+            if not archived:
+                return None
+            # Archives of soft-deleted pacientes are kept until the purge
+            live = db.query(Paciente.id).filter(Paciente.id == archived[0].paciente_id).first()
+            return archived[0] if live else None
+        return resultado
     
     @staticmethod
-    def get_by_paciente(db: Session, paciente_id: int) -> List[Resultado]:
-        """Get all resultados for a paciente"""
-        return db.query(Resultado).filter(Resultado.paciente_id == paciente_id).all()
+    def get_by_paciente(
+        db: Session,
+        paciente_id: int,
+        include_archived: bool = False,
+        mediciones: bool = False,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Union[Resultado, ResultadoArchivado]]:
+        """Get a page of a paciente's resultados
+        
+        With ``include_archived`` archived resultados are included and the
+        list is ordered by fecha_examen. With ``mediciones`` their mediciones
+        are loaded too.
+        """
+        statement = _BY_PACIENTE_WITH_MEDICIONES if mediciones else _BY_PACIENTE
+        if not include_archived:
+            return db.execute(
+                statement, {"paciente_id": paciente_id, "skip": skip, "limit": limit}
+            ).scalars().all()
+        # The page's rows are among the first skip + limit of each store
+        statement = statement.order_by(None).order_by(Resultado.fecha_examen, Resultado.id)
+        resultados = db.execute(
+            statement, {"paciente_id": paciente_id, "skip": 0, "limit": skip + limit}
+        ).scalars().all()
+        archived = get_archive().find(db, paciente_id=paciente_id, mediciones=mediciones)
+        merged = sorted(archived + resultados, key=lambda r: (as_utc(r.fecha_examen), r.id))
+        return merged[skip:skip + limit]
+    
+    @staticmethod
+    def add(db: Session, resultado: ResultadoCreate) -> Resultado:
+        """Insert a new resultado in the current transaction, without committing"""
+        db_resultado = Resultado(**resultado.model_dump(exclude={"mediciones"}))
+        db.add(db_resultado)
+        db.flush()
+        _add_mediciones(db, db_resultado, resultado.model_dump()["mediciones"])
+        ResumenDiarioService.track_resultado(db, db_resultado)
+        emit(db, "resultado.created", resultado_id=db_resultado.id)
+        return db_resultado
     
     @staticmethod
     def create(db: Session, resultado: ResultadoCreate) -> Resultado:
         """Create a new resultado"""
-        db_resultado = Resultado(**resultado.model_dump())
-        db.add(db_resultado)
+        db_resultado = ResultadoService.add(db, resultado)
+        db.flush()
+        db.refresh(db_resultado, ["mediciones"])
         db.commit()
-        db.refresh(db_resultado)
+        invalidate("resultados", db_resultado.tenant_id)
+        _publish("created", db_resultado)
         return db_resultado
     
     @staticmethod
@@ -38,12 +158,27 @@ class ResultadoService:
         if not db_resultado:
             return None
         
+        ResumenDiarioService.track_resultado(db, db_resultado, -1)
         update_data = resultado.model_dump(exclude_unset=True)
+        mediciones = update_data.pop("mediciones", None)
         for field, value in update_data.items():
             setattr(db_resultado, field, value)
+        ResumenDiarioService.track_resultado(db, db_resultado)
+        if mediciones is not None:
+            db.query(Medicion).filter(Medicion.resultado_id == resultado_id).delete()
+            _add_mediciones(db, db_resultado, mediciones)
+        elif "fecha_examen" in update_data:
+            db.query(Medicion).filter(Medicion.resultado_id == resultado_id).update(
+                {Medicion.fecha: db_resultado.fecha_examen}, synchronize_session=False
+            )
+        emit(db, "resultado.updated", resultado_id=resultado_id)
         
-        db.commit()
+        db.flush()
         db.refresh(db_resultado)
+        db.refresh(db_resultado, ["mediciones"])
+        db.commit()
+        invalidate("resultados", db_resultado.tenant_id)
+        _publish("updated", db_resultado)
         return db_resultado
     
     @staticmethod
@@ -53,6 +188,57 @@ class ResultadoService:
         if not db_resultado:
             return False
         
-        db.delete(db_resultado)
+        tenant_id = db_resultado.tenant_id
+        ResumenDiarioService.track_resultado(db, db_resultado, -1)
+        remove(db, db_resultado)
+        remove_where(db, Medicion, Medicion.resultado_id == resultado_id)
+        SyncService.add_tombstone(db, "resultados", resultado_id, db_resultado.paciente_id)
+        emit(db, "resultado.deleted", resultado_id=resultado_id)
         db.commit()
+        invalidate("resultados", tenant_id)
+        change_feed.publish("resultados", "deleted", resultado_id, tenant_id=tenant_id)
         return True
+    
+    @staticmethod
+    def archive(db: Session, before: datetime, batch_size: int = 500) -> int:
+        """Move resultados examined before ``before`` to the archive.
+        
+        Rows move in batches of ``batch_size``, one transaction each. On
+        Postgres with monthly partitions, whole expired partitions are moved
+        and dropped first. Archived resultados stay counted in the daily
+        summary. Returns the number of resultados archived.
+        """
+        archive = get_archive()
+        archived = 0
+        settings = get_settings()
+        if (
+            archive.backend == "table"
+            and settings.partition_strategy == "month"
+            and db.get_bind().dialect.name == "postgresql"
+            and current_tenant(db) is None
+        ):
+            archived += archive_month_partitions(
+                db.connection(), before.date(), list(ARCHIVED_COLUMNS)
+            )
+            db.commit()
+        
+        while True:
+            batch = db.query(Resultado).filter(
+                Resultado.fecha_examen < before
+            ).order_by(Resultado.id).limit(batch_size).all()
+            if not batch:
+                break
+            archive.store(db, batch)
+            for row in batch:
+                db.delete(row)
+            db.commit()
+            archived += len(batch)
+        if archived:
+            invalidate("resultados", current_tenant(db))
+        return archived
+
+
+@job("resultados.archive")
+def archive_resultados_job(db: Session, dias: int):
+    """Periodic job archiving resultados older than ``dias`` days"""
+    ResultadoService.archive(db, utcnow() - timedelta(days=dias))
@@ -0,0 +1,197 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from sqlalchemy import func, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from app.archive import get_archive
+from app.database import utcnow
+from app.jobs import job
+from app.models.cita import Cita
+from app.models.resultado import Resultado
+from app.models.resultado_archivado import ResultadoArchivado
+from app.models.resumen_diario import ResumenDiario
+from app.tracing import traced
+
+CITA_ESTADO = "cita_estado"
+RESULTADO_TIPO_EXAMEN = "resultado_tipo_examen"
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _day(db: Session, value: datetime) -> date:
+    """Day a timestamp is counted under (UTC on Postgres, stored wall clock on SQLite)"""
+    if value.tzinfo is not None and _is_postgres(db):
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _day_expr(db: Session, column):
+    """SQL counterpart of ``_day``"""
+    if _is_postgres(db):
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def _sources():
+    """(recurso, date column, key column) for every summarized table"""
+    sources = [
+        (CITA_ESTADO, Cita.fecha_hora, Cita.estado),
+        (RESULTADO_TIPO_EXAMEN, Resultado.fecha_examen, Resultado.tipo_examen),
+    ]
+    if get_archive().backend == "table":
+        sources.append(
+            (RESULTADO_TIPO_EXAMEN, ResultadoArchivado.fecha_examen, ResultadoArchivado.tipo_examen)
+        )
+    return sources
+
+
+@traced
+class ResumenDiarioService:
+    """Service maintaining the resumen_diario summary table"""
+    
+    @staticmethod
+    def add(
+        db: Session,
+        recurso: str,
+        fecha: date,
+        clave: Optional[str],
+        delta: int,
+        tenant_id: str
+    ) -> None:
+        """Add ``delta`` to a tenant's summary row in the current transaction"""
+        values = {
+            "tenant_id": tenant_id,
+            "recurso": recurso,
+            "fecha": fecha,
+            "clave": clave or "",
+            "total": delta,
+        }
+        dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(ResumenDiario).values(**values).on_conflict_do_update(
+                index_elements=["tenant_id", "recurso", "fecha", "clave"],
+                set_={"total": ResumenDiario.total + delta}
+            )
+            db.execute(stmt)
+            return
+        
+        row = db.get(ResumenDiario, (tenant_id, recurso, fecha, values["clave"]))
+        if row:
+            row.total += delta
+        else:
+            db.add(ResumenDiario(**values))
+    
+    @staticmethod
+    def track_cita(db: Session, cita: Cita, delta: int = 1) -> None:
+        """Count (or uncount, with a negative delta) a cita"""
+        ResumenDiarioService.add(
+            db, CITA_ESTADO, _day(db, cita.fecha_hora), cita.estado, delta, cita.tenant_id
+        )
+    
+    @staticmethod
+    def track_resultado(db: Session, resultado: Resultado, delta: int = 1) -> None:
+        """Count (or uncount, with a negative delta) a resultado"""
+        ResumenDiarioService.add(
+            db, RESULTADO_TIPO_EXAMEN, _day(db, resultado.fecha_examen), resultado.tipo_examen, delta,
+            resultado.tenant_id
+        )
+    
+    @staticmethod
+    def refresh(db: Session, desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+        """Rebuild the summary for [desde, hasta) from the base tables
+        
+        Covers the session's tenant, or every tenant for unscoped sessions.
+        Archived resultados are counted too. Writers add their deltas in
+        their own transactions; the summary is locked against them until the
+        rebuilt totals commit, so no delta is lost or double counted (SQLite
+        gets the same from its single writer, taken by the DELETE).
+        """
+        if _is_postgres(db):
+            # Waits for writers holding uncommitted deltas, and blocks new ones
+            db.execute(text("LOCK TABLE resumen_diario IN SHARE ROW EXCLUSIVE MODE"))
+        stale = db.query(ResumenDiario)
+        if desde is not None:
+            stale = stale.filter(ResumenDiario.fecha >= desde)
+        if hasta is not None:
+            stale = stale.filter(ResumenDiario.fecha < hasta)
+        stale.delete(synchronize_session=False)
+        
+        totals: Counter = Counter()
+        for recurso, date_column, key_column in _sources():
+            day = _day_expr(db, date_column)
+            tenant_column = date_column.class_.tenant_id
+            query = db.query(tenant_column, day, key_column, func.count()).group_by(
+                tenant_column, day, key_column
+            )
+            if desde is not None:
+                query = query.filter(date_column >= datetime.combine(desde, time.min))
+            if hasta is not None:
+                query = query.filter(date_column < datetime.combine(hasta, time.min))
+            for tenant_id, fecha, clave, total in query.all():
+                if isinstance(fecha, str):
+                    fecha = date.fromisoformat(fecha)
+                totals[(tenant_id, recurso, fecha, clave or "")] += total
+        
+        archive = get_archive()
+        if archive.backend != "table":
+            archived = archive.daily_counts(
+                db,
+                lambda value: _day(db, value),
+                desde=None if desde is None else datetime.combine(desde, time.min),
+                hasta=None if hasta is None else datetime.combine(hasta, time.min)
+            )
+            for (tenant_id, fecha, clave), total in archived.items():
+                totals[(tenant_id, RESULTADO_TIPO_EXAMEN, fecha, clave or "")] += total
+        
+        rows = [
+            {"tenant_id": tenant_id, "recurso": recurso, "fecha": fecha, "clave": clave, "total": total}
+            for (tenant_id, recurso, fecha, clave), total in totals.items()
+        ]
+        if rows:
+            db.execute(insert(ResumenDiario), rows)
+        db.commit()
+        return len(rows)
+    
+    @staticmethod
+    def backfill_if_empty(db: Session) -> int:
+        """Build the summary on first start after the table was introduced"""
+        if db.query(ResumenDiario).first() or not (db.query(Cita).first() or db.query(Resultado).first()):
+            return 0
+        try:
+            return ResumenDiarioService.refresh(db)
+        except IntegrityError:
+            # Another process backfilled concurrently
+            db.rollback()
+            return 0
+    
+    @staticmethod
+    def count(
+        db: Session,
+        recurso: str,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        bucket=None
+    ) -> List[Dict]:
+        """Sum summary rows grouped by clave, or by ``bucket(fecha)`` when given"""
+        key = ResumenDiario.clave if bucket is None else bucket(ResumenDiario.fecha)
+        total = func.sum(ResumenDiario.total)
+        query = db.query(key, total).filter(ResumenDiario.recurso == recurso)
+        if desde is not None:
+            query = query.filter(ResumenDiario.fecha >= desde)
+        if hasta is not None:
+            query = query.filter(ResumenDiario.fecha < hasta)
+        rows = query.group_by(key).having(total > 0).order_by(key).all()
+        return [{"clave": str(clave), "total": int(total)} for clave, total in rows]
+
+
+@job("resumen.refresh")
+def refresh_resumen_job(db: Session, dias: int = 7):
+    """Periodic job rebuilding the last ``dias`` days of the summary"""
+    # Days are bucketed in UTC (see ``_day``)
+    ResumenDiarioService.refresh(db, desde=utcnow().date() - timedelta(days=dias))
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.database import as_utc, utcnow
+from app.jobs import job
+from app.models.cita import Cita
+from app.models.paciente import Paciente
+from app.models.resultado import Resultado
+from app.models.tombstone import Tombstone
+from app.tracing import traced
+
+Cursor = Tuple[Optional[datetime], int]
+
+settings = get_settings()
+
+
+class InvalidSyncToken(Exception):
+    """Raised when a sync token can't be decoded"""
+
+
+class SyncTokenExpired(Exception):
+    """Raised when a token predates the tombstone retention window"""
+
+
+def _streams(paciente_id: int):
+    """(name, model, timestamp column, scope filter, loader options) for every synced stream"""
+    return [
+        ("pacientes", Paciente, Paciente.updated_at, Paciente.id == paciente_id, ()),
+        ("citas", Cita, Cita.updated_at, Cita.paciente_id == paciente_id, ()),
+        (
+            "resultados", Resultado, Resultado.updated_at, Resultado.paciente_id == paciente_id,
+            (selectinload(Resultado.mediciones),)
+        ),
+        ("tombstones", Tombstone, Tombstone.deleted_at, Tombstone.paciente_id == paciente_id, ()),
+    ]
+
+
+def _after(timestamp, id_column, cursor: Cursor):
+    """Keyset condition for rows after ``cursor`` in (timestamp NULLS FIRST, id) order"""
+    ts, last_id = cursor
+    if ts is None:
+        return or_(timestamp.isnot(None), and_(timestamp.is_(None), id_column > last_id))
+    return or_(timestamp > ts, and_(timestamp == ts, id_column > last_id))
+
+
+def encode_token(cursors: Dict[str, Cursor], issued_at: datetime) -> str:
+    """Encode stream cursors as an opaque token"""
+    payload = {
+        "issued_at": issued_at.isoformat(),
+        "cursors": {
+            name: [ts.isoformat() if ts else None, last_id]
+            for name, (ts, last_id) in cursors.items()
+        },
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_token(token: str) -> Tuple[Dict[str, Cursor], datetime]:
+    """Decode a token produced by ``encode_token``"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        cursors = {
+            name: (as_utc(datetime.fromisoformat(ts)) if ts else None, int(last_id))
+            for name, (ts, last_id) in payload["cursors"].items()
+        }
+        return cursors, as_utc(datetime.fromisoformat(payload["issued_at"]))
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidSyncToken(str(exc)) from exc
+
+
+@traced
+class SyncService:
+    """Service for delta sync of a paciente's records"""
+
+    @staticmethod
+    def add_tombstone(db: Session, recurso: str, record_id: int, paciente_id: int) -> None:
+        """Record a deletion in the current transaction"""
+        db.add(Tombstone(recurso=recurso, record_id=record_id, paciente_id=paciente_id))
+
+    @staticmethod
+    def changes(
+        db: Session,
+        paciente_id: int,
+        token: Optional[str] = None,
+        limit: int = 100
+    ) -> dict:
+        """Get up to ``limit`` changed records per stream since ``token``.
+
+        Rows newer than ``sync_safety_lag_seconds`` are held back so that
+        transactions still in flight can't commit behind a returned cursor.
+        """
+        now = utcnow()
+        cursors: Dict[str, Cursor] = {}
+        if token:
+            cursors, issued_at = decode_token(token)
+            if issued_at < now - timedelta(days=settings.sync_tombstone_retention_days):
+                raise SyncTokenExpired()
+        horizon = now - timedelta(seconds=settings.sync_safety_lag_seconds)
+
+        result = {"has_more": False}
+        for name, model, timestamp, scope, options in _streams(paciente_id):
+            query = db.query(model).options(*options).filter(
+                scope, or_(timestamp.is_(None), timestamp < horizon)
+            )
+            if name in cursors:
+                query = query.filter(_after(timestamp, model.id, cursors[name]))
+            rows: List = query.order_by(timestamp.nulls_first(), model.id).limit(limit + 1).all()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                result["has_more"] = True
+            if rows:
+                last = rows[-1]
+                ts = getattr(last, timestamp.key)
+                cursors[name] = (as_utc(ts) if ts else None, last.id)
+            result[name] = rows
+        result["next_token"] = encode_token(cursors, now)
+        return result
+
+    @staticmethod
+    def purge_tombstones(db: Session) -> int:
+        """Delete tombstones older than the retention window"""
+        cutoff = utcnow() - timedelta(days=settings.sync_tombstone_retention_days)
+        deleted = db.query(Tombstone).filter(
+            Tombstone.deleted_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+
+@job("sync.purge_tombstones")
+def purge_tombstones_job(db: Session):
+    """Periodic job deleting expired tombstones"""
+    SyncService.purge_tombstones(db)
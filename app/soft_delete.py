@@ -0,0 +1,115 @@
+"""Soft delete: deleted rows are marked with ``deleted_at`` and purged later.
+
+With ``SOFT_DELETE_ENABLED=true`` the services delete pacientes, citas and
+resultados (and their mediciones) by setting ``deleted_at``, a cheap update,
+instead of issuing DELETEs and cascades during busy hours. Every ORM query
+on a ``SoftDeleteMixin`` model hides marked rows whatever the mode, so
+services never see them; pass the ``include_deleted`` execution option to
+read them. The lookup indexes are partial on live rows (``deleted_at IS
+NULL``), so marked rows don't bloat them and a deleted paciente's email can
+be registered again. The ``soft_delete.purge`` job hard-deletes marked rows
+after ``SOFT_DELETE_RETENTION_DAYS``, in small batches within the off-peak
+``SOFT_DELETE_PURGE_HOURS``.
+"""
+from sqlalchemy import Column, DateTime, Index, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, with_loader_criteria
+from app.config import get_settings
+from app.database import Base, utcnow
+
+INCLUDE_DELETED_OPTION = "include_deleted"
+
+# Full indexes replaced by the partial ``*_live`` ones, dropped on upgrade
+REPLACED_INDEXES = {
+    "pacientes": ("ix_pacientes_tenant_email_lower", "ix_pacientes_tenant_updated_at"),
+    "citas": ("ix_citas_tenant_paciente", "ix_citas_tenant_fecha_hora", "ix_citas_tenant_updated_at"),
+    "resultados": (
+        "ix_resultados_tenant_paciente", "ix_resultados_tenant_fecha_examen",
+        "ix_resultados_tenant_updated_at",
+    ),
+    "mediciones": ("ix_mediciones_tenant_paciente_analito_fecha",),
+}
+
+
+class SoftDeleteMixin:
+    """Adds a ``deleted_at`` column to a model and hides marked rows from queries"""
+    
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+
+def live_index(name: str, *expressions, **kwargs) -> Index:
+    """Index over live rows only (``deleted_at IS NULL``)"""
+    return Index(
+        name, *expressions,
+        postgresql_where=text("deleted_at IS NULL"),
+        sqlite_where=text("deleted_at IS NULL"),
+        **kwargs
+    )
+
+
+def deleted_index(table: str) -> Index:
+    """Partial index on ``deleted_at`` over marked rows, for the purge job"""
+    return Index(
+        f"ix_{table}_deleted_at", "deleted_at",
+        postgresql_where=text("deleted_at IS NOT NULL"),
+        sqlite_where=text("deleted_at IS NOT NULL"),
+    )
+
+
+def soft_delete_enabled() -> bool:
+    return get_settings().soft_delete_enabled
+
+
+def remove(db: Session, obj) -> None:
+    """Mark ``obj`` deleted in soft delete mode, otherwise delete it"""
+    if soft_delete_enabled():
+        obj.deleted_at = utcnow()
+    else:
+        db.delete(obj)
+
+
+def remove_where(db: Session, model, *criteria) -> None:
+    """Mark (soft delete mode) or delete the ``model`` rows matching ``criteria``"""
+    query = db.query(model).filter(*criteria)
+    if soft_delete_enabled():
+        query.update({model.deleted_at: utcnow()})
+    else:
+        query.delete()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted(state):
+    if (
+        not (state.is_select or state.is_update or state.is_delete)
+        or state.is_column_load
+        or state.is_relationship_load
+        or state.execution_options.get(INCLUDE_DELETED_OPTION, False)
+    ):
+        return
+    state.statement = state.statement.options(
+        with_loader_criteria(
+            SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True
+        )
+    )
+
+
+def add_soft_delete_columns(engine: Engine) -> None:
+    """Add ``deleted_at`` and the partial indexes to tables created before
+    soft delete existed, dropping the full indexes they replace"""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if "deleted_at" not in table.c or table.name not in existing:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            if "deleted_at" in columns:
+                continue
+            column_type = table.c.deleted_at.type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN deleted_at {column_type}"))
+            for name in REPLACED_INDEXES.get(table.name, ()):
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            # The partial indexes all filter on the column just added
+            for index in table.indexes:
+                if index.dialect_kwargs.get(f"{engine.dialect.name}_where") is not None:
+                    index.create(conn)
@@ -0,0 +1,85 @@
+"""Startup profiling helpers.
+
+Measures how long ``import app.main`` takes (broken down per top-level
+package using ``python -X importtime``) and the time it takes a fresh
+process to answer its first request. Each measurement runs in a clean
+subprocess so modules already imported by the caller don't hide the cost.
+
+Usage:
+    python -m app.startup_profile
+"""
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+FIRST_REQUEST_SNIPPET = """
+import time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    response = client.get("/health")
+    response.raise_for_status()
+print(f"{(time.perf_counter() - start) * 1000:.3f}")
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    """Run a python subprocess from the project root"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(output: str) -> Dict[str, float]:
+    """Sum self import time (ms) per top-level package from -X importtime output"""
+    totals: Dict[str, float] = defaultdict(float)
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        module = parts[2].strip()
+        totals[module.split(".")[0]] += int(parts[0]) / 1000
+    return dict(totals)
+
+
+def import_profile(module: str = "app.main") -> Tuple[float, Dict[str, float]]:
+    """Return total import time (ms) of ``module`` and its per-package breakdown"""
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    breakdown = parse_importtime(result.stderr)
+    return sum(breakdown.values()), breakdown
+
+
+def imported_modules(module: str = "app.main") -> List[str]:
+    """Return the names of every module loaded by importing ``module``"""
+    result = _run(["-c", f"import sys, {module}; print('\\n'.join(sys.modules))"])
+    return result.stdout.split()
+
+
+def time_to_first_request() -> float:
+    """Return ms from interpreter start to a served ``GET /health``"""
+    result = _run(["-c", FIRST_REQUEST_SNIPPET])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Print the startup profile"""
+    total, breakdown = import_profile()
+    print(f"import app.main: {total:.1f} ms")
+    for package, elapsed in sorted(breakdown.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {package:<30} {elapsed:8.1f} ms")
+    print(f"time to first request: {time_to_first_request():.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from functools import lru_cache
+from app.config import get_settings
+
+
+@lru_cache()
+def get_supabase_client():
+    """Get cached Supabase client.
+
+    The ``supabase`` package is an optional integration: it is imported here,
+    on first use, so the API process doesn't pay its import cost at startup.
+    """
+    try:
+        from supabase import create_client
+    except ImportError as exc:
+        raise RuntimeError(
+            "Supabase integration requires the optional 'supabase' package: "
+            "pip install -r requirements-optional.txt"
+        ) from exc
+
+    settings = get_settings()
+    return create_client(settings.supabase_url, settings.supabase_key)
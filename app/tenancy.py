@@ -0,0 +1,88 @@
+"""Row-level multi-tenancy: each clinic's rows carry a ``tenant_id``.
+
+Request sessions are bound to the caller's tenant (``X-Tenant-ID`` header, or
+``DEFAULT_TENANT`` when absent). Every ORM query on a tenant-scoped model run
+through such a session is filtered by that tenant, and new rows are stamped
+with it, so services never see another clinic's data. Sessions without a
+tenant (startup, background jobs working for every clinic) see all rows.
+"""
+import re
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from sqlalchemy import Column, String, event
+from sqlalchemy.orm import Session, with_loader_criteria
+from app.config import get_settings
+
+TENANT_KEY = "tenant_id"
+TENANT_HEADER = "X-Tenant-ID"
+ALL_TENANTS_OPTION = "all_tenants"
+
+_TENANT_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def default_tenant() -> str:
+    """Tenant used for requests without an X-Tenant-ID header"""
+    return get_settings().default_tenant
+
+
+class TenantMixin:
+    """Adds a ``tenant_id`` column to a model and scopes its queries by tenant"""
+    
+    tenant_id = Column(String(64), nullable=False, default=default_tenant)
+
+
+def get_tenant_id(request: Request) -> str:
+    """Resolve the tenant of a request"""
+    tenant_id = request.headers.get(TENANT_HEADER) or get_settings().default_tenant
+    if not tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{TENANT_HEADER} header is required"
+        )
+    if not _TENANT_PATTERN.match(tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {TENANT_HEADER} header"
+        )
+    return tenant_id
+
+
+def set_tenant(db: Session, tenant_id: Optional[str]) -> None:
+    """Scope a session to ``tenant_id`` (``None`` for all tenants)"""
+    if tenant_id is None:
+        db.info.pop(TENANT_KEY, None)
+    else:
+        db.info[TENANT_KEY] = tenant_id
+
+
+def current_tenant(db: Session) -> Optional[str]:
+    """Tenant a session is scoped to, if any"""
+    return db.info.get(TENANT_KEY)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _filter_by_tenant(state):
+    tenant_id = state.session.info.get(TENANT_KEY)
+    if (
+        tenant_id is None
+        or not (state.is_select or state.is_update or state.is_delete)
+        or state.is_column_load
+        or state.is_relationship_load
+        or state.execution_options.get(ALL_TENANTS_OPTION, False)
+    ):
+        return
+    state.statement = state.statement.options(
+        with_loader_criteria(
+            TenantMixin, lambda cls: cls.tenant_id == tenant_id, include_aliases=True
+        )
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tenant(session, flush_context, instances):
+    tenant_id = session.info.get(TENANT_KEY)
+    if tenant_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TenantMixin) and obj.tenant_id is None:
+            obj.tenant_id = tenant_id
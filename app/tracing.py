@@ -0,0 +1,276 @@
+"""OpenTelemetry tracing of requests, service methods and SQL statements.
+
+With ``TRACING_ENABLED=true`` every HTTP request gets a server span (joining
+an incoming ``traceparent``), each public method of a ``@traced`` service
+class a child span, and each SQL statement and session commit a span from
+the SQLAlchemy events, so a slow request shows where its time went.
+``TRACING_SAMPLE_RATIO`` samples that fraction of new traces; sampled
+parents are always followed. Spans go to an OTLP/HTTP collector
+(``TRACING_EXPORTER=otlp``), stdout (``console``) or a JSON lines file
+(``file``, see ``TRACING_FILE``).
+
+Tracing is disabled by default and then costs nothing beyond one global
+check per service call: the middleware and database listeners are only
+installed by ``setup_tracing``. The OpenTelemetry SDK (and the OTLP
+exporter) are optional dependencies imported there.
+"""
+import functools
+import inspect
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config import get_settings
+
+TRACER_NAME = "vitalapp"
+MAX_STATEMENT_LENGTH = 2000
+SPAN_KEY = "tracing_span"
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+
+_tracer = None
+_provider = None
+
+
+@lru_cache()
+def _otel():
+    """The optional OpenTelemetry SDK modules"""
+    try:
+        from opentelemetry import context, propagate, trace
+        from opentelemetry.sdk import resources
+        from opentelemetry.sdk.trace import TracerProvider, export, sampling
+    except ImportError as exc:
+        raise RuntimeError(
+            "Tracing requires the optional 'opentelemetry-sdk' package: "
+            "pip install -r requirements-optional.txt"
+        ) from exc
+    return context, propagate, trace, resources, TracerProvider, export, sampling
+
+
+def _exporter(settings):
+    """Build the span exporter selected by ``TRACING_EXPORTER``"""
+    export = _otel()[5]
+    if settings.tracing_exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as exc:
+            raise RuntimeError(
+                "TRACING_EXPORTER=otlp requires the optional "
+                "'opentelemetry-exporter-otlp-proto-http' package"
+            ) from exc
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    if settings.tracing_exporter == "file":
+        out = open(settings.tracing_file, "a", buffering=1, encoding="utf-8")
+        return export.ConsoleSpanExporter(
+            out=out, formatter=lambda span: span.to_json(indent=None) + os.linesep
+        )
+    if settings.tracing_exporter == "console":
+        return export.ConsoleSpanExporter()
+    raise ValueError(f"Unknown tracing exporter '{settings.tracing_exporter}'")
+
+
+def setup_tracing(exporter=None) -> bool:
+    """Start exporting spans if tracing is enabled; return whether it is.
+    
+    ``exporter`` replaces the configured one (tests pass an in-memory one)
+    and is flushed on every span.
+    """
+    global _tracer, _provider
+    settings = get_settings()
+    if not settings.tracing_enabled:
+        return False
+    if _tracer is not None:
+        return True
+    _, _, _, resources, TracerProvider, export, sampling = _otel()
+    _provider = TracerProvider(
+        sampler=sampling.ParentBased(sampling.TraceIdRatioBased(settings.tracing_sample_ratio)),
+        resource=resources.Resource.create({
+            "service.name": settings.app_name,
+            "service.version": settings.app_version,
+        }),
+    )
+    if exporter is not None or settings.tracing_exporter in ("console", "file"):
+        processor = export.SimpleSpanProcessor(exporter or _exporter(settings))
+    else:
+        processor = export.BatchSpanProcessor(_exporter(settings))
+    _provider.add_span_processor(processor)
+    _tracer = _provider.get_tracer(TRACER_NAME)
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _end_commit)
+    event.listen(Session, "after_soft_rollback", _end_commit)
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and go back to the no-op path"""
+    global _tracer, _provider
+    if _tracer is None:
+        return
+    event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.remove(Engine, "handle_error", _handle_error)
+    event.remove(Session, "before_commit", _before_commit)
+    event.remove(Session, "after_commit", _end_commit)
+    event.remove(Session, "after_soft_rollback", _end_commit)
+    _provider.shutdown()
+    _tracer = _provider = None
+
+
+def get_tracer():
+    """The active tracer, or None when tracing is off"""
+    return _tracer
+
+
+def _start_span(name: str, kind=None, attributes: Optional[dict] = None):
+    """Start a span as a child of the current one and make it current"""
+    context, _, trace, *_ = _otel()
+    span = _tracer.start_span(name, kind=kind or trace.SpanKind.INTERNAL, attributes=attributes)
+    token = context.attach(trace.set_span_in_context(span))
+    return span, token
+
+
+def _end_span(span, token, error: Optional[BaseException] = None) -> None:
+    context, _, trace, *_ = _otel()
+    if error is not None:
+        span.record_exception(error)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+    context.detach(token)
+    span.end()
+
+
+def _trace_function(name: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _tracer is None:
+            return func(*args, **kwargs)
+        with _tracer.start_as_current_span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def traced(cls):
+    """Class decorator giving each public static method its own span.
+    
+    Generator methods (streamed exports) are left alone: their span would
+    end before the body is consumed.
+    """
+    for name, attr in list(vars(cls).items()):
+        if (
+            isinstance(attr, staticmethod)
+            and not name.startswith("_")
+            and not inspect.isgeneratorfunction(attr.__func__)
+        ):
+            setattr(cls, name, staticmethod(_trace_function(f"{cls.__name__}.{name}", attr.__func__)))
+    return cls
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _tracer is None or context is None:
+        return
+    trace = _otel()[2]
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    table = _TABLE.search(statement)
+    attributes = {
+        "db.system": conn.dialect.name,
+        "db.operation": operation,
+        "db.statement": statement[:MAX_STATEMENT_LENGTH],
+    }
+    if table:
+        attributes["db.sql.table"] = table.group(1)
+    if executemany:
+        attributes["db.executemany"] = True
+    context._tracing_span = _start_span(
+        f"{operation} {table.group(1)}" if table else operation,
+        kind=trace.SpanKind.CLIENT,
+        attributes=attributes
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_tracing_span", None)
+    if span is not None:
+        context._tracing_span = None
+        _end_span(*span)
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    span = getattr(context, "_tracing_span", None)
+    if span is not None:
+        context._tracing_span = None
+        _end_span(*span, error=exception_context.original_exception)
+
+
+def _before_commit(session):
+    if _tracer is not None and SPAN_KEY not in session.info:
+        session.info[SPAN_KEY] = _start_span("COMMIT")
+
+
+def _end_commit(session, *args):
+    span = session.info.pop(SPAN_KEY, None)
+    if span is not None:
+        _end_span(*span)
+
+
+def _route_template(scope) -> Optional[str]:
+    """Low-cardinality route of a matched request, e.g. ``/api/v1/pacientes/{paciente_id}``"""
+    route = scope.get("route")
+    if route is None:
+        return None
+    # Newer FastAPI releases include routers without copying their routes, so
+    # ``route.path`` lacks the prefix; the matched context has the full path
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(effective, "path", None) or route.path
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request"""
+    
+    def __init__(self, app, exempt_paths=("/health",)):
+        self.app = app
+        self.exempt_paths = set(exempt_paths)
+    
+    async def __call__(self, scope, receive, send):
+        if _tracer is None or scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        
+        context, propagate, trace, *_ = _otel()
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        parent = propagate.extract(carrier)
+        # Named after the route once it is matched (semantic conventions use
+        # the bare method for unmatched requests)
+        span = _tracer.start_span(
+            scope["method"],
+            context=parent,
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        token = context.attach(trace.set_span_in_context(span, parent))
+        
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.set_status(trace.Status(trace.StatusCode.ERROR))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            span.record_exception(exc)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, str(exc)))
+            raise
+        finally:
+            route = _route_template(scope)
+            if route is not None:
+                span.update_name(f"{scope['method']} {route}")
+                span.set_attribute("http.route", route)
+            context.detach(token)
+            span.end()
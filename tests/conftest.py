@@ -1,21 +1,31 @@
+import os
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+
+# The whole suite runs as a single client; admission control is tested separately
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
 from app.main import app
-from app.database import Base, get_db
+from app.database import REQUEST_SESSION_OPTIONS, Base, get_db, get_read_db
+from app.jobs import job_queue
+from app.tenancy import get_tenant_id, set_tenant
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+job_queue.session_factory = TestingSessionLocal
 
 
-def override_get_db():
+def override_get_db(request: Request):
     """Override database dependency for testing"""
     db = None
     try:
-        db = TestingSessionLocal()
+        db = TestingSessionLocal(**REQUEST_SESSION_OPTIONS)
+        set_tenant(db, get_tenant_id(request))
         yield db
     finally:
         if db:
@@ -35,6 +45,7 @@ def client():
     """Create test client"""
     Base.metadata.create_all(bind=engine)
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     Base.metadata.drop_all(bind=engine)
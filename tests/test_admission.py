@@ -0,0 +1,134 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from app.admission import AdmissionControlMiddleware, TokenBucket, get_client_key, parse_networks
+
+
+def build_app(cors=False, **limits):
+    """Build a small app guarded by admission control (inside CORS, as in app.main),
+    trusting the test client as a proxy so requests can pick their address"""
+    app = FastAPI()
+    app.state.release = asyncio.Event()
+    
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+    
+    @app.get("/slow")
+    async def slow():
+        await app.state.release.wait()
+        return {"ok": True}
+    
+    options = dict(
+        rate_per_second=1000, burst=1000, max_in_flight=100, max_in_flight_per_client=100,
+        trusted_proxies=parse_networks("127.0.0.1"),
+    )
+    options.update(limits)
+    app.add_middleware(AdmissionControlMiddleware, **options)
+    if cors:
+        app.add_middleware(CORSMiddleware, allow_origins=["*"], expose_headers=["Retry-After"])
+    return app
+
+
+def address(client_ip):
+    """Headers of a request forwarded for ``client_ip``"""
+    return {"X-Forwarded-For": client_ip}
+
+
+def test_token_bucket():
+    """Test the bucket allows a burst and then refills at the configured rate"""
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.acquire(now) == 0
+    assert bucket.acquire(now) == 0
+    assert bucket.acquire(now) == 0.5
+    assert bucket.acquire(now + 0.5) == 0
+
+
+def test_rate_limit_per_client():
+    """Test clients over their rate get 429 while other clients are unaffected"""
+    async def scenario():
+        app = build_app(rate_per_second=0.1, burst=2)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            codes = [(await client.get("/fast", headers=address("203.0.113.1"))).status_code for _ in range(3)]
+            limited = await client.get("/fast", headers=address("203.0.113.1"))
+            other = await client.get("/fast", headers=address("203.0.113.2"))
+        return codes, limited, other
+    
+    codes, limited, other = asyncio.run(scenario())
+    assert codes == [200, 200, 429]
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert other.status_code == 200
+
+
+def test_rejections_carry_cors_headers():
+    """Test browsers can read a 429 instead of seeing a CORS error"""
+    async def scenario():
+        app = build_app(cors=True, rate_per_second=0.1, burst=1)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Origin": "https://app.example.com"}
+            await client.get("/fast", headers=headers)
+            return await client.get("/fast", headers=headers)
+    
+    limited = asyncio.run(scenario())
+    assert limited.status_code == 429
+    assert limited.headers["Access-Control-Allow-Origin"] == "*"
+    assert "Retry-After" in limited.headers["Access-Control-Expose-Headers"]
+
+
+def test_client_key_behind_trusted_proxy():
+    """Test clients behind the ingress get their own key, spoofed hops aside"""
+    proxies = parse_networks("10.0.0.0/8, 192.168.1.5")
+    
+    def scope(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"client": (peer, 1234), "headers": headers}
+    
+    assert get_client_key(scope("10.0.0.2", "203.0.113.7"), proxies) == "ip:203.0.113.7"
+    # Only the hops appended by trusted proxies are skipped
+    assert get_client_key(scope("10.0.0.2", "1.1.1.1, 203.0.113.7, 192.168.1.5"), proxies) == "ip:203.0.113.7"
+    # Untrusted peers can't pick their key with the header
+    assert get_client_key(scope("198.51.100.1", "203.0.113.7"), proxies) == "ip:198.51.100.1"
+    assert get_client_key(scope("10.0.0.2", "203.0.113.7")) == "ip:10.0.0.2"
+    assert get_client_key(scope("10.0.0.2"), proxies) == "ip:10.0.0.2"
+    # Unverified API keys don't make a new client
+    spoofed = {"client": ("198.51.100.1", 1234), "headers": [(b"x-api-key", b"random")]}
+    assert get_client_key(spoofed, proxies) == "ip:198.51.100.1"
+
+
+def test_in_flight_caps():
+    """Test requests beyond the in-flight caps are shed immediately"""
+    async def scenario():
+        app = build_app(max_in_flight=3, max_in_flight_per_client=1)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = [
+                asyncio.create_task(client.get("/slow", headers=address(client_ip)))
+                for client_ip in ("203.0.113.1", "203.0.113.2")
+            ]
+            await asyncio.sleep(0.05)
+            same_client = await client.get("/fast", headers=address("203.0.113.1"))
+            slow.append(asyncio.create_task(client.get("/slow", headers=address("203.0.113.3"))))
+            await asyncio.sleep(0.05)
+            overloaded = await client.get("/fast", headers=address("203.0.113.4"))
+            app.state.release.set()
+            done = await asyncio.gather(*slow)
+            after = await client.get("/fast", headers=address("203.0.113.4"))
+        return same_client, overloaded, done, after
+    
+    same_client, overloaded, done, after = asyncio.run(scenario())
+    assert same_client.status_code == 429
+    assert overloaded.status_code == 503
+    assert [r.status_code for r in done] == [200, 200, 200]
+    assert after.status_code == 200
+
+
+def test_list_limit_upper_bound(client):
+    """Test list routes reject a limit above the maximum page size"""
+    assert client.get("/api/v1/resultados/?limit=100000").status_code == 422
+    assert client.get("/api/v1/citas/?limit=500").status_code == 200
+    assert client.get("/api/v1/citas/paciente/1?limit=100000").status_code == 422
+    assert client.get("/api/v1/resultados/paciente/1?limit=100000").status_code == 422
@@ -0,0 +1,147 @@
+import json
+from datetime import datetime
+from app.archive import FileArchive
+from app.models.resultado import Resultado
+from app.query_plans import capture_queries
+from app.services.resultado_service import ResultadoService
+from app.services.resumen_service import ResumenDiarioService
+from tests.conftest import TestingSessionLocal, engine
+
+
+def seed(client):
+    """Create a paciente with an old and a recent resultado"""
+    paciente_data = {"nombre": "Archivo", "apellido": "User", "email": "archivo@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    ids = []
+    for fecha in [datetime(2020, 5, 4, 10), datetime(2026, 3, 2, 10)]:
+        ids.append(client.post("/api/v1/resultados/", json={
+            "paciente_id": paciente_id,
+            "tipo_examen": "Hemograma",
+            "fecha_examen": fecha.isoformat(),
+            "resultado": "Normal"
+        }).json()["id"])
+    return paciente_id, ids
+
+
+def archive_before(fecha):
+    db = TestingSessionLocal()
+    try:
+        return ResultadoService.archive(db, fecha, batch_size=1)
+    finally:
+        db.close()
+
+
+def test_archive_and_read_transparently(client):
+    """Test archived resultados leave the hot table but can still be read"""
+    paciente_id, (old_id, recent_id) = seed(client)
+    assert archive_before(datetime(2025, 1, 1)) == 1
+    
+    assert client.get(f"/api/v1/resultados/{old_id}").status_code == 404
+    response = client.get(f"/api/v1/resultados/{old_id}?include_archived=true")
+    assert response.status_code == 200
+    assert response.json()["archivado"] is True
+    
+    hot = client.get(f"/api/v1/resultados/paciente/{paciente_id}").json()
+    assert [r["id"] for r in hot] == [recent_id]
+    both = client.get(f"/api/v1/resultados/paciente/{paciente_id}?include_archived=true").json()
+    assert [(r["id"], r["archivado"]) for r in both] == [(old_id, True), (recent_id, False)]
+    pages = [
+        client.get(f"/api/v1/resultados/paciente/{paciente_id}?include_archived=true&limit=1&skip={skip}").json()
+        for skip in range(2)
+    ]
+    assert [[r["id"] for r in page] for page in pages] == [[old_id], [recent_id]]
+
+
+def test_archiving_skips_mediciones(client):
+    """Test archive batches don't load the resultados' mediciones"""
+    seed(client)
+    with capture_queries(engine) as queries:
+        assert archive_before(datetime(2025, 1, 1)) == 1
+    assert not any("FROM mediciones" in query.statement for query in queries)
+
+
+def test_archived_resultados_stay_counted(client):
+    """Test the daily summary keeps archived resultados, also after a refresh"""
+    seed(client)
+    archive_before(datetime(2025, 1, 1))
+    db = TestingSessionLocal()
+    try:
+        with capture_queries(engine) as queries:
+            ResumenDiarioService.refresh(db)
+    finally:
+        db.close()
+    # Counted with GROUP BY, not by loading the archived rows
+    archive_queries = [query.statement for query in queries if "FROM resultados_archivo" in query.statement]
+    assert archive_queries and all("GROUP BY" in statement for statement in archive_queries)
+    response = client.get("/api/v1/estadisticas/resultados/tipo-examen?desde=2020-01-01T00:00:00")
+    assert response.json() == [{"clave": "Hemograma", "total": 2}]
+
+
+def test_live_statistics_count_archive(client):
+    """Test statistics computed in SQL count archived resultados like the summary"""
+    paciente_id, _ = seed(client)
+    archive_before(datetime(2025, 1, 1))
+    # Off midnight, so the count runs on the tables instead of resumen_diario
+    response = client.get("/api/v1/estadisticas/resultados/tipo-examen?desde=2020-01-01T00:00:01")
+    assert response.json() == [{"clave": "Hemograma", "total": 2}]
+    response = client.get(f"/api/v1/estadisticas/pacientes/{paciente_id}")
+    assert response.json()["resultados_por_tipo_examen"] == [{"clave": "Hemograma", "total": 2}]
+
+
+def test_delete_paciente_removes_archive(client):
+    """Test deleting a paciente also deletes its archived resultados"""
+    paciente_id, (old_id, _) = seed(client)
+    archive_before(datetime(2025, 1, 1))
+    assert client.delete(f"/api/v1/pacientes/{paciente_id}").status_code == 204
+    assert client.get(f"/api/v1/resultados/{old_id}?include_archived=true").status_code == 404
+
+
+def test_file_archive_roundtrip(db, tmp_path):
+    """Test the gzip files backend stores, finds and deletes resultados"""
+    archive = FileArchive(str(tmp_path))
+    rows = [
+        Resultado(id=1, tenant_id="default", paciente_id=7, tipo_examen="Hemograma",
+                  fecha_examen=datetime(2020, 5, 4), resultado="Normal"),
+        Resultado(id=2, tenant_id="default", paciente_id=8, tipo_examen="Rayos X",
+                  fecha_examen=datetime(2020, 6, 1), resultado="Normal"),
+    ]
+    archive.store(db, rows)
+    archive.store(db, rows[:1])  # a retried batch must not duplicate rows
+    
+    assert (tmp_path / "default" / "resultados-202005.jsonl.gz").exists()
+    assert [r.id for r in archive.find(db)] == [1, 2]
+    assert [r.id for r in archive.find(db, desde=datetime(2020, 6, 1))] == [2]
+    assert archive.find(db, resultado_id=2)[0].tipo_examen == "Rayos X"
+    
+    archive.delete_paciente(db, 7)
+    assert [r.id for r in archive.find(db)] == [2]
+    
+    assert archive.daily_counts(db, lambda value: value.date()) == {
+        ("default", datetime(2020, 6, 1).date(), "Rayos X"): 1
+    }
+
+
+def test_file_archive_paciente_index(db, tmp_path):
+    """Test per-paciente reads and deletes only open the paciente's files"""
+    archive = FileArchive(str(tmp_path))
+    archive.store(db, [
+        Resultado(id=1, tenant_id="default", paciente_id=7, tipo_examen="Hemograma",
+                  fecha_examen=datetime(2020, 5, 4), resultado="Normal"),
+        Resultado(id=2, tenant_id="default", paciente_id=8, tipo_examen="Rayos X",
+                  fecha_examen=datetime(2020, 6, 1), resultado="Normal"),
+    ])
+    index = tmp_path / "default" / "pacientes.json"
+    assert json.loads(index.read_text()) == {"7": ["202005"], "8": ["202006"]}
+    
+    # Archives written before the index are indexed on first use
+    index.unlink()
+    assert [r.id for r in archive.find(db, paciente_id=8)] == [2]
+    assert index.exists()
+    
+    untouched = tmp_path / "default" / "resultados-202006.jsonl.gz"
+    modified = untouched.stat().st_mtime_ns
+    archive.delete_paciente(db, 7)
+    assert not (tmp_path / "default" / "resultados-202005.jsonl.gz").exists()
+    assert untouched.stat().st_mtime_ns == modified
+    assert json.loads(index.read_text()) == {"8": ["202006"]}
+    assert archive.find(db, paciente_id=7) == []
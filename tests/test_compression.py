@@ -0,0 +1,60 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import text
+from app.compression import ZLIB_MARKER, ZSTD_MARKER, CompressedText, compress_text, decompress_text
+from app.config import get_settings
+
+LARGE = "Hemoglobina: 13.5 g/dL (ref 12-16)\n" * 400
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "compression_min_bytes", 1024)
+    monkeypatch.setattr(settings, "compression_algorithm", "zlib")
+    return settings
+
+
+def test_threshold_and_roundtrip(settings):
+    """Test only large values are compressed and they read back unchanged"""
+    column = CompressedText()
+    assert column.process_bind_param("Normal", None) == "Normal"
+    stored = column.process_bind_param(LARGE, None)
+    assert stored.startswith(ZLIB_MARKER) and len(stored) < len(LARGE) / 10
+    assert column.process_result_value(stored, None) == LARGE
+
+
+def test_zstd_roundtrip():
+    """Test zstd values decode when the optional package is installed"""
+    pytest.importorskip("zstandard")
+    stored = compress_text(LARGE, "zstd")
+    assert stored.startswith(ZSTD_MARKER)
+    assert decompress_text(stored) == LARGE
+
+
+def test_marker_like_text_is_escaped(settings):
+    """Test short text starting with the marker byte survives a roundtrip"""
+    column = CompressedText()
+    value = ZLIB_MARKER + "not compressed"
+    assert column.process_result_value(column.process_bind_param(value, None), None) == value
+
+
+def test_resultado_stored_compressed(client, db, settings):
+    """Test a large resultado is compressed at rest and existing plain rows still read"""
+    paciente_data = {"nombre": "Zip", "apellido": "User", "email": "zip@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    resultado_data = {
+        "paciente_id": paciente_id,
+        "tipo_examen": "Panel",
+        "fecha_examen": datetime.now().isoformat(),
+        "resultado": LARGE,
+    }
+    resultado_id = client.post("/api/v1/resultados/", json=resultado_data).json()["id"]
+    
+    stored = db.execute(text("SELECT resultado FROM resultados WHERE id = :id"), {"id": resultado_id}).scalar()
+    assert stored.startswith(ZLIB_MARKER)
+    assert client.get(f"/api/v1/resultados/{resultado_id}").json()["resultado"] == LARGE
+    
+    db.execute(text("UPDATE resultados SET resultado = :plain WHERE id = :id"), {"plain": LARGE, "id": resultado_id})
+    db.commit()
+    assert client.get(f"/api/v1/resultados/{resultado_id}").json()["resultado"] == LARGE
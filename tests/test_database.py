@@ -0,0 +1,120 @@
+import time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app import database
+from app.database import (
+    LAST_WRITE_HEADER, REQUEST_SESSION_OPTIONS, ReadYourWritesMiddleware, ReplicaRouter, connect_args,
+    last_write, read_only
+)
+from app.schemas.paciente import PacienteCreate
+from app.services.paciente_service import PacienteService
+from tests.conftest import TestingSessionLocal, engine
+
+
+def make_router(replicas=2, sticky_seconds=60.0):
+    """Build a router over in-memory SQLite engines"""
+    primary = create_engine("sqlite://")
+    replica_engines = [create_engine("sqlite://") for _ in range(replicas)]
+    router = ReplicaRouter(primary, replica_engines, sticky_seconds, retry_seconds=60.0)
+    return router, primary, replica_engines
+
+
+def test_reads_round_robin_over_replicas():
+    """Test reads alternate between replicas"""
+    router, primary, replicas = make_router()
+    picked = [router.engine_for_read() for _ in range(4)]
+    assert picked == replicas + replicas
+
+
+def test_reads_without_replicas_use_primary():
+    """Test the primary serves reads when no replica is configured"""
+    router, primary, _ = make_router(replicas=0)
+    assert router.engine_for_read() is primary
+
+
+def test_read_your_writes_stickiness():
+    """Test a client that just wrote reads from the primary"""
+    router, primary, replicas = make_router()
+    assert router.engine_for_read(time.time()) is primary
+    assert router.engine_for_read(time.time() - 120) in replicas
+    assert router.engine_for_read(None) in replicas
+
+
+def test_write_stamp_travels_with_the_client():
+    """Test writes are stamped in a header and cookie that later reads carry"""
+    app = FastAPI()
+    
+    @app.post("/items", status_code=201)
+    def create_item():
+        return {}
+    
+    @app.post("/fails")
+    def fail():
+        raise HTTPException(status_code=400)
+    
+    @app.get("/items")
+    def read_item(request: Request):
+        return {"last_write": last_write(request)}
+    
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=5)
+    client = TestClient(app)
+    assert client.get("/items").json() == {"last_write": None}
+    response = client.post("/items")
+    stamp = float(response.headers[LAST_WRITE_HEADER])
+    assert abs(stamp - time.time()) < 5
+    assert "Max-Age=5" in response.headers["set-cookie"]
+    # The cookie comes back on the next read, as it would to another pod
+    assert client.get("/items").json() == {"last_write": stamp}
+    assert client.get("/items", headers={LAST_WRITE_HEADER: "12.5"}).json() == {"last_write": 12.5}
+    assert LAST_WRITE_HEADER not in client.post("/fails").headers
+    assert LAST_WRITE_HEADER not in client.get("/items").headers
+
+
+def test_failed_replica_falls_back_to_primary(tmp_path, monkeypatch):
+    """Test a read on an unreachable replica is retried on the primary"""
+    primary = create_engine("sqlite://")
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReplicaRouter(primary, [broken], sticky_seconds=5, retry_seconds=60)
+    monkeypatch.setattr(database, "replica_router", router)
+    session = Session(bind=broken)
+    session.info["replica"] = True
+    assert session.execute(text("SELECT 1")).scalar() == 1
+    assert session.bind is primary
+    assert router.engine_for_read() is primary
+    session.close()
+
+
+def test_unhealthy_replicas_are_skipped():
+    """Test failed replicas are skipped and the primary is the last resort"""
+    router, primary, replicas = make_router()
+    router.mark_unhealthy(replicas[0])
+    assert [router.engine_for_read() for _ in range(2)] == [replicas[1], replicas[1]]
+    router.mark_unhealthy(replicas[1])
+    assert router.engine_for_read() is primary
+
+
+def test_request_session_releases_connection_before_serialization(db):
+    """Test request sessions hold no connection once the service call returns"""
+    session = TestingSessionLocal(**REQUEST_SESSION_OPTIONS)
+    paciente = PacienteService.create(
+        session, PacienteCreate(nombre="Pool", apellido="User", email="pool@example.com")
+    )
+    assert paciente.created_at is not None
+    assert engine.pool.checkedout() == 0
+    
+    with read_only(session):
+        loaded = PacienteService.get_by_id(session, paciente.id)
+        assert engine.pool.checkedout() == 1
+    assert engine.pool.checkedout() == 0
+    assert loaded.email == "pool@example.com"
+    assert engine.pool.checkedout() == 0
+    session.close()
+
+
+def test_prepared_statements_only_for_psycopg3():
+    """Test server-side prepares are configured only where the driver supports them"""
+    assert connect_args("postgresql+psycopg://u:p@db/vital") == {"prepare_threshold": 5}
+    assert connect_args("postgresql://u:p@db/vital") == {}
+    assert connect_args("sqlite:///./test.db") == {}
@@ -0,0 +1,165 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from app.cache import TTLCache
+from app.services.estadistica_service import _summary_range
+
+
+def seed(client):
+    """Create a paciente with some citas and resultados"""
+    paciente_data = {"nombre": "Stats", "apellido": "User", "email": "stats@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    for fecha, estado in [
+        ("2026-03-02T09:00:00", "programada"),
+        ("2026-03-02T11:00:00", "completada"),
+        ("2026-03-04T10:00:00", "completada"),
+        ("2026-03-10T10:00:00", "cancelada"),
+    ]:
+        client.post("/api/v1/citas/", json={
+            "paciente_id": paciente_id, "fecha_hora": fecha, "motivo": "Control", "estado": estado
+        })
+    for tipo in ["Hemograma", "Hemograma", "Rayos X"]:
+        client.post("/api/v1/resultados/", json={
+            "paciente_id": paciente_id,
+            "tipo_examen": tipo,
+            "fecha_examen": datetime(2026, 3, 2).isoformat(),
+            "resultado": "Normal"
+        })
+    return paciente_id
+
+
+def test_citas_por_estado(client):
+    """Test counting citas by estado"""
+    seed(client)
+    response = client.get("/api/v1/estadisticas/citas/estado")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"clave": "cancelada", "total": 1},
+        {"clave": "completada", "total": 2},
+        {"clave": "programada", "total": 1},
+    ]
+
+
+def test_citas_por_periodo(client):
+    """Test counting citas per day and per week"""
+    seed(client)
+    by_day = client.get("/api/v1/estadisticas/citas/periodo?period=day").json()
+    assert by_day == [
+        {"clave": "2026-03-02", "total": 2},
+        {"clave": "2026-03-04", "total": 1},
+        {"clave": "2026-03-10", "total": 1},
+    ]
+    by_week = client.get("/api/v1/estadisticas/citas/periodo?period=week").json()
+    assert by_week == [
+        {"clave": "2026-03-02", "total": 3},
+        {"clave": "2026-03-09", "total": 1},
+    ]
+    assert client.get("/api/v1/estadisticas/citas/periodo?period=year").status_code == 422
+
+
+def test_estadisticas_paciente(client):
+    """Test per-paciente statistics"""
+    paciente_id = seed(client)
+    response = client.get(f"/api/v1/estadisticas/pacientes/{paciente_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resultados_por_tipo_examen"] == [
+        {"clave": "Hemograma", "total": 2},
+        {"clave": "Rayos X", "total": 1},
+    ]
+    assert sum(c["total"] for c in data["citas_por_estado"]) == 4
+    assert client.get("/api/v1/estadisticas/pacientes/9999").status_code == 404
+
+
+def test_ttl_cache():
+    """Test the TTL cache stores values and can be disabled"""
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("k", [1])
+    assert cache.get("k") == [1]
+    disabled = TTLCache(ttl_seconds=0)
+    disabled.set("k", [1])
+    assert disabled.get("k") is None
+
+
+def test_resumen_diario_tracks_writes(client, db):
+    """Test the daily summary follows creates, updates and deletes"""
+    from app.models.resumen_diario import ResumenDiario
+    from app.services.resumen_service import ResumenDiarioService
+    
+    paciente_id = seed(client)
+    citas = client.get(f"/api/v1/citas/paciente/{paciente_id}").json()
+    client.put(f"/api/v1/citas/{citas[0]['id']}", json={"estado": "cancelada"})
+    client.delete(f"/api/v1/citas/{citas[1]['id']}")
+    
+    expected = [{"clave": "cancelada", "total": 2}, {"clave": "completada", "total": 1}]
+    assert client.get("/api/v1/estadisticas/citas/estado").json() == expected
+    # Whole days are served from the summary, other bounds from the base table
+    since_day = client.get("/api/v1/estadisticas/citas/estado?desde=2026-03-03T00:00:00").json()
+    since_noon = client.get("/api/v1/estadisticas/citas/estado?desde=2026-03-03T12:00:00").json()
+    assert since_day == since_noon == [
+        {"clave": "cancelada", "total": 1},
+        {"clave": "completada", "total": 1},
+    ]
+    
+    live = sorted(
+        (r.recurso, r.fecha, r.clave, r.total)
+        for r in db.query(ResumenDiario).filter(ResumenDiario.total != 0)
+    )
+    ResumenDiarioService.refresh(db)
+    rebuilt = sorted((r.recurso, r.fecha, r.clave, r.total) for r in db.query(ResumenDiario))
+    assert live == rebuilt
+    
+    client.delete(f"/api/v1/pacientes/{paciente_id}")
+    db.expire_all()
+    assert client.get("/api/v1/estadisticas/citas/estado").json() == []
+    assert client.get("/api/v1/estadisticas/resultados/tipo-examen").json() == []
+
+
+def test_refresh_job_uses_utc_days(db, monkeypatch):
+    """Test the periodic refresh window starts on a UTC day, like the summary rows"""
+    from app.services import resumen_service
+    
+    calls = []
+    monkeypatch.setattr(resumen_service, "utcnow", lambda: datetime(2026, 3, 10, 23, 30, tzinfo=timezone.utc))
+    monkeypatch.setattr(
+        resumen_service.ResumenDiarioService, "refresh", lambda db, desde: calls.append(desde)
+    )
+    resumen_service.refresh_resumen_job(db, dias=7)
+    assert calls == [date(2026, 3, 3)]
+
+
+def test_summary_range_uses_utc_days():
+    """Test bounds with an offset pick the UTC day, or skip the summary off UTC midnight"""
+    plus_two = timezone(timedelta(hours=2))
+    assert _summary_range(datetime(2026, 3, 2, 2, tzinfo=plus_two), None, None) == (date(2026, 3, 2), None)
+    assert _summary_range(datetime(2026, 3, 2, tzinfo=plus_two), None, None) is None
+    assert _summary_range(None, datetime(2026, 3, 3), None) == (None, date(2026, 3, 3))
+
+
+def test_tendencia_paciente(client):
+    """Test the trend of an analito with rolling stats, deltas and range flags"""
+    paciente_data = {"nombre": "Trend", "apellido": "User", "email": "trend@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    for day, glucosa in [(1, 90), (2, 110), (3, 100), (4, 120)]:
+        client.post("/api/v1/resultados/", json={
+            "paciente_id": paciente_id,
+            "tipo_examen": "Glucemia",
+            "fecha_examen": datetime(2026, 3, day).isoformat(),
+            "resultado": "Ver mediciones",
+            "mediciones": [{"analito": "Glucosa", "valor": glucosa, "unidad": "mg/dL",
+                            "rango_min": 70, "rango_max": 105}],
+        })
+    
+    response = client.get(f"/api/v1/estadisticas/pacientes/{paciente_id}/tendencia?analito=Glucosa&ventana=2")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["valores"] == [90, 110, 100, 120]
+    assert data["media_movil"] == [90, 100, 105, 110]
+    assert data["desviacion_movil"] == [0, 10, 5, 10]
+    assert data["delta"] == [None, 20, -10, 20]
+    assert data["fuera_de_rango"] == [False, True, False, True]
+    assert data["unidad"] == "mg/dL"
+    assert data["pendiente_por_dia"] == pytest.approx(8.0)
+    
+    empty = client.get(f"/api/v1/estadisticas/pacientes/{paciente_id}/tendencia?analito=Sodio").json()
+    assert empty["total"] == 0 and empty["valores"] == []
+    assert client.get("/api/v1/estadisticas/pacientes/999/tendencia?analito=Glucosa").status_code == 404
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import create_engine, insert
+from app.change_feed import ChangeFeed, sse_stream
+from app.database import backfill_updated_at
+from app.invalidation import ALL, PostgresInvalidationBus
+from app.models.paciente import Paciente
+from tests.conftest import engine
+
+
+def test_list_updated_since(client):
+    """Test updated_since returns only changed citas, oldest change first"""
+    paciente_data = {"nombre": "Feed", "apellido": "User", "email": "feed@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": datetime.now().isoformat(), "motivo": "A"}
+    first = client.post("/api/v1/citas/", json=cita_data).json()
+    second = client.post("/api/v1/citas/", json={**cita_data, "motivo": "B"}).json()
+    client.put(f"/api/v1/citas/{first['id']}", json={"estado": "confirmada"})
+    
+    response = client.get(f"/api/v1/citas/?updated_since={second['updated_at']}")
+    assert response.status_code == 200
+    assert [cita["id"] for cita in response.json()] == [second["id"], first["id"]]
+
+
+def test_rows_without_updated_at_are_backfilled(client):
+    """Test rows written before updated_at was set on insert reach updated_since readers"""
+    with engine.begin() as conn:
+        conn.execute(insert(Paciente.__table__), {
+            "tenant_id": "default", "nombre": "Legacy", "apellido": "Row", "email": "legacy@example.com",
+            "created_at": datetime(2024, 1, 2, tzinfo=timezone.utc), "updated_at": None,
+        })
+    assert client.get("/api/v1/pacientes/?updated_since=2020-01-01T00:00:00Z").json() == []
+    
+    backfill_updated_at(engine)
+    listed = client.get("/api/v1/pacientes/?updated_since=2020-01-01T00:00:00Z").json()
+    assert [paciente["email"] for paciente in listed] == ["legacy@example.com"]
+    assert listed[0]["updated_at"].startswith("2024-01-02")
+
+
+def test_change_feed_delivers_events_across_threads():
+    """Test events published from worker threads reach matching subscribers"""
+    async def scenario():
+        feed = ChangeFeed()
+        citas = feed.subscribe(["citas"])
+        pacientes = feed.subscribe(["pacientes"])
+        publisher = threading.Thread(
+            target=feed.publish, args=("citas", "created", 7, lambda: {"motivo": "Control"})
+        )
+        publisher.start()
+        publisher.join()
+        event = await asyncio.wait_for(citas.queue.get(), 1)
+        return event, pacientes.queue.qsize()
+    
+    event, other = asyncio.run(scenario())
+    assert event["event"] == "citas.created"
+    assert event["data"] == {"id": 7, "motivo": "Control"}
+    assert other == 0
+
+
+def test_slow_subscriber_gets_reset():
+    """Test an overflowing subscriber is told to resync and the stream ends"""
+    async def scenario():
+        feed = ChangeFeed(queue_size=2)
+        subscription = feed.subscribe(["citas"])
+        for cita_id in range(5):
+            feed.publish("citas", "updated", cita_id)
+        await asyncio.sleep(0)
+        
+        async def connected():
+            return False
+        
+        frames = [frame async for frame in sse_stream(feed, subscription, connected, 1)]
+        return frames, feed.has_subscribers
+    
+    frames, has_subscribers = asyncio.run(scenario())
+    assert frames[0].startswith("retry:")
+    assert "event: citas.updated" in frames[1]
+    assert "event: reset" in frames[-1]
+    assert not has_subscribers
+
+
+def test_change_feed_crosses_pods():
+    """Test events reach subscribers on other pods through the bus, and a
+    bus reconnect resets them"""
+    async def scenario():
+        sent = []
+        writer_bus = PostgresInvalidationBus(create_engine("sqlite://"))
+        writer_bus._notify = sent.append
+        writer = ChangeFeed(bus=writer_bus)
+        reader_bus = PostgresInvalidationBus(create_engine("sqlite://"))
+        reader = ChangeFeed(bus=reader_bus)
+        subscription = reader.subscribe(["citas"], "clinica-a")
+        
+        # Nobody listens on the writer's pod, the payload is built anyway
+        writer.publish("citas", "created", 7, lambda: {"motivo": "Control"}, tenant_id="clinica-a")
+        writer.publish("citas", "created", 8, lambda: {"motivo": "x" * 10000}, tenant_id="clinica-a")
+        writer.publish("citas", "created", 9, tenant_id="clinica-b")
+        for message in sent:
+            reader_bus._handle(json.dumps(message))
+        reader_bus._deliver(ALL, None)
+        await asyncio.sleep(0)
+        return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+    
+    events = asyncio.run(scenario())
+    assert [(event["event"], event["data"]) for event in events] == [
+        ("citas.created", {"id": 7, "motivo": "Control"}),
+        ("citas.created", {"id": 8}),
+        ("reset", {}),
+    ]
+
+
+def test_stream_rejects_unknown_resources(client):
+    """Test the SSE endpoint validates requested resources"""
+    response = client.get("/api/v1/eventos/stream?resources=citas,facturas")
+    assert response.status_code == 422
@@ -0,0 +1,102 @@
+import io
+import pytest
+from datetime import datetime
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def seed(client):
+    """Create two pacientes with resultados of two exam types"""
+    ids = []
+    for email, nacimiento in [("old@example.com", "1950-01-01"), ("young@example.com", "1995-06-01")]:
+        paciente_data = {"nombre": "Cohort", "apellido": "User", "email": email, "fecha_nacimiento": nacimiento}
+        paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+        for tipo in ["Hemograma", "Rayos X", "Hemograma"]:
+            ids.append(client.post("/api/v1/resultados/", json={
+                "paciente_id": paciente_id,
+                "tipo_examen": tipo,
+                "fecha_examen": datetime(2026, 3, 2, 10).isoformat(),
+                "resultado": f"Informe {tipo}"
+            }).json()["id"])
+    return ids
+
+
+def test_export_parquet_in_row_groups(client, monkeypatch):
+    """Test a filtered Parquet export is streamed in row groups"""
+    from app.routers import exportaciones
+    monkeypatch.setattr(exportaciones.settings, "export_batch_size", 1)
+    seed(client)
+    
+    response = client.get("/api/v1/exportaciones/resultados?tipo_examen=Hemograma")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_row_groups == 4
+    table = parquet.read()
+    assert table.column("tipo_examen").to_pylist() == ["Hemograma"] * 4
+    assert table.column("resultado").to_pylist()[0] == "Informe Hemograma"
+
+
+def test_export_arrow_with_paciente_filter(client):
+    """Test the Arrow IPC export filtered by paciente birth date, without texts"""
+    seed(client)
+    response = client.get(
+        "/api/v1/exportaciones/resultados?formato=arrow&nacido_desde=1990-01-01&incluir_texto=false"
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 3
+    assert "resultado" not in table.column_names
+    assert len(set(table.column("paciente_id").to_pylist())) == 1
+
+
+def test_export_is_tenant_scoped(client):
+    """Test another clinic's export is empty"""
+    seed(client)
+    response = client.get("/api/v1/exportaciones/resultados", headers={"X-Tenant-ID": "otra"})
+    assert pq.read_table(io.BytesIO(response.content)).num_rows == 0
+
+
+def archive_march(client, seeded):
+    """Archive every seeded resultado of the first paciente"""
+    from app.services.resultado_service import ResultadoService
+    from tests.conftest import TestingSessionLocal
+    for resultado_id in seeded[:3]:
+        client.put(f"/api/v1/resultados/{resultado_id}", json={"fecha_examen": datetime(2020, 3, 2, 10).isoformat()})
+    db = TestingSessionLocal()
+    try:
+        assert ResultadoService.archive(db, datetime(2025, 1, 1)) == 3
+    finally:
+        db.close()
+
+
+def test_export_includes_archived_resultados(client):
+    """Test resultados moved to the archive table are still exported, in id order"""
+    seeded = seed(client)
+    archive_march(client, seeded)
+    
+    table = pq.read_table(io.BytesIO(client.get("/api/v1/exportaciones/resultados").content))
+    assert table.column("resultado_id").to_pylist() == seeded
+    assert table.column("resultado").to_pylist()[0] == "Informe Hemograma"
+    response = client.get("/api/v1/exportaciones/resultados", headers={"X-Tenant-ID": "otra"})
+    assert pq.read_table(io.BytesIO(response.content)).num_rows == 0
+
+
+def test_export_includes_file_archive(client, monkeypatch, tmp_path):
+    """Test resultados archived to files follow the hot rows, with the export filters applied"""
+    from app.archive import FileArchive
+    from app.services import exportacion_service, resultado_service
+    archive = FileArchive(str(tmp_path))
+    monkeypatch.setattr(resultado_service, "get_archive", lambda: archive)
+    monkeypatch.setattr(exportacion_service, "get_archive", lambda: archive)
+    seeded = seed(client)
+    archive_march(client, seeded)
+    
+    table = pq.read_table(io.BytesIO(client.get("/api/v1/exportaciones/resultados").content))
+    assert table.column("resultado_id").to_pylist() == seeded[3:] + seeded[:3]
+    response = client.get(
+        "/api/v1/exportaciones/resultados?formato=arrow&tipo_examen=Hemograma&nacido_hasta=1960-01-01"
+    )
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("resultado_id").to_pylist() == [seeded[0], seeded[2]]
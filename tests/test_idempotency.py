@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from app.database import as_utc, utcnow
+from app.idempotency import InMemoryIdempotencyStore
+from app.services.idempotency_service import IdempotencyService
+
+
+def create_paciente(client, email):
+    """Create a paciente and return its id"""
+    paciente_data = {"nombre": "Idem", "apellido": "Potente", "email": email}
+    return client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+
+
+def test_create_cita_replay(client):
+    """Test retrying a cita with the same Idempotency-Key replays the response"""
+    paciente_id = create_paciente(client, "idem.cita@example.com")
+    cita_data = {
+        "paciente_id": paciente_id,
+        "fecha_hora": (datetime.now() + timedelta(days=1)).isoformat(),
+        "motivo": "Consulta"
+    }
+    headers = {"Idempotency-Key": "cita-123"}
+    first = client.post("/api/v1/citas/", json=cita_data, headers=headers)
+    second = client.post("/api/v1/citas/", json=cita_data, headers=headers)
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    
+    citas = client.get(f"/api/v1/citas/paciente/{paciente_id}").json()
+    assert len(citas) == 1
+
+
+def test_create_resultado_key_reused_with_different_body(client):
+    """Test reusing an Idempotency-Key with another body is rejected"""
+    paciente_id = create_paciente(client, "idem.resultado@example.com")
+    resultado_data = {
+        "paciente_id": paciente_id,
+        "tipo_examen": "Hemograma",
+        "fecha_examen": datetime.now().isoformat(),
+        "resultado": "Normal"
+    }
+    headers = {"Idempotency-Key": "resultado-1"}
+    assert client.post("/api/v1/resultados/", json=resultado_data, headers=headers).status_code == 201
+    
+    resultado_data["resultado"] = "Alterado"
+    response = client.post("/api/v1/resultados/", json=resultado_data, headers=headers)
+    assert response.status_code == 422
+
+
+def test_failed_create_releases_key(client):
+    """Test a failed create doesn't cache the error for the key"""
+    cita_data = {
+        "paciente_id": 9999,
+        "fecha_hora": datetime.now().isoformat(),
+        "motivo": "Sin paciente"
+    }
+    headers = {"Idempotency-Key": "cita-missing-paciente"}
+    assert client.post("/api/v1/citas/", json=cita_data, headers=headers).status_code == 404
+    
+    cita_data["paciente_id"] = create_paciente(client, "idem.retry@example.com")
+    response = client.post("/api/v1/citas/", json=cita_data, headers=headers)
+    assert response.status_code == 201
+
+
+def test_in_memory_store():
+    """Test the in-memory store reserves, completes and expires keys"""
+    store = InMemoryIdempotencyStore()
+    assert store.reserve(None, "citas", "k", "hash", lease_seconds=60) is None
+    assert store.reserve(None, "citas", "k", "hash", lease_seconds=60).status_code is None
+    store.complete(None, "citas", "k", 201, '{"id": 1}', ttl_seconds=60)
+    assert store.get(None, "citas", "k").response_body == '{"id": 1}'
+    
+    assert store.reserve(None, "citas", "expired", "hash", lease_seconds=0) is None
+    assert store.purge_expired(None) == 1
+    assert store.get(None, "citas", "expired") is None
+
+
+def test_abandoned_reservation_is_taken_over(db):
+    """Test a key held by a dead worker frees up after its lease, and only then"""
+    IdempotencyService.reserve(db, "citas", "k", "hash", lease_seconds=60)
+    assert IdempotencyService.reserve(db, "citas", "k", "hash", lease_seconds=60).status_code is None
+    
+    IdempotencyService.reserve(db, "citas", "dead", "hash", lease_seconds=0)
+    assert IdempotencyService.reserve(db, "citas", "dead", "hash", lease_seconds=60) is None
+    
+    # Completing keeps the response for the full TTL
+    IdempotencyService.complete(db, "citas", "dead", 201, '{"id": 1}', ttl_seconds=3600)
+    record = IdempotencyService.get(db, "citas", "dead")
+    assert record.status_code == 201
+    assert as_utc(record.expires_at) > utcnow() + timedelta(minutes=59)
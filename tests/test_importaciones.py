@@ -0,0 +1,125 @@
+import json
+import sqlite3
+from sqlalchemy import insert
+from app.config import get_settings
+from app.import_pacientes import main as import_cli
+from app.models.paciente import Paciente
+from app.services import importacion_service
+
+CSV = (
+    "nombre,apellido,email,telefono,fecha_nacimiento\n"
+    "Ana,Ruiz,ana@example.com,555-1,1980-02-03\n"
+    "Luis,Mora,not-an-email,,\n"
+    "Eva,Sanz,eva@example.com,,\n"
+    "Ana,Ruiz,ANA@example.com,,\n"
+    "Sol,Vega,registered@example.com,,\n"
+)
+
+
+def test_import_csv(client):
+    """Test a CSV import skips duplicates and reports invalid rows"""
+    client.post("/api/v1/pacientes/", json={"nombre": "R", "apellido": "R", "email": "Registered@example.com"})
+    response = client.post(
+        "/api/v1/importaciones/pacientes", content=CSV, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["filas"] == 5
+    assert report["importados"] == 2
+    assert report["duplicados"] == 2
+    assert report["rechazados"] == 1
+    assert report["rechazos"][0]["linea"] == 3
+    
+    pacientes = {p["email"]: p for p in client.get("/api/v1/pacientes/").json()}
+    assert set(pacientes) == {"Registered@example.com", "ana@example.com", "eva@example.com"}
+    assert pacientes["ana@example.com"]["fecha_nacimiento"] == "1980-02-03"
+
+
+def test_import_ndjson_in_batches(client, monkeypatch):
+    """Test NDJSON rows spanning several batches, duplicates across batches included"""
+    monkeypatch.setattr(get_settings(), "import_batch_size", 3)
+    lines = [json.dumps({"nombre": "N", "apellido": str(i), "email": f"n{i % 7}@example.com"}) for i in range(10)]
+    body = "\n".join(lines + ["{not json"]) + "\n"
+    response = client.post(
+        "/api/v1/importaciones/pacientes?formato=ndjson",
+        content=body,
+        headers={"X-Tenant-ID": "clinica-a"}
+    )
+    report = response.json()
+    assert (report["importados"], report["duplicados"], report["rechazados"]) == (7, 3, 1)
+    assert len(client.get("/api/v1/pacientes/", headers={"X-Tenant-ID": "clinica-a"}).json()) == 7
+    assert client.get("/api/v1/pacientes/").json() == []
+
+
+def test_import_requires_a_format(client):
+    """Test an import with an unknown content type is rejected"""
+    response = client.post("/api/v1/importaciones/pacientes", content="x", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_import_cli(db, tmp_path, monkeypatch, capsys):
+    """Test the command-line import"""
+    from tests.conftest import TestingSessionLocal
+    monkeypatch.setattr("app.import_pacientes.SessionLocal", TestingSessionLocal)
+    path = tmp_path / "pacientes.csv"
+    path.write_text(CSV, encoding="utf-8")
+    
+    assert import_cli([str(path), "--batch-size", "2", "--tenant", "clinica-b"]) == 1
+    assert "Imported 3 of 5 rows" in capsys.readouterr().out
+    assert db.query(Paciente).filter(Paciente.tenant_id == "clinica-b").count() == 3
+
+
+def test_normalize_email_matches_email_str():
+    """Test the cached email check agrees with EmailStr"""
+    from pydantic.networks import validate_email
+    from pydantic_core import PydanticCustomError
+    from app.services.importacion_service import normalize_email
+    
+    for email in ["Foo.Bar@Example.COM", "a+b@sub.example.org", "x@bücher.de"]:
+        assert normalize_email(email) == validate_email(email)[1]
+    for email in ["a..b@x.com", "a@-x.com", "no-at", "a@b@c.com"]:
+        try:
+            normalize_email(email)
+        except PydanticCustomError:
+            continue
+        raise AssertionError(f"{email} was accepted")
+
+
+def test_copy_unique_violation_is_retried(client, monkeypatch):
+    """Test a unique violation raised by COPY's raw cursor takes the retry path"""
+    calls = []
+    
+    def copy(db, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            # What a concurrent sign-up makes psycopg2 raise
+            client.post("/api/v1/pacientes/", json={"nombre": "C", "apellido": "C", "email": "eva@example.com"})
+            raise sqlite3.IntegrityError("duplicate key value violates unique constraint")
+        db.execute(insert(Paciente.__table__), rows)
+    
+    monkeypatch.setattr(importacion_service, "_uses_copy", lambda bind: True)
+    monkeypatch.setattr(importacion_service, "_copy", copy)
+    response = client.post(
+        "/api/v1/importaciones/pacientes", content=CSV, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert calls == [3, 2]
+    assert (report["importados"], report["duplicados"]) == (2, 2)
+
+
+def test_import_publishes_one_event(client, monkeypatch):
+    """Test an import sends one change feed event whose updated_since lists the imported rows"""
+    events = []
+    monkeypatch.setattr(
+        importacion_service.change_feed, "publish",
+        lambda resource, action, record_id, data=None, tenant_id=None: events.append(
+            (resource, action, tenant_id, data())
+        )
+    )
+    client.post("/api/v1/importaciones/pacientes", content=CSV, headers={"Content-Type": "text/csv"})
+    
+    [(resource, action, tenant_id, data)] = events
+    assert (resource, action, tenant_id, data["importados"]) == ("pacientes", "imported", "default", 3)
+    listed = client.get("/api/v1/pacientes/", params={"updated_since": data["updated_since"]}).json()
+    assert {paciente["email"] for paciente in listed} == {"ana@example.com", "eva@example.com", "registered@example.com"}
@@ -0,0 +1,60 @@
+import pytest
+from app.services.resultado_service import ResultadoService
+
+INGRESO = {
+    "paciente": {"nombre": "Ingreso", "apellido": "User", "email": "ingreso@example.com"},
+    "citas": [
+        {"fecha_hora": "2026-05-04T09:00:00", "motivo": "Primera consulta"},
+        {"fecha_hora": "2026-05-11T09:00:00", "motivo": "Control"},
+    ],
+    "resultados": [
+        {
+            "tipo_examen": "Hemograma",
+            "fecha_examen": "2026-05-04T08:00:00",
+            "resultado": "Normal",
+            "mediciones": [{"analito": "Hemoglobina", "valor": 14.1, "unidad": "g/dL"}],
+        },
+    ],
+}
+
+
+def test_create_ingreso(client):
+    """Test creating a paciente with citas and resultados in one request"""
+    response = client.post("/api/v1/ingresos/", json=INGRESO)
+    assert response.status_code == 201
+    data = response.json()
+    assert len(data["cita_ids"]) == 2
+    assert len(data["resultado_ids"]) == 1
+    
+    paciente_id = data["paciente_id"]
+    citas = client.get(f"/api/v1/citas/paciente/{paciente_id}").json()
+    assert sorted(cita["id"] for cita in citas) == sorted(data["cita_ids"])
+    resultado = client.get(f"/api/v1/resultados/{data['resultado_ids'][0]}").json()
+    assert resultado["paciente_id"] == paciente_id
+    assert resultado["mediciones"][0]["valor"] == 14.1
+    assert client.get("/api/v1/estadisticas/citas/estado").json() == [
+        {"clave": "programada", "total": 2}
+    ]
+
+
+def test_create_ingreso_duplicate_email(client):
+    """Test an ingreso for a registered email is rejected"""
+    client.post("/api/v1/pacientes/", json=INGRESO["paciente"])
+    response = client.post("/api/v1/ingresos/", json=INGRESO)
+    assert response.status_code == 400
+    assert client.get("/api/v1/citas/").json() == []
+
+
+def test_create_ingreso_is_atomic(client, monkeypatch):
+    """Test a failure part way through leaves nothing behind"""
+    def fail(db, resultado):
+        raise RuntimeError("boom")
+    
+    monkeypatch.setattr(ResultadoService, "add", staticmethod(fail))
+    with pytest.raises(RuntimeError):
+        client.post("/api/v1/ingresos/", json=INGRESO)
+    monkeypatch.undo()
+    
+    assert client.get("/api/v1/pacientes/").json() == []
+    assert client.get("/api/v1/citas/").json() == []
+    assert client.get("/api/v1/estadisticas/citas/estado").json() == []
@@ -0,0 +1,78 @@
+import json
+import pytest
+from sqlalchemy import create_engine
+from app.invalidation import ALL, InMemoryInvalidationBus, PostgresInvalidationBus, get_invalidation_bus
+from app.response_cache import invalidate, response_cache
+
+
+def test_in_memory_bus_delivers_to_subscribers():
+    """Test published invalidations reach every local handler"""
+    bus = InMemoryInvalidationBus()
+    received = []
+    bus.subscribe(lambda resource, tenant_id: received.append((resource, tenant_id)))
+    bus.publish("citas", "clinica-a")
+    bus.publish("pacientes")
+    assert received == [("citas", "clinica-a"), ("pacientes", None)]
+
+
+def test_postgres_bus_delivers_other_pods_messages():
+    """Test notifications from other pods are delivered and our own are skipped"""
+    bus = PostgresInvalidationBus(create_engine("sqlite://"))
+    received = []
+    bus.subscribe(lambda resource, tenant_id: received.append((resource, tenant_id)))
+    
+    # NOTIFY fails on SQLite; the local caches are still invalidated
+    bus.publish("citas", "clinica-a")
+    assert received == [("citas", "clinica-a")]
+    
+    bus._handle(json.dumps({"o": bus.origin, "r": "citas", "t": "clinica-a"}))
+    bus._handle(json.dumps({"o": "other-pod", "r": "pacientes", "t": None}))
+    assert received == [("citas", "clinica-a"), ("pacientes", None)]
+
+
+def test_invalidate_all_drops_cached_pages(client, monkeypatch):
+    """Test a missed-notifications reset makes every cached page miss"""
+    monkeypatch.setattr(response_cache, "maxsize", 100)
+    client.get("/api/v1/citas/")
+    assert client.get("/api/v1/citas/").headers["X-Cache"] == "HIT"
+    
+    get_invalidation_bus()._deliver(ALL, None)
+    assert client.get("/api/v1/citas/").headers["X-Cache"] == "MISS"
+    response_cache.clear()
+
+
+def test_nothing_published_without_cache(monkeypatch):
+    """Test writes don't notify the other pods while the cache is disabled"""
+    published = []
+    monkeypatch.setattr(get_invalidation_bus(), "publish", lambda *args: published.append(args))
+    monkeypatch.setattr(response_cache, "maxsize", 0)
+    invalidate("citas", "clinica-a")
+    assert published == []
+    monkeypatch.setattr(response_cache, "maxsize", 100)
+    invalidate("citas", "clinica-a")
+    assert published == [("citas", "clinica-a")]
+
+
+def test_postgres_bus_reads_psycopg3_notifies():
+    """Test the psycopg 3 wait loop delivers notifications until stopped"""
+    bus = PostgresInvalidationBus(create_engine("sqlite://"))
+    received = []
+    bus.subscribe(lambda resource, tenant_id: received.append((resource, tenant_id)))
+    
+    class Notify:
+        payload = json.dumps({"o": "other-pod", "r": "citas", "t": "clinica-a"})
+    
+    class Connection:
+        def notifies(self, timeout):
+            yield Notify()
+            bus._stop.set()
+    
+    bus._wait_psycopg(Connection())
+    assert received == [("citas", "clinica-a")]
+
+
+def test_postgres_bus_rejects_other_drivers():
+    """Test only drivers with LISTEN support can start the listener"""
+    bus = PostgresInvalidationBus(create_engine("sqlite://"))
+    with pytest.raises(RuntimeError):
+        bus.start()
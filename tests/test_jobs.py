@@ -0,0 +1,137 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import text
+from app.jobs import DatabaseJobQueue, Job, JobQueue, JobQueueFull, emit, job, job_queue, on_event
+from tests.conftest import TestingSessionLocal
+
+calls = []
+
+
+@job("tests.flaky")
+def flaky_job(db, key, failures):
+    """Fail ``failures`` times for ``key``, then succeed"""
+    calls.append(key)
+    if calls.count(key) <= failures:
+        raise RuntimeError("transient failure")
+
+
+@on_event("tests.something_happened")
+def record_event(db, value):
+    """Record emitted events"""
+    calls.append(("event", value))
+
+
+def test_retries_with_backoff():
+    """Test failing jobs are retried until they succeed or run out of attempts"""
+    queue = JobQueue(TestingSessionLocal, workers=1, max_attempts=3, retry_backoff_seconds=0.01)
+    queue.start()
+    try:
+        queue.enqueue("tests.flaky", key="retry-ok", failures=2)
+        queue.enqueue("tests.flaky", key="retry-fail", failures=5)
+        for _ in range(50):
+            if queue.join() and queue.metrics()["failed"] == 1:
+                break
+    finally:
+        queue.stop()
+    assert calls.count("retry-ok") == 3
+    assert calls.count("retry-fail") == 3
+    metrics = queue.metrics()
+    assert metrics["processed"] == 1
+    assert metrics["failed"] == 1
+    assert metrics["retried"] == 4
+
+
+def test_backpressure():
+    """Test a full queue rejects jobs and committed side effects run inline"""
+    queue = JobQueue(TestingSessionLocal, maxsize=1)
+    queue.enqueue("tests.flaky", key="bp-1", failures=0)
+    with pytest.raises(JobQueueFull):
+        queue.enqueue("tests.flaky", key="bp-2", failures=0)
+    assert queue.metrics()["rejected"] == 1
+    
+    db = TestingSessionLocal()
+    queue.enqueue_after_commit(db, "tests.flaky", key="bp-inline", failures=0)
+    queue.flush_pending(db)
+    db.close()
+    assert "bp-inline" in calls
+    assert queue.depth() == 1
+
+
+def test_emit_runs_after_commit_only(db):
+    """Test event subscribers run after commit and are dropped on rollback"""
+    job_queue.start()
+    try:
+        db.execute(text("SELECT 1"))
+        emit(db, "tests.something_happened", value="rolled back")
+        db.rollback()
+        emit(db, "tests.something_happened", value="committed")
+        db.commit()
+        assert job_queue.join()
+    finally:
+        job_queue.stop()
+    assert ("event", "committed") in calls
+    assert ("event", "rolled back") not in calls
+
+
+def test_database_queue_is_durable(db):
+    """Test the database backend stores jobs until a worker runs them"""
+    queue = DatabaseJobQueue(TestingSessionLocal, workers=1, poll_interval_seconds=0.01)
+    queue.enqueue("tests.flaky", key="durable", failures=1)
+    queue.enqueue_after_commit(db, "tests.flaky", key="outbox", failures=0)
+    db.commit()
+    assert queue.depth() == 2
+    
+    queue.retry_backoff_seconds = 0
+    queue.start()
+    try:
+        for _ in range(100):
+            if queue.join() and "outbox" in calls and calls.count("durable") == 2:
+                break
+    finally:
+        queue.stop()
+    assert calls.count("durable") == 2
+    assert "outbox" in calls
+    assert queue.depth() == 0
+
+
+def test_database_queue_tolerates_removed_rows(db):
+    """Test a job whose row is gone when it finishes counts as done"""
+    queue = DatabaseJobQueue(TestingSessionLocal, workers=1)
+    queue.enqueue("tests.flaky", key="removed", failures=0)
+    item = queue._claim()
+    db.execute(text("DELETE FROM background_jobs"))
+    db.commit()
+    assert queue.run(item)
+    assert "removed" in calls
+
+
+def test_outbox_only_holds_handled_jobs(db, monkeypatch):
+    """Test events without subscribers and unknown jobs write no outbox row"""
+    from app import jobs
+    queue = DatabaseJobQueue(TestingSessionLocal)
+    monkeypatch.setattr(jobs, "job_queue", queue)
+    emit(db, "tests.nobody_listens", value=1)
+    with pytest.raises(KeyError):
+        queue.enqueue_after_commit(db, "tests.unknown")
+    db.commit()
+    assert queue.depth() == 0
+
+
+def test_delete_paciente_with_long_history_in_background(client, monkeypatch):
+    """Test pacientes over the inline limit are deleted by a job"""
+    from app.routers import pacientes
+    monkeypatch.setattr(pacientes.settings, "paciente_inline_delete_limit", 1)
+    
+    paciente_data = {"nombre": "Long", "apellido": "History", "email": "long.history@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    for motivo in ("Primera", "Segunda"):
+        client.post("/api/v1/citas/", json={
+            "paciente_id": paciente_id, "fecha_hora": datetime.now().isoformat(), "motivo": motivo
+        })
+    
+    response = client.delete(f"/api/v1/pacientes/{paciente_id}")
+    assert response.status_code == 202
+    assert job_queue.join()
+    assert client.get(f"/api/v1/pacientes/{paciente_id}").status_code == 404
+    assert client.get("/api/v1/citas/").json() == []
+    assert client.get("/health/jobs").json()["backend"] == "memory"
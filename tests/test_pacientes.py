@@ -1,4 +1,9 @@
 import pytest
+from sqlalchemy.exc import IntegrityError
+from app.query_plans import capture_queries
+from app.schemas.paciente import PacienteCreate
+from app.services.paciente_service import EmailAlreadyRegistered, PacienteService
+from tests.conftest import engine
 
 
 def test_create_paciente(client):
@@ -21,6 +26,16 @@ def test_create_paciente(client):
     assert "created_at" in data
 
 
+def test_create_paciente_reads_nothing_back(client):
+    """Test sign-up doesn't SELECT the new paciente back before responding"""
+    paciente_data = {"nombre": "Sin", "apellido": "Lectura", "email": "sin.lectura@example.com"}
+    with capture_queries(engine) as queries:
+        response = client.post("/api/v1/pacientes/", json=paciente_data)
+    assert response.status_code == 201
+    assert response.json()["created_at"] is not None
+    assert not any("FROM pacientes" in query.statement for query in queries)
+
+
 def test_get_pacientes(client):
     """Test getting all pacientes"""
     # Create a paciente first
@@ -110,3 +125,35 @@ def test_create_duplicate_email(client):
     # Try to create duplicate
     response = client.post("/api/v1/pacientes/", json=paciente_data)
     assert response.status_code == 400
+
+
+def test_duplicate_email_ignores_case(client):
+    """Test emails differing only in case are duplicates"""
+    paciente_data = {"nombre": "Rosa", "apellido": "Díaz", "email": "Rosa.Diaz@example.com"}
+    client.post("/api/v1/pacientes/", json=paciente_data)
+    
+    response = client.post("/api/v1/pacientes/", json={**paciente_data, "email": "rosa.diaz@EXAMPLE.com"})
+    assert response.status_code == 400
+    assert len(client.get("/api/v1/pacientes/").json()) == 1
+
+
+def test_update_to_taken_email(client):
+    """Test changing a paciente's email to one already registered"""
+    client.post("/api/v1/pacientes/", json={"nombre": "A", "apellido": "A", "email": "a@example.com"})
+    other = client.post("/api/v1/pacientes/", json={"nombre": "B", "apellido": "B", "email": "b@example.com"})
+    
+    response = client.put(f"/api/v1/pacientes/{other.json()['id']}", json={"email": "A@example.com"})
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/pacientes/{other.json()['id']}").json()["email"] == "b@example.com"
+
+
+def test_other_integrity_errors_are_not_email_conflicts(db):
+    """Test only the unique email index is reported as a taken email"""
+    paciente = PacienteCreate.model_construct(nombre=None, apellido="Sin", email="sin.nombre@example.com")
+    with pytest.raises(IntegrityError):
+        PacienteService.add(db, paciente)
+    db.rollback()
+    
+    PacienteService.create(db, PacienteCreate(nombre="A", apellido="A", email="a@example.com"))
+    with pytest.raises(EmailAlreadyRegistered):
+        PacienteService.add(db, PacienteCreate(nombre="B", apellido="B", email="A@example.com"))
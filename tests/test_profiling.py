@@ -0,0 +1,96 @@
+import asyncio
+import re
+import threading
+import time
+from collections import Counter
+from app.profiling import RuntimeMonitor, capture_lock, collapsed, sample_stacks
+from app.routers import admin
+
+
+def busy_loop(stop: threading.Event):
+    """Burn CPU until stopped"""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_sees_busy_thread():
+    """Test a thread spinning in Python shows up with its call stack"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        counts = sample_stacks(0.2, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+    stacks = [stack for stack in counts if stack.startswith("busy-worker;")]
+    assert stacks
+    assert all("busy_loop (tests/test_profiling.py:" in stack for stack in stacks)
+    # Threads waiting for work are left out by default
+    assert not any("threading.py:" in stack.rsplit(";", 1)[-1] for stack in counts)
+
+
+def test_collapsed_format():
+    """Test collapsed stacks are one 'frames count' line each, hottest first"""
+    text = collapsed(Counter({"main;a;b": 2, "main;a;c": 5}))
+    assert text == "main;a;c 5\nmain;a;b 2\n"
+
+
+def test_profile_requires_admin_token(client, monkeypatch):
+    """Test the profile endpoint is hidden without a token and forbidden with a wrong one"""
+    monkeypatch.setattr(admin.settings, "profiling_enabled", True)
+    monkeypatch.setattr(admin.settings, "admin_token", "")
+    assert client.get("/api/v1/admin/profile?seconds=0.1").status_code == 404
+    
+    monkeypatch.setattr(admin.settings, "admin_token", "secreto")
+    response = client.get("/api/v1/admin/profile?seconds=0.1", headers={"X-Admin-Token": "otro"})
+    assert response.status_code == 403
+    assert client.get("/api/v1/admin/profile?seconds=0.1").status_code == 403
+
+
+def test_profile_returns_collapsed_stacks(client, monkeypatch):
+    """Test an admin gets a collapsed-stack profile, bounded and one at a time"""
+    monkeypatch.setattr(admin.settings, "admin_token", "secreto")
+    headers = {"X-Admin-Token": "secreto"}
+    monkeypatch.setattr(admin.settings, "profiling_enabled", False)
+    assert client.get("/api/v1/admin/profile?seconds=0.1", headers=headers).status_code == 404
+    
+    monkeypatch.setattr(admin.settings, "profiling_enabled", True)
+    response = client.get("/api/v1/admin/profile?seconds=0.2&interval_ms=5&idle=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert lines
+    assert all(re.match(r"^\S.*;.* \d+$", line) for line in lines)
+    
+    assert client.get("/api/v1/admin/profile?seconds=3600", headers=headers).status_code == 400
+    with capture_lock:
+        assert client.get("/api/v1/admin/profile?seconds=0.1", headers=headers).status_code == 409
+
+
+def test_runtime_monitor_measures_loop_lag():
+    """Test a blocked event loop shows up as lag"""
+    monitor = RuntimeMonitor(interval=0.01)
+    
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+    
+    asyncio.run(run())
+    metrics = monitor.metrics()
+    assert metrics["samples"] > 0
+    assert metrics["event_loop_lag_ms"]["max"] >= 50
+    assert metrics["threadpool"]["size"] > 0
+    assert metrics["running"] is False
+
+
+def test_runtime_metrics_endpoint(client):
+    """Test the gauges are exposed next to the other health metrics"""
+    response = client.get("/health/runtime")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["running"] is True
+    assert set(data["threadpool"]) == {"size", "busy", "waiting", "max_waiting"}
@@ -0,0 +1,200 @@
+"""Query plan and query count regression tests.
+
+Service queries run against a seeded database and every SELECT they issue is
+EXPLAINed: a full table scan fails the test. Set ``QUERY_PLAN_DATABASE_URL``
+to a disposable Postgres database to check its plans instead of SQLite's.
+Route tests pin the number of statements each request issues.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.cita import Cita
+from app.models.medicion import Medicion
+from app.models.paciente import Paciente
+from app.models.resultado import Resultado
+from app.query_plans import capture_queries, explain, full_scans, is_select
+from app.services.cita_service import CitaService
+from app.services.estadistica_service import EstadisticaService
+from app.services.paciente_service import PacienteService
+from app.services.resultado_service import ResultadoService
+from app.services.sync_service import SyncService
+from app.tenancy import set_tenant
+from tests.conftest import engine as test_engine
+
+TENANTS = ["default", "otra"]
+PACIENTES_PER_TENANT = 1000
+HISTORY_PER_PACIENTE = 5
+ANALITOS = ["Glucosa", "Hemoglobina", "Creatinina"]
+
+
+def seed(engine):
+    """Insert pacientes with citas, resultados and mediciones for each tenant"""
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    pacientes, citas, resultados, mediciones = [], [], [], []
+    paciente_id = resultado_id = 0
+    for tenant_id in TENANTS:
+        for number in range(PACIENTES_PER_TENANT):
+            paciente_id += 1
+            pacientes.append({
+                "id": paciente_id, "tenant_id": tenant_id, "nombre": "Paciente",
+                "apellido": str(number), "email": f"paciente{number}@example.com",
+                "updated_at": start + timedelta(minutes=paciente_id),
+            })
+            for visit in range(HISTORY_PER_PACIENTE):
+                fecha = start + timedelta(days=visit * 30, minutes=paciente_id)
+                citas.append({
+                    "tenant_id": tenant_id, "paciente_id": paciente_id, "fecha_hora": fecha,
+                    "motivo": "Control", "estado": "completada", "updated_at": fecha,
+                })
+                resultado_id += 1
+                resultados.append({
+                    "id": resultado_id, "tenant_id": tenant_id, "paciente_id": paciente_id,
+                    "tipo_examen": "Laboratorio", "fecha_examen": fecha,
+                    "resultado": "Normal", "updated_at": fecha,
+                })
+                mediciones += [{
+                    "tenant_id": tenant_id, "resultado_id": resultado_id,
+                    "paciente_id": paciente_id, "fecha": fecha, "analito": analito,
+                    "valor": 1.0 + visit, "unidad": "mg/dL",
+                } for analito in ANALITOS]
+    with engine.begin() as conn:
+        for model, rows in (
+            (Paciente, pacientes), (Cita, citas), (Resultado, resultados), (Medicion, mediciones)
+        ):
+            conn.execute(insert(model.__table__), rows)
+        conn.execute(text("ANALYZE"))
+
+
+@pytest.fixture(scope="module")
+def seeded_engine(tmp_path_factory):
+    """Engine over a seeded database; Postgres if QUERY_PLAN_DATABASE_URL is set
+    
+    The SQLite database is a file of its own, so the ``client`` tests in this
+    module can't drop its tables whatever order the tests run in.
+    """
+    url = os.environ.get("QUERY_PLAN_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tmp_path_factory.mktemp('query_plans') / 'plans.db'}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    seed(engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+# Unfiltered list pages read the tenant's table by design and are left out
+SERVICE_QUERIES = {
+    "PacienteService.get_all(updated_since)": lambda db: PacienteService.get_all(
+        db, updated_since=datetime(2023, 1, 1, 12, tzinfo=timezone.utc)
+    ),
+    "PacienteService.get_by_id": lambda db: PacienteService.get_by_id(db, 10),
+    "PacienteService.get_by_email": lambda db: PacienteService.get_by_email(db, "Paciente10@Example.com"),
+    "PacienteService.count_history": lambda db: PacienteService.count_history(db, 10),
+    "CitaService.get_all(updated_since)": lambda db: CitaService.get_all(
+        db, updated_since=datetime(2023, 6, 1, tzinfo=timezone.utc)
+    ),
+    "CitaService.get_by_id": lambda db: CitaService.get_by_id(db, 10),
+    "CitaService.get_by_paciente": lambda db: CitaService.get_by_paciente(db, 10),
+    "ResultadoService.get_all(updated_since)": lambda db: ResultadoService.get_all(
+        db, updated_since=datetime(2023, 6, 1, tzinfo=timezone.utc), mediciones=True
+    ),
+    "ResultadoService.get_by_id": lambda db: ResultadoService.get_by_id(
+        db, 10, include_archived=True, mediciones=True
+    ),
+    "ResultadoService.get_by_paciente": lambda db: ResultadoService.get_by_paciente(
+        db, 10, include_archived=True, mediciones=True
+    ),
+    "EstadisticaService.tendencia": lambda db: EstadisticaService.tendencia(db, 10, "Glucosa"),
+    "SyncService.changes": lambda db: SyncService.changes(db, 10),
+}
+
+
+@pytest.mark.parametrize("name", list(SERVICE_QUERIES))
+def test_service_queries_use_indexes(seeded_engine, name):
+    """Test no SELECT issued by a service query reads a whole table"""
+    db = sessionmaker(bind=seeded_engine)()
+    set_tenant(db, "default")
+    try:
+        with capture_queries(seeded_engine) as queries:
+            SERVICE_QUERIES[name](db)
+        selects = [query for query in queries if is_select(query)]
+        assert selects
+        for query in selects:
+            plan = explain(db.connection(), query)
+            assert not full_scans(plan), f"{name} scans a table:\n{query.statement}\n{plan}"
+    finally:
+        db.close()
+
+
+def test_unindexed_filter_is_reported(seeded_engine):
+    """Test the harness catches a query no index serves"""
+    db = sessionmaker(bind=seeded_engine)()
+    set_tenant(db, "default")
+    try:
+        with capture_queries(seeded_engine) as queries:
+            db.query(Cita).filter(Cita.motivo == "Control").all()
+        assert full_scans(explain(db.connection(), queries[-1])) == ["citas"]
+    finally:
+        db.close()
+
+
+def test_full_scans_parses_plans():
+    """Test scans are told apart from index seeks in both plan formats"""
+    assert full_scans(["SCAN pacientes"]) == ["pacientes"]
+    assert full_scans(["SCAN citas USING INDEX ix_citas_tenant_fecha_hora"]) == ["citas"]
+    assert full_scans(["SEARCH citas USING INDEX ix_citas_tenant_paciente (tenant_id=? AND paciente_id=?)"]) == []
+    assert full_scans(["SEARCH citas USING INDEX ix_citas_tenant_paciente (tenant_id=?)"]) == ["citas"]
+    plan = {
+        "Node Type": "Nested Loop",
+        "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "pacientes"},
+            {"Node Type": "Seq Scan", "Relation Name": "citas"},
+        ],
+    }
+    assert full_scans(plan) == ["citas"]
+
+
+def create_history(client):
+    """Create a paciente with two citas and two resultados with mediciones"""
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Plan", "apellido": "Consultas", "email": "plan@example.com"
+    }).json()["id"]
+    for day in range(2):
+        fecha = (datetime(2024, 1, 1) + timedelta(days=day)).isoformat()
+        client.post("/api/v1/citas/", json={
+            "paciente_id": paciente_id, "fecha_hora": fecha, "motivo": "Control"
+        })
+        client.post("/api/v1/resultados/", json={
+            "paciente_id": paciente_id, "tipo_examen": "Laboratorio", "fecha_examen": fecha,
+            "resultado": "Normal",
+            "mediciones": [{"analito": analito, "valor": 1.0} for analito in ANALITOS],
+        })
+    return paciente_id
+
+
+# Maximum statements per request; raise only together with the change that
+# needs the extra query
+ROUTE_QUERY_BUDGETS = [
+    ("GET", "/api/v1/pacientes/{id}", 1),
+    ("GET", "/api/v1/pacientes/", 1),
+    ("GET", "/api/v1/citas/paciente/{id}", 2),
+    ("GET", "/api/v1/resultados/paciente/{id}", 3),
+    ("GET", "/api/v1/estadisticas/pacientes/{id}/tendencia?analito=Glucosa", 2),
+    ("GET", "/api/v1/sync/pacientes/{id}", 5),
+]
+
+
+@pytest.mark.parametrize("method,path,budget", ROUTE_QUERY_BUDGETS)
+def test_route_query_budget(client, method, path, budget):
+    """Test a route doesn't issue more statements than its budget"""
+    paciente_id = create_history(client)
+    with capture_queries(test_engine) as queries:
+        response = client.request(method, path.format(id=paciente_id))
+    assert response.status_code == 200
+    statements = [query.statement for query in queries]
+    assert len(statements) <= budget, "\n".join(statements)
@@ -0,0 +1,76 @@
+import pytest
+from app.cache import ResponseCache
+from app.response_cache import response_cache
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    """Enable the response cache for a test"""
+    monkeypatch.setattr(response_cache, "maxsize", 100)
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+
+
+def create_paciente(client, email, headers=None):
+    paciente_data = {"nombre": "Cache", "apellido": "User", "email": email}
+    return client.post("/api/v1/pacientes/", json=paciente_data, headers=headers).json()["id"]
+
+
+def test_list_pages_are_cached(client, cache_enabled):
+    """Test a repeated list request is served from the cache"""
+    create_paciente(client, "cache1@example.com")
+    first = client.get("/api/v1/pacientes/?limit=10")
+    second = client.get("/api/v1/pacientes/?limit=10")
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert client.get("/api/v1/pacientes/?limit=20").headers["X-Cache"] == "MISS"
+
+
+def test_writes_invalidate_cached_pages(client, cache_enabled):
+    """Test creates, updates and deletes are visible on the next request"""
+    paciente_id = create_paciente(client, "cache2@example.com")
+    assert len(client.get("/api/v1/pacientes/").json()) == 1
+    
+    create_paciente(client, "cache3@example.com")
+    assert len(client.get("/api/v1/pacientes/").json()) == 2
+    
+    client.put(f"/api/v1/pacientes/{paciente_id}", json={"nombre": "Renamed"})
+    assert client.get("/api/v1/pacientes/").json()[0]["nombre"] == "Renamed"
+    
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": "2026-06-01T10:00:00", "motivo": "Control"}
+    client.post("/api/v1/citas/", json=cita_data)
+    assert len(client.get("/api/v1/citas/").json()) == 1
+    client.delete(f"/api/v1/pacientes/{paciente_id}")
+    assert len(client.get("/api/v1/pacientes/").json()) == 1
+    assert client.get("/api/v1/citas/").json() == []
+
+
+def test_cache_is_per_tenant(client, cache_enabled):
+    """Test a clinic never gets another clinic's cached page"""
+    create_paciente(client, "cache4@example.com", headers={"X-Tenant-ID": "clinica-a"})
+    assert len(client.get("/api/v1/pacientes/", headers={"X-Tenant-ID": "clinica-a"}).json()) == 1
+    response = client.get("/api/v1/pacientes/", headers={"X-Tenant-ID": "clinica-b"})
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json() == []
+
+
+def test_response_cache_lru_bounds():
+    """Test eviction by entry count and total size, least recently used first"""
+    cache = ResponseCache(maxsize=2, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    
+    cache.set("d", b"12345678")
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.get("d") == b"12345678"
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    
+    cache.bump("pacientes")
+    assert cache.generation("pacientes") == 1
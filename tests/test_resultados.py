@@ -1,5 +1,7 @@
 import pytest
 from datetime import datetime, timedelta
+from app.query_plans import capture_queries
+from tests.conftest import engine
 
 
 def test_create_resultado(client):
@@ -138,3 +140,49 @@ def test_delete_resultado(client):
     # Verify deletion
     get_response = client.get(f"/api/v1/resultados/{resultado_id}")
     assert get_response.status_code == 404
+
+
+def test_resultado_mediciones(client):
+    """Test creating and replacing the numeric mediciones of a resultado"""
+    paciente_data = {"nombre": "Lab", "apellido": "Panel", "email": "lab.panel@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    resultado_data = {
+        "paciente_id": paciente_id,
+        "tipo_examen": "Perfil lipídico",
+        "fecha_examen": datetime.now().isoformat(),
+        "resultado": "Ver mediciones",
+        "mediciones": [
+            {"analito": "Colesterol", "valor": 210, "unidad": "mg/dL", "rango_max": 200},
+            {"analito": "Glucosa", "valor": 92, "unidad": "mg/dL", "rango_min": 70, "rango_max": 100},
+        ]
+    }
+    response = client.post("/api/v1/resultados/", json=resultado_data)
+    assert response.status_code == 201
+    resultado_id = response.json()["id"]
+    assert [m["analito"] for m in response.json()["mediciones"]] == ["Colesterol", "Glucosa"]
+    
+    update = {"mediciones": [{"analito": "Glucosa", "valor": 101}]}
+    response = client.put(f"/api/v1/resultados/{resultado_id}", json=update)
+    assert [(m["analito"], m["valor"]) for m in response.json()["mediciones"]] == [("Glucosa", 101)]
+    
+    listed = client.get(f"/api/v1/resultados/paciente/{paciente_id}").json()
+    assert len(listed[0]["mediciones"]) == 1
+
+
+def test_delete_skips_mediciones(client):
+    """Test the lookup behind writes doesn't load the resultado's mediciones"""
+    paciente_data = {"nombre": "Lab", "apellido": "Delete", "email": "lab.delete@example.com"}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    resultado_id = client.post("/api/v1/resultados/", json={
+        "paciente_id": paciente_id,
+        "tipo_examen": "Glucemia",
+        "fecha_examen": datetime.now().isoformat(),
+        "resultado": "Normal",
+        "mediciones": [{"analito": "Glucosa", "valor": 92}]
+    }).json()["id"]
+    with capture_queries(engine) as queries:
+        assert client.delete(f"/api/v1/resultados/{resultado_id}").status_code == 204
+    assert not any(
+        query.statement.lstrip().startswith("SELECT") and "FROM mediciones" in query.statement
+        for query in queries
+    )
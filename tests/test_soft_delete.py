@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from app.config import get_settings
+from app.database import utcnow
+from app.models.cita import Cita
+from app.models.medicion import Medicion
+from app.models.paciente import Paciente
+from app.models.resultado import Resultado
+from app.models.resultado_archivado import ResultadoArchivado
+from app.services.resultado_service import ResultadoService
+from app.services.purga_service import PurgaService, purge_window_end
+from app.soft_delete import INCLUDE_DELETED_OPTION, add_soft_delete_columns
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def soft_delete(monkeypatch):
+    monkeypatch.setattr(get_settings(), "soft_delete_enabled", True)
+
+
+def seed(client, email="borrado@example.com"):
+    """Create a paciente with a cita and a resultado with mediciones"""
+    paciente_data = {"nombre": "Borrado", "apellido": "Logico", "email": email}
+    paciente_id = client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": "2026-06-01T10:00:00", "motivo": "Control"}
+    cita_id = client.post("/api/v1/citas/", json=cita_data).json()["id"]
+    resultado_id = client.post("/api/v1/resultados/", json={
+        "paciente_id": paciente_id,
+        "tipo_examen": "Glucemia",
+        "fecha_examen": datetime(2026, 5, 4, 10).isoformat(),
+        "resultado": "Normal",
+        "mediciones": [{"analito": "Glucosa", "valor": 92, "unidad": "mg/dL"}]
+    }).json()["id"]
+    return paciente_id, cita_id, resultado_id
+
+
+def all_rows(model):
+    db = TestingSessionLocal()
+    try:
+        return db.execute(
+            select(model), execution_options={INCLUDE_DELETED_OPTION: True}
+        ).scalars().all()
+    finally:
+        db.close()
+
+
+def test_soft_delete_hides_rows(client, soft_delete):
+    """Test deleted rows are marked, hidden from the API and kept in the tables"""
+    paciente_id, cita_id, resultado_id = seed(client)
+    assert client.delete(f"/api/v1/citas/{cita_id}").status_code == 204
+    assert client.get(f"/api/v1/citas/{cita_id}").status_code == 404
+    assert client.get("/api/v1/citas/").json() == []
+    
+    assert client.delete(f"/api/v1/pacientes/{paciente_id}").status_code == 204
+    assert client.get(f"/api/v1/pacientes/{paciente_id}").status_code == 404
+    assert client.get(f"/api/v1/resultados/{resultado_id}").status_code == 404
+    assert client.get("/api/v1/pacientes/").json() == []
+    
+    for model in (Paciente, Cita, Resultado, Medicion):
+        rows = all_rows(model)
+        assert len(rows) == 1
+        assert rows[0].deleted_at is not None
+
+
+def test_deleted_email_can_be_registered_again(client, soft_delete):
+    """Test the unique email index only covers live pacientes"""
+    paciente_id, _, _ = seed(client)
+    client.delete(f"/api/v1/pacientes/{paciente_id}")
+    paciente_data = {"nombre": "Nuevo", "apellido": "Registro", "email": "borrado@example.com"}
+    response = client.post("/api/v1/pacientes/", json=paciente_data)
+    assert response.status_code == 201
+    assert response.json()["id"] != paciente_id
+
+
+def test_list_pages_are_ordered(client, soft_delete):
+    """Test list pages walk the live rows by id, without repeats or gaps"""
+    paciente_id, _, _ = seed(client)
+    cita_ids = [
+        client.post("/api/v1/citas/", json={
+            "paciente_id": paciente_id, "fecha_hora": f"2026-06-0{day}T10:00:00", "motivo": "Control"
+        }).json()["id"]
+        for day in range(2, 6)
+    ]
+    client.delete(f"/api/v1/citas/{cita_ids[1]}")
+    for resource in ("citas", "resultados"):
+        listed = client.get(f"/api/v1/{resource}/").json()
+        pages = [client.get(f"/api/v1/{resource}/?limit=1&skip={skip}").json() for skip in range(len(listed))]
+        assert [row["id"] for page in pages for row in page] == sorted(row["id"] for row in listed)
+    assert cita_ids[1] not in [cita["id"] for cita in client.get("/api/v1/citas/").json()]
+
+
+def test_hard_delete_by_default(client):
+    """Test rows are deleted outright unless soft delete is enabled"""
+    paciente_id, _, _ = seed(client)
+    client.delete(f"/api/v1/pacientes/{paciente_id}")
+    for model in (Paciente, Cita, Resultado, Medicion):
+        assert all_rows(model) == []
+
+
+def test_purge_removes_old_marked_rows(client, soft_delete):
+    """Test the purge hard-deletes rows marked before the cutoff, in batches"""
+    for index in range(3):
+        paciente_id, _, _ = seed(client, f"purga{index}@example.com")
+        client.delete(f"/api/v1/pacientes/{paciente_id}")
+    seed(client, "vivo@example.com")
+    
+    db = TestingSessionLocal()
+    try:
+        assert PurgaService.purge(db, utcnow() - timedelta(days=1)) == {
+            "mediciones": 0, "citas": 0, "resultados": 0, "pacientes": 0
+        }
+        purged = PurgaService.purge(db, utcnow() + timedelta(seconds=1), batch_size=2)
+        assert purged == {"mediciones": 3, "citas": 3, "resultados": 3, "pacientes": 3}
+        # Nothing is done once the window has closed
+        assert set(PurgaService.purge(db, utcnow(), until=utcnow()).values()) == {0}
+    finally:
+        db.close()
+    assert [paciente.email for paciente in all_rows(Paciente)] == ["vivo@example.com"]
+    assert len(all_rows(Medicion)) == 1
+
+
+def test_archive_kept_until_purge(client, soft_delete):
+    """Test a soft-deleted paciente's archived resultados are hidden and purged later"""
+    paciente_id, _, resultado_id = seed(client)
+    db = TestingSessionLocal()
+    try:
+        assert ResultadoService.archive(db, datetime(2026, 6, 1)) == 1
+    finally:
+        db.close()
+    client.delete(f"/api/v1/pacientes/{paciente_id}")
+    
+    assert [row.id for row in all_rows(ResultadoArchivado)] == [resultado_id]
+    assert client.get(f"/api/v1/resultados/{resultado_id}?include_archived=true").status_code == 404
+    
+    db = TestingSessionLocal()
+    try:
+        assert PurgaService.purge(db, utcnow() + timedelta(seconds=1))["pacientes"] == 1
+    finally:
+        db.close()
+    assert all_rows(ResultadoArchivado) == []
+
+
+def test_purge_window_end():
+    """Test the off-peak window, including windows wrapping past midnight"""
+    assert purge_window_end(datetime(2026, 3, 2, 3, 30), "2-5") == datetime(2026, 3, 2, 5)
+    assert purge_window_end(datetime(2026, 3, 2, 5, 0), "2-5") is None
+    assert purge_window_end(datetime(2026, 3, 2, 23, 0), "22-4") == datetime(2026, 3, 3, 4)
+    assert purge_window_end(datetime(2026, 3, 3, 1, 0), "22-4") == datetime(2026, 3, 3, 4)
+    assert purge_window_end(datetime(2026, 3, 2, 12, 0), "22-4") is None
+
+
+def test_add_soft_delete_columns_upgrades_old_tables(tmp_path):
+    """Test tables created before soft delete get the column and partial indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE pacientes (id INTEGER PRIMARY KEY, tenant_id VARCHAR, email VARCHAR, "
+            "updated_at DATETIME)"
+        ))
+        conn.execute(text("CREATE UNIQUE INDEX ix_pacientes_tenant_email_lower ON pacientes (tenant_id, lower(email))"))
+    add_soft_delete_columns(engine)
+    add_soft_delete_columns(engine)  # idempotent
+    
+    assert "deleted_at" in {column["name"] for column in inspect(engine).get_columns("pacientes")}
+    with engine.connect() as conn:
+        indexes = set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'pacientes'"
+        )).scalars())
+    assert "ix_pacientes_tenant_email_lower" not in indexes
+    assert {"ix_pacientes_tenant_email_lower_live", "ix_pacientes_deleted_at"} <= indexes
+    engine.dispose()
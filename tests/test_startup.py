@@ -0,0 +1,43 @@
+from app.startup_profile import (
+    import_profile,
+    imported_modules,
+    parse_importtime,
+    time_to_first_request,
+)
+
+# Budgets are deliberately loose so slow CI runners pass; they exist to catch
+# regressions such as a heavy dependency being imported at module level.
+IMPORT_BUDGET_MS = 2500
+FIRST_REQUEST_BUDGET_MS = 5000
+LAZY_MODULES = ["supabase", "numpy", "pyarrow"]
+
+
+def test_parse_importtime():
+    """Test import time output is grouped by top-level package"""
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:      1000 |       1000 |   sqlalchemy.sql",
+        "import time:       500 |       1500 | sqlalchemy",
+        "import time:       250 |        250 | app.main",
+    ])
+    assert parse_importtime(output) == {"sqlalchemy": 1.5, "app": 0.25}
+
+
+def test_import_time_budget():
+    """Test importing app.main stays within the startup budget"""
+    total, breakdown = import_profile()
+    assert "app" in breakdown
+    assert total < IMPORT_BUDGET_MS, breakdown
+
+
+def test_optional_integrations_are_lazy():
+    """Test optional integrations are not imported at startup"""
+    modules = imported_modules()
+    assert "app.main" in modules
+    for name in LAZY_MODULES:
+        assert name not in modules
+
+
+def test_time_to_first_request_budget():
+    """Test a fresh process serves its first request within budget"""
+    assert time_to_first_request() < FIRST_REQUEST_BUDGET_MS
@@ -0,0 +1,76 @@
+import pytest
+from datetime import datetime, timedelta
+from app.services import sync_service
+from app.services.sync_service import encode_token
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(monkeypatch):
+    monkeypatch.setattr(sync_service.settings, "sync_safety_lag_seconds", 0)
+
+
+def create_paciente(client):
+    paciente_data = {"nombre": "Sync", "apellido": "User", "email": "sync@example.com"}
+    return client.post("/api/v1/pacientes/", json=paciente_data).json()["id"]
+
+
+def test_sync_initial_and_incremental(client):
+    """Test a token only returns changes made after it was issued"""
+    paciente_id = create_paciente(client)
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": datetime.now().isoformat(), "motivo": "A"}
+    first = client.post("/api/v1/citas/", json=cita_data).json()
+    
+    response = client.get(f"/api/v1/sync/pacientes/{paciente_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["id"] for p in data["pacientes"]] == [paciente_id]
+    assert [c["id"] for c in data["citas"]] == [first["id"]]
+    assert data["has_more"] is False
+    
+    second = client.post("/api/v1/citas/", json={**cita_data, "motivo": "B"}).json()
+    client.delete(f"/api/v1/citas/{first['id']}")
+    
+    data = client.get(f"/api/v1/sync/pacientes/{paciente_id}?token={data['next_token']}").json()
+    assert data["pacientes"] == []
+    assert [c["id"] for c in data["citas"]] == [second["id"]]
+    assert [(t["recurso"], t["record_id"]) for t in data["tombstones"]] == [("citas", first["id"])]
+
+
+def test_sync_pages_with_has_more(client):
+    """Test paging through changes with next_token"""
+    paciente_id = create_paciente(client)
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": datetime.now().isoformat(), "motivo": "A"}
+    ids = [client.post("/api/v1/citas/", json=cita_data).json()["id"] for _ in range(5)]
+    
+    seen, token = [], ""
+    while True:
+        data = client.get(f"/api/v1/sync/pacientes/{paciente_id}?limit=2&token={token}").json()
+        seen += [c["id"] for c in data["citas"]]
+        token = data["next_token"]
+        if not data["has_more"]:
+            break
+    assert seen == ids
+
+
+def test_sync_paciente_delete_tombstones_children(client):
+    """Test deleting a paciente leaves tombstones for it and its records"""
+    paciente_id = create_paciente(client)
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": datetime.now().isoformat(), "motivo": "A"}
+    cita_id = client.post("/api/v1/citas/", json=cita_data).json()["id"]
+    token = client.get(f"/api/v1/sync/pacientes/{paciente_id}").json()["next_token"]
+    
+    client.delete(f"/api/v1/pacientes/{paciente_id}")
+    
+    data = client.get(f"/api/v1/sync/pacientes/{paciente_id}?token={token}").json()
+    assert {(t["recurso"], t["record_id"]) for t in data["tombstones"]} == {
+        ("citas", cita_id), ("pacientes", paciente_id)
+    }
+
+
+def test_sync_errors(client):
+    """Test missing paciente, malformed and expired tokens"""
+    assert client.get("/api/v1/sync/pacientes/999").status_code == 404
+    assert client.get("/api/v1/sync/pacientes/1?token=not-a-token").status_code == 400
+    
+    expired = encode_token({}, datetime.now() - timedelta(days=365))
+    assert client.get(f"/api/v1/sync/pacientes/1?token={expired}").status_code == 410
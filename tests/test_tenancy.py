@@ -0,0 +1,180 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, insert, inspect, text
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import Base, add_tenant_columns, backfill_updated_at, utcnow
+from app.models.cita import Cita
+from app.models.paciente import Paciente
+from app.partitioning import (
+    conversion_statements, ensure_partitions_job, month_partition_statements, setup_partitioning,
+    split_default_statements
+)
+from app.soft_delete import add_soft_delete_columns
+from app.tenancy import set_tenant
+
+CLINIC_A = {"X-Tenant-ID": "clinica-a"}
+CLINIC_B = {"X-Tenant-ID": "clinica-b"}
+
+
+def create_paciente(client, headers, email="tenant@example.com"):
+    paciente_data = {"nombre": "Tenant", "apellido": "User", "email": email}
+    return client.post("/api/v1/pacientes/", json=paciente_data, headers=headers).json()["id"]
+
+
+def test_tenants_are_isolated(client):
+    """Test a clinic can't see or change another clinic's records"""
+    paciente_id = create_paciente(client, CLINIC_A)
+    cita_data = {"paciente_id": paciente_id, "fecha_hora": datetime(2026, 3, 2).isoformat(), "motivo": "A"}
+    cita_id = client.post("/api/v1/citas/", json=cita_data, headers=CLINIC_A).json()["id"]
+    
+    assert client.get("/api/v1/pacientes/", headers=CLINIC_B).json() == []
+    assert client.get(f"/api/v1/pacientes/{paciente_id}", headers=CLINIC_B).status_code == 404
+    assert client.get(f"/api/v1/citas/{cita_id}", headers=CLINIC_B).status_code == 404
+    assert client.delete(f"/api/v1/citas/{cita_id}", headers=CLINIC_B).status_code == 404
+    assert client.get("/api/v1/estadisticas/citas/estado", headers=CLINIC_B).json() == []
+    assert client.get("/api/v1/estadisticas/citas/estado?desde=2026-03-01T00:00:00", headers=CLINIC_B).json() == []
+    
+    assert [p["id"] for p in client.get("/api/v1/pacientes/", headers=CLINIC_A).json()] == [paciente_id]
+    assert client.get("/api/v1/estadisticas/citas/estado", headers=CLINIC_A).json() == [
+        {"clave": "programada", "total": 1}
+    ]
+
+
+def test_email_unique_per_tenant(client):
+    """Test the same email can be registered once in each clinic"""
+    create_paciente(client, CLINIC_A)
+    assert create_paciente(client, CLINIC_B)
+    paciente_data = {"nombre": "Tenant", "apellido": "User", "email": "tenant@example.com"}
+    response = client.post("/api/v1/pacientes/", json=paciente_data, headers=CLINIC_A)
+    assert response.status_code == 400
+
+
+def test_idempotency_keys_scoped_by_tenant(client):
+    """Test the same Idempotency-Key in two clinics creates two pacientes"""
+    paciente_data = {"nombre": "Tenant", "apellido": "User", "email": "tenant@example.com"}
+    first = client.post(
+        "/api/v1/pacientes/", json=paciente_data, headers={**CLINIC_A, "Idempotency-Key": "k1"}
+    )
+    second = client.post(
+        "/api/v1/pacientes/", json=paciente_data, headers={**CLINIC_B, "Idempotency-Key": "k1"}
+    )
+    assert first.status_code == second.status_code == 201
+    assert first.json()["id"] != second.json()["id"]
+
+
+def test_invalid_tenant_header(client):
+    """Test malformed tenant ids are rejected"""
+    response = client.get("/api/v1/pacientes/", headers={"X-Tenant-ID": "bad tenant!"})
+    assert response.status_code == 400
+
+
+def test_session_filter_and_stamping(db):
+    """Test scoped sessions stamp new rows and filter queries; unscoped see all"""
+    set_tenant(db, "clinica-a")
+    db.add(Paciente(nombre="A", apellido="A", email="a@example.com"))
+    db.commit()
+    set_tenant(db, "clinica-b")
+    db.add(Paciente(nombre="B", apellido="B", email="b@example.com"))
+    db.commit()
+    
+    assert [p.email for p in db.query(Paciente).all()] == ["b@example.com"]
+    assert db.query(Cita.id).filter(Cita.paciente_id == 1).all() == []
+    set_tenant(db, None)
+    assert {(p.tenant_id, p.email) for p in db.query(Paciente).all()} == {
+        ("clinica-a", "a@example.com"), ("clinica-b", "b@example.com")
+    }
+
+
+def test_add_tenant_columns_upgrades_old_tables(tmp_path):
+    """Test tables created before tenancy get tenant_id, backfilled, before the tenant indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE pacientes (id INTEGER PRIMARY KEY, nombre VARCHAR(100), apellido VARCHAR(100), "
+            "email VARCHAR(255) NOT NULL, created_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text("CREATE UNIQUE INDEX ix_pacientes_email ON pacientes (email)"))
+        for table, column in (("citas", "fecha_hora"), ("resultados", "fecha_examen")):
+            conn.execute(text(
+                f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, paciente_id INTEGER, {column} DATETIME, "
+                "created_at DATETIME, updated_at DATETIME)"
+            ))
+        conn.execute(text("INSERT INTO pacientes (nombre, apellido, email) VALUES ('Old', 'Row', 'old@example.com')"))
+    add_tenant_columns(engine)
+    add_tenant_columns(engine)  # idempotent
+    backfill_updated_at(engine)
+    add_soft_delete_columns(engine)
+    
+    for table in ("pacientes", "citas", "resultados"):
+        assert "tenant_id" in {column["name"] for column in inspect(engine).get_columns(table)}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT tenant_id FROM pacientes")).scalar() == get_settings().default_tenant
+        indexes = set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'pacientes'"
+        )).scalars())
+    assert "ix_pacientes_email" not in indexes
+    assert "ix_pacientes_tenant_email_lower_live" in indexes
+    engine.dispose()
+
+
+def test_partition_ddl():
+    """Test the generated Postgres partitioning DDL"""
+    statements = conversion_statements("citas", "tenant", 4)
+    assert "PARTITION BY HASH (tenant_id)" in statements[2]
+    assert "ADD PRIMARY KEY (id, tenant_id)" in statements[3]
+    assert statements[-1].endswith("(MODULUS 4, REMAINDER 3)")
+    assert "PARTITION BY RANGE (fecha_examen)" in conversion_statements("resultados", "month", 4)[2]
+    
+    months = month_partition_statements("citas", datetime(2026, 11, 15).date(), datetime(2027, 1, 1).date())
+    assert [s.split()[5] for s in months] == ["citas_202611", "citas_202612", "citas_202701"]
+    assert "TO ('2027-02-01 00:00:00+00')" in months[-1]
+    
+    split = split_default_statements("citas", datetime(2026, 11, 15).date(), datetime(2027, 1, 1).date())
+    assert split[0] == "ALTER TABLE citas DETACH PARTITION citas_default"
+    assert split[1:4] == months
+    assert split[4] == (
+        "INSERT INTO citas SELECT * FROM citas_default WHERE fecha_hora >= '2026-11-01 00:00:00+00' "
+        "AND fecha_hora < '2027-02-01 00:00:00+00'"
+    )
+    assert split[-1] == "ALTER TABLE citas ATTACH PARTITION citas_default DEFAULT"
+
+
+@pytest.mark.skipif(
+    not os.environ.get("PARTITION_TEST_DATABASE_URL"),
+    reason="needs a disposable Postgres database in PARTITION_TEST_DATABASE_URL"
+)
+def test_ensure_job_moves_rows_out_of_default_partition(monkeypatch):
+    """Test a cita booked past the horizon moves to its month once it's created"""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "partition_strategy", "month")
+    monkeypatch.setattr(settings, "partition_months_ahead", 1)
+    engine = create_engine(os.environ["PARTITION_TEST_DATABASE_URL"])
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    try:
+        setup_partitioning(engine)
+        fecha = utcnow() + timedelta(days=160)
+        with engine.begin() as conn:
+            conn.execute(insert(Paciente.__table__), {
+                "id": 1, "tenant_id": "default", "nombre": "Futura", "apellido": "Cita",
+                "email": "futura@example.com",
+            })
+            conn.execute(insert(Cita.__table__), {
+                "tenant_id": "default", "paciente_id": 1, "fecha_hora": fecha, "motivo": "Control",
+            })
+            assert conn.execute(text("SELECT count(*) FROM citas_default")).scalar() == 1
+        
+        monkeypatch.setattr(settings, "partition_months_ahead", 7)
+        for _ in range(2):  # and keeps succeeding afterwards
+            with Session(engine) as db:
+                ensure_partitions_job(db)
+                db.commit()
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM citas_default")).scalar() == 0
+            assert conn.execute(text(f"SELECT count(*) FROM citas_{fecha:%Y%m}")).scalar() == 1
+            assert conn.execute(text("SELECT count(*) FROM citas")).scalar() == 1
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
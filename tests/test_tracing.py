@@ -0,0 +1,111 @@
+import json
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app import tracing
+from app.config import get_settings
+from app.main import app
+from app.services.paciente_service import PacienteService
+from app.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+
+pytest.importorskip("opentelemetry.sdk")
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Enable tracing into an in-memory exporter"""
+    monkeypatch.setattr(get_settings(), "tracing_enabled", True)
+    exporter = InMemorySpanExporter()
+    setup_tracing(exporter)
+    yield exporter
+    shutdown_tracing()
+
+
+def test_tracing_disabled_is_noop():
+    """Test nothing is traced and service methods call straight through when disabled"""
+    assert setup_tracing() is False
+    assert tracing.get_tracer() is None
+    assert PacienteService.get_by_id.__wrapped__ is not None
+
+
+def test_request_service_and_sql_spans(client, spans):
+    """Test a create request is broken down into service, SQL and commit spans"""
+    traced_client = TestClient(TracingMiddleware(app))
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Traza", "apellido": "Span", "email": "traza@example.com"
+    }).json()["id"]
+    spans.clear()
+    
+    response = traced_client.post(
+        "/api/v1/resultados/",
+        json={
+            "paciente_id": paciente_id,
+            "tipo_examen": "Hemograma",
+            "fecha_examen": datetime(2026, 1, 1).isoformat(),
+            "resultado": "Normal",
+        },
+        headers={"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"},
+    )
+    assert response.status_code == 201
+    
+    finished = spans.get_finished_spans()
+    by_name = {span.name: span for span in finished}
+    root = by_name["POST /api/v1/resultados/"]
+    assert root.attributes["http.response.status_code"] == 201
+    assert root.attributes["http.route"] == "/api/v1/resultados/"
+    # The incoming traceparent is joined
+    assert format(root.context.trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+    assert all(span.context.trace_id == root.context.trace_id for span in finished)
+    
+    check = by_name["PacienteService.get_by_id"]
+    create = by_name["ResultadoService.create"]
+    assert check.parent.span_id == root.context.span_id
+    assert create.parent.span_id == root.context.span_id
+    assert by_name["ResultadoService.add"].parent.span_id == create.context.span_id
+    assert by_name["SELECT pacientes"].parent.span_id == check.context.span_id
+    insert = by_name["INSERT resultados"]
+    assert insert.attributes["db.system"] == "sqlite"
+    assert insert.attributes["db.statement"].startswith("INSERT INTO resultados")
+    assert by_name["COMMIT"].parent.span_id == create.context.span_id
+
+
+def test_route_template_names_request_span(client, spans):
+    """Test request spans are named after the route, not the concrete path"""
+    traced_client = TestClient(TracingMiddleware(app))
+    assert traced_client.get("/api/v1/pacientes/999").status_code == 404
+    # A parameter value equal to another segment of the path
+    assert traced_client.get("/api/v1/pacientes/v1").status_code == 422
+    assert traced_client.get("/health").status_code == 200
+    names = [span.name for span in spans.get_finished_spans() if span.kind.name == "SERVER"]
+    assert names == ["GET /api/v1/pacientes/{paciente_id}"] * 2
+
+
+def test_sample_ratio_zero_records_nothing(client, monkeypatch):
+    """Test unsampled traces produce no spans"""
+    monkeypatch.setattr(get_settings(), "tracing_enabled", True)
+    monkeypatch.setattr(get_settings(), "tracing_sample_ratio", 0.0)
+    exporter = InMemorySpanExporter()
+    setup_tracing(exporter)
+    try:
+        response = TestClient(TracingMiddleware(app)).get("/api/v1/pacientes/")
+        assert response.status_code == 200
+        assert exporter.get_finished_spans() == ()
+    finally:
+        shutdown_tracing()
+
+
+def test_file_exporter_writes_json_lines(client, monkeypatch, tmp_path):
+    """Test the file exporter writes one JSON span per line"""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(get_settings(), "tracing_enabled", True)
+    monkeypatch.setattr(get_settings(), "tracing_exporter", "file")
+    monkeypatch.setattr(get_settings(), "tracing_file", str(path))
+    setup_tracing()
+    try:
+        TestClient(TracingMiddleware(app)).get("/api/v1/pacientes/")
+    finally:
+        shutdown_tracing()
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert "GET /api/v1/pacientes/" in names
+    assert "PacienteService.get_all" in names